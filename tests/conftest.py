@@ -25,7 +25,11 @@ from zulipterminal.helper import (
 )
 from zulipterminal.helper import initial_index as helper_initial_index
 from zulipterminal.ui_tools.buttons import StreamButton, TopicButton, UserButton
-from zulipterminal.ui_tools.messages import MessageBox
+from zulipterminal.ui_tools.messages import (
+    MessageBox,
+    code_block_cache,
+    transformed_content_cache,
+)
 from zulipterminal.urwid_types import urwid_Size
 from zulipterminal.version import (
     MINIMUM_SUPPORTED_SERVER_VERSION,
@@ -52,6 +56,15 @@ def no_asynch(mocker: MockerFixture) -> None:
     mocker.patch("zulipterminal.helper.asynch")
 
 
+@pytest.fixture(autouse=True)
+def empty_transformed_content_cache() -> None:
+    """
+    Avoid transformed message content being reused between tests.
+    """
+    transformed_content_cache.clear()
+    code_block_cache.clear()
+
+
 # --------------- Controller Fixtures -----------------------------------------
 
 
@@ -1075,6 +1088,7 @@ def empty_index(
             edited_messages=set(),
             topics=defaultdict(list),
             search=set(),
+            reaction_summaries=dict(),
             messages=defaultdict(
                 lambda: {},
                 {
@@ -1463,8 +1477,8 @@ def processed_muted_topics(request: Any) -> Dict[Tuple[str], Optional[int]]:
 @pytest.fixture
 def classified_unread_counts() -> Dict[str, Any]:
     """
-    Unread counts return by
-    helper.classify_unread_counts function.
+    Unread counts derived by
+    helper.UnreadState from the unread messages in initial_data.
     """
     return {
         "all_msg": 12,
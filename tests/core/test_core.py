@@ -1,7 +1,7 @@
 import os
 import webbrowser
 from platform import platform
-from threading import Thread, Timer
+from threading import RLock, Thread, Timer
 from typing import Any, Dict, List, Optional, Set, Tuple
 
 import pyperclip
@@ -11,7 +11,8 @@ from pytest_mock import MockerFixture
 
 from zulipterminal.config.themes import generate_theme
 from zulipterminal.core import Controller
-from zulipterminal.helper import Index
+from zulipterminal.helper import Index, MessageListCache
+from zulipterminal.ui_tools.views import ModListWalker
 from zulipterminal.version import ZT_VERSION
 
 
@@ -71,6 +72,7 @@ class TestController:
         )
         result.view.message_view = mocker.Mock()  # set in View.__init__
         result.model.server_url = SERVER_URL
+        result.model.message_list_cache = MessageListCache(10, 5000)
         return result
 
     def test_initialize_controller(
@@ -150,12 +152,44 @@ class TestController:
 
         assert controller.model.stream_id == stream_id
         assert controller.model.narrow == [["stream", stream_name]]
-        controller.view.message_view.log.clear.assert_called_once_with()
+        controller.view.message_view.log.splice.assert_called_once()
 
-        widget = controller.view.message_view.log.extend.call_args_list[0][0][0][0]
+        widget = controller.view.message_view.log.splice.call_args_list[0][0][2][0]
         id_list = index_stream["stream_msg_ids_by_stream_id"][stream_id]
         assert {widget.original_widget.message["id"]} == id_list
 
+    def test_narrow_to_stream__returning_to_recent_narrow(
+        self,
+        mocker: MockerFixture,
+        controller: Controller,
+        index_stream: Index,
+        stream_id: int = 205,
+        stream_name: str = "PTEST",
+    ) -> None:
+        controller.model.narrow = []
+        controller.model.index = index_stream
+        log = ModListWalker(contents=[], action=mocker.Mock())
+        controller.view.message_view = mocker.Mock(log=log)
+        controller.model.stream_dict = {stream_id: {"name": stream_name}}
+        mocker.patch.object(controller.model, "get_messages")
+        create_msg_box_list = mocker.patch(
+            MODULE + ".create_msg_box_list",
+            side_effect=lambda model, msg_ids, **kwargs: [
+                mocker.Mock(name=f"Message {msg_id}") for msg_id in sorted(msg_ids)
+            ],
+        )
+
+        controller.narrow_to_stream(stream_name=stream_name)
+        stream_widgets = list(log)
+        controller.narrow_to_all_messages()
+        assert create_msg_box_list.call_count == 2
+
+        controller.narrow_to_stream(stream_name=stream_name)
+
+        assert create_msg_box_list.call_count == 2
+        assert list(log) == stream_widgets
+        assert controller.model.message_list_cache.hits == 1
+
     @pytest.mark.parametrize(
         ["initial_narrow", "initial_stream_id", "anchor", "expected_final_focus"],
         [
@@ -207,9 +241,11 @@ class TestController:
 
         assert controller.model.stream_id == stream_id
         assert controller.model.narrow == expected_narrow
-        controller.view.message_view.log.clear.assert_called_once_with()
+        controller.view.message_view.log.splice.assert_called_once()
 
-        widgets, focus = controller.view.message_view.log.extend.call_args_list[0][0]
+        widgets, focus = controller.view.message_view.log.splice.call_args_list[0][0][
+            2:
+        ]
         id_list = index_multiple_topic_msg["topic_msg_ids"][stream_id][topic_name]
         msg_ids = {widget.original_widget.message["id"] for widget in widgets}
         final_focus_msg_id = widgets[focus].original_widget.message["id"]
@@ -243,10 +279,10 @@ class TestController:
         controller.narrow_to_user(recipient_emails=emails)
 
         assert controller.model.narrow == [["pm-with", user_email]]
-        controller.view.message_view.log.clear.assert_called_once_with()
+        controller.view.message_view.log.splice.assert_called_once()
         recipients = frozenset([controller.model.user_id, user_id])
         assert controller.model.recipients == recipients
-        widget = controller.view.message_view.log.extend.call_args_list[0][0][0][0]
+        widget = controller.view.message_view.log.splice.call_args_list[0][0][2][0]
         id_list = index_user["private_msg_ids_by_user_ids"][recipients]
         assert {widget.original_widget.message["id"]} == id_list
 
@@ -278,9 +314,11 @@ class TestController:
         controller.narrow_to_all_messages(contextual_message_id=anchor)
 
         assert controller.model.narrow == []
-        controller.view.message_view.log.clear.assert_called_once_with()
+        controller.view.message_view.log.splice.assert_called_once()
 
-        widgets, focus = controller.view.message_view.log.extend.call_args_list[0][0]
+        widgets, focus = controller.view.message_view.log.splice.call_args_list[0][0][
+            2:
+        ]
         id_list = index_all_messages["all_msg_ids"]
         msg_ids = {widget.original_widget.message["id"] for widget in widgets}
         final_focus_msg_id = widgets[focus].original_widget.message["id"]
@@ -299,9 +337,9 @@ class TestController:
         controller.narrow_to_all_pm()  # FIXME: Add id narrowing test
 
         assert controller.model.narrow == [["is", "private"]]
-        controller.view.message_view.log.clear.assert_called_once_with()
+        controller.view.message_view.log.splice.assert_called_once()
 
-        widgets = controller.view.message_view.log.extend.call_args_list[0][0][0]
+        widgets = controller.view.message_view.log.splice.call_args_list[0][0][2]
         id_list = index_user["private_msg_ids"]
         msg_ids = {widget.original_widget.message["id"] for widget in widgets}
         assert msg_ids == id_list
@@ -326,10 +364,10 @@ class TestController:
         controller.narrow_to_all_starred()  # FIXME: Add id narrowing test
 
         assert controller.model.narrow == [["is", "starred"]]
-        controller.view.message_view.log.clear.assert_called_once_with()
+        controller.view.message_view.log.splice.assert_called_once()
 
         id_list = index_all_starred["starred_msg_ids"]
-        widgets = controller.view.message_view.log.extend.call_args_list[0][0][0]
+        widgets = controller.view.message_view.log.splice.call_args_list[0][0][2]
         msg_ids = {widget.original_widget.message["id"] for widget in widgets}
         assert msg_ids == id_list
 
@@ -353,10 +391,10 @@ class TestController:
         controller.narrow_to_all_mentions()  # FIXME: Add id narrowing test
 
         assert controller.model.narrow == [["is", "mentioned"]]
-        controller.view.message_view.log.clear.assert_called_once_with()
+        controller.view.message_view.log.splice.assert_called_once()
 
         id_list = index_all_mentions["mentioned_msg_ids"]
-        widgets = controller.view.message_view.log.extend.call_args_list[0][0][0]
+        widgets = controller.view.message_view.log.splice.call_args_list[0][0][2]
         msg_ids = {widget.original_widget.message["id"] for widget in widgets}
         assert msg_ids == id_list
 
@@ -559,6 +597,103 @@ class TestController:
         create_msg.assert_called_once_with(controller.model, msg_ids)
         assert controller.model.index == dict(index_search_messages, search=msg_ids)
 
+    def test_jump_to_time__loaded_message(
+        self, mocker: MockerFixture, controller: Controller
+    ) -> None:
+        mocker.patch(MODEL + ".find_message_id_at_time", return_value=2)
+        mocker.patch(MODULE + ".Controller.update_screen")
+        mocker.patch(
+            MODEL + ".get_message_ids_in_current_narrow", return_value={1, 2, 3}
+        )
+        get_messages = mocker.patch(MODEL + ".get_messages")
+        create_msg_box_list = mocker.patch(MODULE + ".create_msg_box_list")
+        log = ModListWalker(
+            contents=[
+                mocker.Mock(original_widget=mocker.Mock(message={"id": msg_id}))
+                for msg_id in (1, 2, 3)
+            ],
+            action=lambda: None,
+        )
+        controller.view.message_view.log = log
+
+        controller.jump_to_time(1000)
+
+        assert log.focus == 1
+        get_messages.assert_not_called()
+        create_msg_box_list.assert_not_called()
+
+    def test_jump_to_time__unloaded_message(
+        self, mocker: MockerFixture, controller: Controller
+    ) -> None:
+        mocker.patch(MODEL + ".find_message_id_at_time", return_value=7)
+        mocker.patch(MODULE + ".Controller.update_screen")
+        msg_ids = [{1, 2, 3}, {6, 7, 8}]
+        mocker.patch(MODEL + ".get_message_ids_in_current_narrow", side_effect=msg_ids)
+        unload_messages = mocker.patch(MODEL + ".unload_messages_in_current_narrow")
+        get_messages = mocker.patch(MODEL + ".get_messages")
+        get_messages.side_effect = (
+            lambda **kwargs: unload_messages.assert_called_once_with()
+        )
+        w_list = ["w6", "w7", "w8"]
+        create_msg_box_list = mocker.patch(
+            MODULE + ".create_msg_box_list", return_value=w_list
+        )
+        mocker.patch(MODEL + ".get_focus_in_current_narrow", return_value=1)
+        log = ModListWalker(contents=["w1", "w2", "w3"], action=lambda: None)
+        controller.view.message_view.log = log
+
+        controller.jump_to_time(1000)
+
+        get_messages.assert_called_once_with(num_before=30, num_after=10, anchor=7)
+        create_msg_box_list.assert_called_once_with(
+            controller.model, msg_ids[1], focus_msg_id=7
+        )
+        assert list(log) == w_list
+        assert log.focus == 1
+
+    def test_jump_to_time__beyond_loaded_messages(
+        self, mocker: MockerFixture, controller: Controller, initial_index: Index
+    ) -> None:
+        model = controller.model
+        model.state_lock = RLock()
+        model.narrow = []
+        model.index = initial_index
+        model.index["all_msg_ids"] = {101, 102, 103}
+        model._have_last_message = {"[]": True}
+        mocker.patch(MODEL + ".find_message_id_at_time", return_value=7)
+        mocker.patch(MODULE + ".Controller.update_screen")
+
+        def get_messages(**kwargs: Any) -> str:
+            assert not model._have_last_message.get("[]", False)
+            model.index["all_msg_ids"] |= {6, 7, 8}
+            return ""
+
+        mocker.patch(MODEL + ".get_messages", side_effect=get_messages)
+        create_msg_box_list = mocker.patch(
+            MODULE + ".create_msg_box_list", return_value=["w6", "w7", "w8"]
+        )
+        mocker.patch(MODEL + ".get_focus_in_current_narrow", return_value=1)
+        controller.view.message_view.log = ModListWalker(
+            contents=["w101", "w102", "w103"], action=lambda: None
+        )
+
+        controller.jump_to_time(1000)
+
+        # Only the messages around the time are listed, not those loaded before
+        create_msg_box_list.assert_called_once_with(model, {6, 7, 8}, focus_msg_id=7)
+        assert list(controller.view.message_view.log) == ["w6", "w7", "w8"]
+
+    def test_jump_to_time__no_messages(
+        self, mocker: MockerFixture, controller: Controller
+    ) -> None:
+        mocker.patch(MODEL + ".find_message_id_at_time", return_value=None)
+        report_error = mocker.patch(MODULE + ".Controller.report_error")
+
+        controller.jump_to_time(1000)
+
+        report_error.assert_called_once_with(["No messages to jump to in this narrow"])
+        controller.view.message_view.log.splice.assert_not_called()
+
     @pytest.mark.parametrize(
         "screen_size, expected_popup_size",
         [
@@ -1,15 +1,22 @@
-from typing import Any, Callable, Dict, Iterable, List, Set, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 import pytest
 from pytest import param as case
 from pytest_mock import MockerFixture
 
-from zulipterminal.api_types import Composition
+from zulipterminal.api_types import Composition, Message, UnreadMessageDetails
 from zulipterminal.config.keys import primary_display_key_for_command
 from zulipterminal.helper import (
+    CachedMessageList,
+    IncrementalSearch,
     Index,
+    LRUCache,
+    MessageListCache,
+    StreamData,
+    StreamSearchIndex,
+    UnreadState,
+    UnreadTopicOrder,
     canonicalize_color,
-    classify_unread_counts,
     display_error_if_present,
     download_media,
     get_unused_fence,
@@ -19,7 +26,7 @@ from zulipterminal.helper import (
     open_media,
     powerset,
     process_media,
-    sort_unread_topics,
+    update_unread_counts_in_view,
 )
 
 
@@ -246,38 +253,120 @@ def test_powerset(
 
 
 @pytest.mark.parametrize(
-    "unread_topics, expected_value",
+    "current_topic, next_topic",
     [
-        case({}, [], id="no_unread_topics"),
-        case(
-            {(99, "topic1"): 1},
-            [(99, "topic1")],
-            id="single_unread_topic",
-        ),
-        case(
-            {(999, "topic3"): 1, (1000, "topic2"): 1, (1, "topic1"): 1},
-            [(1000, "topic2"), (1, "topic1"), (999, "topic3")],
-            id="multiple_unread_topics",
-        ),
-        case(
-            {
-                (999, "topic3"): 1,
-                (1000, "topic2"): 1,
-                (1000, "topic4"): 3,
-                (1, "topic1"): 1,
-            },
-            [(1000, "topic2"), (1000, "topic4"), (1, "topic1"), (999, "topic3")],
-            id="multiple_unread_topics_in_same_stream",
-        ),
+        case(None, (1000, "topic2"), id="no_current_topic"),
+        case((1000, "topic2"), (1000, "topic4"), id="next_in_same_stream"),
+        case((1000, "topic3"), (1000, "topic4"), id="current_topic_not_unread"),
+        case((1000, "topic4"), (1000, "topic2"), id="wrap_around_in_same_stream"),
+        case((1, "topic1"), (999, "topic3"), id="next_stream"),
+        case((999, "topic3"), (1000, "topic2"), id="wrap_around_to_first_stream"),
+        case((5, "topic"), (1000, "topic2"), id="stream_not_in_order"),
     ],
 )
-def test_sort_unread_topics(
-    unread_topics: Dict[Tuple[int, str], int],
-    expected_value: List[Tuple[int, str]],
-    streams: List[Dict[str, Any]],
+def test_UnreadTopicOrder__next_topic(
+    current_topic: Optional[Tuple[int, str]], next_topic: Tuple[int, str]
 ) -> None:
-    stream_list = [stream["id"] for stream in streams]
-    assert sort_unread_topics(unread_topics, stream_list) == expected_value
+    topic_order = UnreadTopicOrder([1000, 1, 999], set())
+    for stream_id, topic in [
+        (999, "topic3"),
+        (1000, "topic4"),
+        (1, "topic1"),
+        (1000, "topic2"),
+    ]:
+        topic_order.update(stream_id, topic, True)
+
+    assert topic_order.next_topic(current_topic) == next_topic
+
+
+def test_UnreadTopicOrder__no_other_topics() -> None:
+    topic_order = UnreadTopicOrder([1000, 1], set())
+    assert topic_order.next_topic(None) is None
+
+    topic_order.update(1, "topic1", True)
+    topic_order.update(1, "topic1", True)  # Ignored if already unread
+
+    assert topic_order.next_topic((1, "topic1")) is None
+    assert topic_order.next_topic((1000, "topic")) == (1, "topic1")
+
+    topic_order.update(1, "topic1", False)
+
+    assert topic_order.next_topic(None) is None
+
+
+def test_UnreadTopicOrder__changes_in_streams() -> None:
+    topic_order = UnreadTopicOrder([1000, 1], {1})
+    topic_order.update(1, "topic1", True)
+    topic_order.update(1000, "topic2", True)
+    topic_order.update(99, "topic3", True)  # Ordered after streams in the order
+
+    # Topics in muted streams are skipped
+    assert topic_order.next_topic((1000, "topic2")) == (99, "topic3")
+    topic_order.set_stream_muted(1, False)
+    assert topic_order.next_topic((1000, "topic2")) == (1, "topic1")
+
+    topic_order.set_stream_order([1, 99, 1000])
+    assert topic_order.next_topic((1, "topic1")) == (99, "topic3")
+
+    topic_order.set_stream_muted(99, True)
+    assert topic_order.next_topic((1, "topic1")) == (1000, "topic2")
+    topic_order.set_stream_muted(99, False)
+    assert topic_order.next_topic((1, "topic1")) == (99, "topic3")
+
+
+def test_UnreadTopicOrder__current_topic_in_muted_stream() -> None:
+    topic_order = UnreadTopicOrder([1000, 1, 999], {1})
+    topic_order.update(1000, "topic2", True)
+    topic_order.update(1, "topic1", True)
+    topic_order.update(999, "topic3", True)
+
+    # The next unmuted unread topic, following the muted stream
+    assert topic_order.next_topic((1, "topic1")) == (999, "topic3")
+    assert topic_order.next_topic((1, "other topic")) == (999, "topic3")
+
+
+def unread_message(
+    message_id: int, sender_id: int, stream_id: Optional[int] = None, topic: str = ""
+) -> Message:
+    if stream_id is None:
+        return Message(
+            id=message_id,
+            type="private",
+            sender_id=sender_id,
+            display_recipient=[{"id": sender_id}, {"id": 1}],
+            flags=[],
+        )
+    return Message(
+        id=message_id,
+        type="stream",
+        sender_id=sender_id,
+        stream_id=stream_id,
+        subject=topic,
+        flags=["mentioned"] if message_id == 1 else [],
+    )
+
+
+@pytest.fixture
+def unread_model(
+    mocker: MockerFixture,
+    initial_data: Dict[str, Any],
+    stream_dict: Dict[int, Dict[str, Any]],
+) -> Any:
+    model = mocker.Mock()
+    model.user_id = 1001
+    model.stream_dict = stream_dict
+    model.initial_data = initial_data
+    model.muted_topics = []
+    model.is_muted_topic = mocker.Mock(
+        side_effect=(
+            lambda stream_id, topic: [model.stream_dict[stream_id]["name"], topic]
+            in model.muted_topics
+        )
+    )
+    model.muted_streams = set()
+    model.pinned_streams = [{"id": 1000}]
+    model.unpinned_streams = [{"id": 99}]
+    return model
 
 
 @pytest.mark.parametrize(
@@ -311,29 +400,257 @@ def test_sort_unread_topics(
         "no_mute_some_other_stream_muted",
     ],
 )
-def test_classify_unread_counts(
-    mocker: MockerFixture,
-    initial_data: Dict[str, Any],
-    stream_dict: Dict[int, Dict[str, Any]],
+def test_UnreadState__counts(
+    unread_model: Any,
     classified_unread_counts: Dict[str, Any],
     muted_topics: List[List[str]],
     muted_streams: Set[int],
     vary_in_unreads: Dict[str, Any],
 ) -> None:
-    model = mocker.Mock()
-    model.stream_dict = stream_dict
-    model.initial_data = initial_data
-    model.is_muted_topic = mocker.Mock(
-        side_effect=(
-            lambda stream_id, topic: [model.stream_dict[stream_id]["name"], topic]
-            in muted_topics
-        )
+    unread_model.muted_topics = muted_topics
+    unread_model.muted_streams = muted_streams
+
+    unread_state = UnreadState(unread_model, unread_model.initial_data["unread_msgs"])
+
+    assert unread_state.counts == dict(classified_unread_counts, **vary_in_unreads)
+
+
+def test_UnreadState__remove(unread_model: Any) -> None:
+    unread_state = UnreadState(unread_model, unread_model.initial_data["unread_msgs"])
+
+    # Read messages (or those never unread) are ignored if marked read again
+    assert unread_state.remove([1, 4, 5, 11, 500]) == {
+        1,
+        (1000, "Some general unread topic"),
+        frozenset({1001, 11, 12}),
+    }
+    assert unread_state.remove([1, 4, 5, 11, 500]) == set()
+
+    assert unread_state.counts == {
+        "all_msg": 8,
+        "all_pms": 6,
+        "all_mentions": 0,
+        "unread_topics": {
+            (1000, "Some general unread topic"): 1,
+            (99, "Some private unread topic"): 1,
+        },
+        "unread_pms": {1: 1, 2: 1},
+        "unread_huddles": {
+            frozenset({1001, 11, 12}): 2,
+            frozenset({1001, 11, 12, 13}): 2,
+        },
+        "streams": {1000: 1, 99: 1},
+    }
+
+
+def test_UnreadState__add_message(unread_model: Any) -> None:
+    unread_model.initial_data["unread_msgs"]["mentions"] = [4]
+    unread_state = UnreadState(unread_model, unread_model.initial_data["unread_msgs"])
+    unread_state.remove([4, 5, 6, 7])
+    assert unread_state.counts["all_mentions"] == 0
+
+    # Messages already unread are ignored if marked unread again
+    assert unread_state.add_message(unread_message(1, 1, stream_id=99, topic="x"))
+    assert not unread_state.add_message(unread_message(1, 1, stream_id=99, topic="x"))
+    assert not unread_state.add_message(unread_message(3, 2))
+    assert unread_state.add_message(unread_message(20, 2)) == 2
+
+    assert unread_state.counts["unread_topics"] == {(99, "x"): 1}
+    assert unread_state.counts["streams"] == {99: 1}
+    # Message 1 is no longer unread from its direct message sender
+    assert unread_state.counts["unread_pms"] == {1: 1, 2: 2}
+    assert unread_state.counts["all_msg"] == 9
+    assert unread_state.counts["all_pms"] == 8
+    assert unread_state.counts["all_mentions"] == 1
+
+
+@pytest.mark.parametrize(
+    "details, expected_key",
+    [
+        case({"type": "stream", "stream_id": 99, "topic": "x"}, (99, "x"), id="stream"),
+        case({"type": "private", "user_ids": []}, 1001, id="self_pm"),
+        case({"type": "private", "user_ids": [11]}, 11, id="pm"),
+        case(
+            {"type": "private", "user_ids": [11, 12]},
+            frozenset({1001, 11, 12}),
+            id="group_pm",
+        ),
+    ],
+)
+def test_UnreadState__add_message_details(
+    unread_model: Any, details: UnreadMessageDetails, expected_key: Any
+) -> None:
+    unread_state = UnreadState(unread_model, unread_model.initial_data["unread_msgs"])
+
+    assert unread_state.add_message_details(200, details) == expected_key
+
+    # Message 200 is unread here, but not in the original unread messages
+    assert unread_state.find_inconsistencies(unread_model.initial_data["unread_msgs"])
+
+
+def test_UnreadState__move(unread_model: Any) -> None:
+    unread_state = UnreadState(unread_model, unread_model.initial_data["unread_msgs"])
+    old_key = (1000, "Some general unread topic")
+
+    # Read messages and direct messages are not moved
+    keys = unread_state.move([1, 4, 5, 300], stream_id=99, topic=None)
+
+    assert keys == {old_key, (99, "Some general unread topic")}
+    assert unread_state.counts["unread_topics"] == {
+        old_key: 1,
+        (99, "Some general unread topic"): 2,
+        (99, "Some private unread topic"): 1,
+    }
+    assert unread_state.counts["streams"] == {1000: 1, 99: 3}
+    assert unread_state.counts["unread_pms"] == {1: 2, 2: 1}
+    assert unread_state.counts["all_msg"] == 12
+
+
+def test_UnreadState__update_stream_muting(unread_model: Any) -> None:
+    unread_state = UnreadState(unread_model, unread_model.initial_data["unread_msgs"])
+
+    unread_model.muted_streams.add(1000)
+    unread_state.update_stream_muting(1000)
+
+    assert unread_state.counts["all_msg"] == 9
+    assert unread_state.counts["streams"][1000] == 3
+
+    unread_model.muted_streams.remove(1000)
+    unread_state.update_stream_muting(1000)
+
+    assert unread_state.counts["all_msg"] == 12
+
+
+def test_UnreadState__update_topic_muting(unread_model: Any) -> None:
+    unread_state = UnreadState(unread_model, unread_model.initial_data["unread_msgs"])
+    key = (1000, "Some general unread topic")
+
+    unread_model.muted_topics = [["Some general stream", key[1]]]
+    unread_state.update_topic_muting(*key)
+
+    assert unread_state.counts["all_msg"] == 9
+    assert key not in unread_state.counts["unread_topics"]
+    assert 1000 not in unread_state.counts["streams"]
+
+    # Unmuting a topic in a muted stream restores only the stream counts
+    unread_model.muted_streams.add(1000)
+    unread_model.muted_topics = []
+    unread_state.update_topic_muting(*key)
+
+    assert unread_state.counts["all_msg"] == 9
+    assert unread_state.counts["unread_topics"][key] == 3
+    assert unread_state.counts["streams"][1000] == 3
+
+    unread_model.muted_streams.remove(1000)
+    unread_state.update_stream_muting(1000)
+
+    assert unread_state.counts["all_msg"] == 12
+
+
+def test_UnreadState__topic_order(unread_model: Any) -> None:
+    general_topic = (1000, "Some general unread topic")
+    private_topic = (99, "Some private unread topic")
+    unread_state = UnreadState(unread_model, unread_model.initial_data["unread_msgs"])
+    topic_order = unread_state.topic_order
+
+    assert topic_order.next_topic(None) == general_topic
+    assert topic_order.next_topic(general_topic) == private_topic
+
+    unread_model.muted_streams.add(99)
+    unread_state.update_stream_muting(99)
+    assert topic_order.next_topic(general_topic) is None
+
+    unread_model.muted_streams.remove(99)
+    unread_state.update_stream_muting(99)
+    unread_model.pinned_streams, unread_model.unpinned_streams = (
+        unread_model.unpinned_streams,
+        unread_model.pinned_streams,
     )
-    model.muted_streams = muted_streams
-    assert classify_unread_counts(model) == dict(
-        classified_unread_counts, **vary_in_unreads
+    unread_state.update_stream_order()
+    assert topic_order.next_topic(None) == private_topic
+
+    unread_model.muted_topics = [["Secret stream", private_topic[1]]]
+    unread_state.update_topic_muting(*private_topic)
+    assert topic_order.next_topic(None) == general_topic
+
+    unread_state.remove([4, 5, 6])
+    assert topic_order.next_topic(None) is None
+
+
+def test_UnreadState__find_inconsistencies(unread_model: Any) -> None:
+    unread_msgs = unread_model.initial_data["unread_msgs"]
+    unread_state = UnreadState(unread_model, unread_msgs)
+    assert unread_state.find_inconsistencies(unread_msgs) == []
+
+    # Simulate missing the event for a message being read
+    unread_state.remove([7])
+
+    assert unread_state.find_inconsistencies(unread_msgs) == [
+        "Message 7 is unread in None, but in (99, 'Some private unread topic')"
+        " from the server",
+        "Counts all_msg are 11, but 12 from the server",
+        "Counts unread_topics are {(1000, 'Some general unread topic'): 3},"
+        " but {(1000, 'Some general unread topic'): 3,"
+        " (99, 'Some private unread topic'): 1} from the server",
+        "Counts streams are {1000: 3}, but {1000: 3, 99: 1} from the server",
+    ]
+
+
+@pytest.fixture
+def unread_counts_controller(mocker: MockerFixture) -> Any:
+    controller = mocker.Mock()
+    controller.model.is_muted_stream.side_effect = lambda stream_id: stream_id == 30
+    controller.model.is_muted_topic.return_value = False
+    controller.model.unread_counts = {
+        "all_msg": 1,
+        "all_pms": 0,
+        "all_mentions": 0,
+        "unread_topics": {(20, "c"): 1, (30, "d"): 1},
+        "unread_pms": {},
+        "unread_huddles": {},
+        "streams": {20: 1, 30: 1},
+    }
+    view = controller.view
+    view.left_panel.is_in_topic_view = True
+    view.topic_w.stream_button.stream_id = 10
+    # Only the buttons found through these registries should be updated
+    view.stream_id_to_button = {
+        stream_id: mocker.Mock(count=count)
+        for stream_id, count in ((10, 3), (20, 1), (30, 1))
+    }
+    view.topic_w.topic_name_to_button = {
+        topic: mocker.Mock(count=count) for topic, count in (("a", 2), ("b", 1))
+    }
+    view.user_id_to_button = {2: mocker.Mock(count=2), 3: mocker.Mock(count=0)}
+    view.mentioned_button.count = 1
+    view.pm_button.count = 2
+    view.home_button.count = 1
+    return controller
+
+
+def test_update_unread_counts_in_view(unread_counts_controller: Any) -> None:
+    controller = unread_counts_controller
+    view = controller.view
+
+    update_unread_counts_in_view(
+        controller, [(10, "a"), (10, "b"), (30, "d"), (40, "e"), 2, frozenset({2, 3})]
     )
 
+    # Buttons are set to the counts in the model
+    view.stream_id_to_button[10].update_count.assert_called_once_with(0)
+    view.stream_id_to_button[20].update_count.assert_not_called()
+    # Muted streams show that they are muted, rather than a count
+    view.stream_id_to_button[30].update_count.assert_not_called()
+    view.topic_w.topic_name_to_button["a"].update_count.assert_called_once_with(0)
+    view.topic_w.topic_name_to_button["b"].update_count.assert_called_once_with(0)
+    view.user_id_to_button[2].update_count.assert_called_once_with(0)
+    view.user_id_to_button[3].update_count.assert_not_called()
+    # Buttons with overall counts are only set if those counts changed
+    view.mentioned_button.update_count.assert_called_once_with(0)
+    view.pm_button.update_count.assert_called_once_with(0)
+    view.home_button.update_count.assert_not_called()
+    controller.update_screen.assert_called_once_with()
+
 
 @pytest.mark.parametrize(
     "color", ["#ffffff", "#f0f0f0", "#f0f1f2", "#fff", "#FFF", "#F3F5FA"]
@@ -652,3 +969,177 @@ def test_open_media_tool_exception(
     open_media(controller, tool, media_path)
 
     controller.report_error.assert_called_once_with(error)
+
+
+def test_LRUCache__evicts_least_recently_used() -> None:
+    cache: LRUCache[str, int] = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+
+    cache.put("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_LRUCache__contains() -> None:
+    cache: LRUCache[str, int] = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+
+    assert "a" in cache
+    assert "c" not in cache
+
+    cache.put("c", 3)  # Checking "a" did not make it more recently used
+
+    assert "a" not in cache
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_LRUCache__clear() -> None:
+    cache: LRUCache[str, int] = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    cache.clear()
+
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def cached_message_list(*msg_ids: int) -> CachedMessageList:
+    return CachedMessageList(set(msg_ids), [f"widget {id}" for id in msg_ids], 0)
+
+
+@pytest.mark.parametrize(
+    "msg_ids, expected_entry",
+    [
+        case({1, 2}, cached_message_list(1, 2), id="unchanged_messages"),
+        case({1, 2, 3}, None, id="new_message"),
+        case({1}, None, id="removed_message"),
+    ],
+)
+def test_MessageListCache__pop(
+    msg_ids: Set[int], expected_entry: Optional[CachedMessageList]
+) -> None:
+    cache = MessageListCache(max_narrows=2, max_messages=10)
+    cache.put("[]", cached_message_list(1, 2))
+
+    assert cache.pop("[]", msg_ids) == expected_entry
+    # Entries are only used once, whether or not they are still valid
+    assert len(cache) == 0
+    assert cache.pop("[]", msg_ids) is None
+    expected_hits = 0 if expected_entry is None else 1
+    assert (cache.hits, cache.misses) == (expected_hits, 2 - expected_hits)
+
+
+def test_MessageListCache__evicts_least_recently_cached() -> None:
+    cache = MessageListCache(max_narrows=2, max_messages=5)
+    cache.put("a", cached_message_list(1))
+    cache.put("b", cached_message_list(2))
+    cache.put("c", cached_message_list(3))  # Too many narrows
+    assert cache.pop("a", {1}) is None
+
+    cache.put("d", cached_message_list(4, 5, 6, 7, 8))  # Too many messages
+    assert cache.pop("b", {2}) is None
+    assert cache.pop("c", {3}) is None
+    assert cache.pop("d", {4, 5, 6, 7, 8}) is not None
+
+    cache.put("e", cached_message_list(*range(6)))  # Too large to cache
+    cache.put("f", cached_message_list())  # Nothing to cache
+    assert len(cache) == 0
+
+
+def test_MessageListCache__discard_messages() -> None:
+    cache = MessageListCache(max_narrows=3, max_messages=10)
+    cache.put("a", cached_message_list(1, 2))
+    cache.put("b", cached_message_list(2, 3))
+    cache.put("c", cached_message_list(4))
+
+    cache.discard_messages([2, 5])
+
+    assert str(cache) == "1/3 narrows, 1/10 messages, 0 hits, 0 misses"
+    assert cache.pop("c", {4}) is not None
+
+
+@pytest.mark.parametrize(
+    "last_text, text, expect_last_results",
+    [
+        case("", "a", False, id="no_last_search"),
+        case("a", "ab", True, id="extended_text"),
+        case("a", "AB", True, id="extended_text_other_case"),
+        case("ab", "a", False, id="shortened_text"),
+        case("ab", "ac", False, id="changed_text"),
+    ],
+)
+def test_IncrementalSearch__candidates(
+    last_text: str, text: str, expect_last_results: bool
+) -> None:
+    items = ["a", "ab", "abc", "b"]
+    last_results = [item for item in items if item.startswith(last_text)]
+    search: IncrementalSearch[str] = IncrementalSearch()
+    search.update(items, last_text, last_results)
+
+    candidates = search.candidates(items, text)
+
+    assert candidates is (last_results if expect_last_results else items)
+
+
+def test_IncrementalSearch__candidates__other_items() -> None:
+    search: IncrementalSearch[str] = IncrementalSearch()
+    search.update(["a", "ab"], "a", ["a", "ab"])
+    items = ["a", "ab"]
+
+    assert search.candidates(items, "ab") is items
+
+
+def stream_data(name: str) -> StreamData:
+    # NOTE Only the name is used in searches
+    return StreamData(
+        name=name,
+        id=len(name),
+        color="#ffffff",
+        stream_access_type="public",
+        description="",
+    )
+
+
+@pytest.mark.parametrize(
+    "search_text, expected_names",
+    [
+        case(
+            "",
+            ["Stream 1", "Web public", "design/ux", "dev-help", "general", "Some dev"],
+            id="no_search_text",
+        ),
+        case("s", ["Stream 1", "Some dev"], id="first_word"),
+        case("dev", ["dev-help", "Some dev"], id="first_word_before_later_word"),
+        case("HELP", ["dev-help"], id="case_insensitive_delimited_word"),
+        case("ux", ["design/ux"], id="slash_delimited_word"),
+        case("pub", ["Web public"], id="pinned_later_word"),
+        case("some d", ["Some dev"], id="with_space"),
+        case("devs", [], id="no_match"),
+    ],
+)
+def test_StreamSearchIndex__match(search_text: str, expected_names: List[str]) -> None:
+    pinned_streams = [stream_data(name) for name in ("Stream 1", "Web public")]
+    unpinned_streams = [
+        stream_data(name) for name in ("design/ux", "dev-help", "general", "Some dev")
+    ]
+    index = StreamSearchIndex(pinned_streams, unpinned_streams)
+
+    assert index.match(search_text) == expected_names
+
+
+def test_StreamSearchIndex__rebuild() -> None:
+    index = StreamSearchIndex([], [stream_data("general"), stream_data("Gym")])
+    assert index.match("g") == ["general", "Gym"]
+
+    index.rebuild([stream_data("Gym")], [stream_data("general")])
+
+    assert index.match("g") == ["Gym", "general"]
@@ -2,7 +2,9 @@ import copy
 import json
 from collections import OrderedDict
 from copy import deepcopy
-from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from queue import Queue
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import pytest
 from pytest import param as case
@@ -10,8 +12,16 @@ from pytest_mock import MockerFixture
 from zulip import Client, ZulipError
 
 from zulipterminal.config.symbols import STREAM_TOPIC_SEPARATOR
-from zulipterminal.helper import initial_index, powerset
+from zulipterminal.helper import (
+    CachedMessageList,
+    UnreadState,
+    initial_index,
+    powerset,
+    summarize_reactions,
+)
 from zulipterminal.model import (
+    EVENT_QUEUE_HIGH_WATER_MARK,
+    JUMP_TO_TIME_MAXIMUM_PROBES,
     MAX_MESSAGE_LENGTH,
     MAX_STREAM_NAME_LENGTH,
     MAX_TOPIC_NAME_LENGTH,
@@ -31,6 +41,19 @@ MODEL = MODULE + ".Model"
 CONTROLLER = "zulipterminal.core.Controller"
 
 
+def unread_msgs_in_topics(unread_topics: Set[Tuple[int, str]]) -> Dict[str, Any]:
+    # NOTE Not important how many unreads per topic, so just use one message each
+    return {
+        "pms": [],
+        "streams": [
+            {"stream_id": stream_id, "topic": topic, "unread_message_ids": [i]}
+            for i, (stream_id, topic) in enumerate(sorted(unread_topics))
+        ],
+        "huddles": [],
+        "mentions": [],
+    }
+
+
 class TestModel:
     @pytest.fixture(autouse=True)
     def mock_external_classes(self, mocker: Any) -> None:
@@ -52,9 +75,7 @@ class TestModel:
         self.client.register.return_value = initial_data
         mocker.patch(MODEL + "._update_users_data_from_initial_data")
         # NOTE: PATCH WHERE USED NOT WHERE DEFINED
-        self.classify_unread_counts = mocker.patch(
-            MODULE + ".classify_unread_counts", return_value=[]
-        )
+        self.unread_state = mocker.patch(MODULE + ".UnreadState")
         self.client.get_profile.return_value = user_profile
         mocker.patch(MODULE + ".unicode_emojis", EMOJI_DATA=unicode_emojis)
         model = Model(self.controller)
@@ -92,8 +113,11 @@ class TestModel:
         # FIXME Add test here for model.server_url
         model._update_users_data_from_initial_data.assert_called_once_with()
         assert model.users == []
-        self.classify_unread_counts.assert_called_once_with(model)
-        assert model.unread_counts == []
+        self.unread_state.assert_called_once_with(
+            model, model.initial_data["unread_msgs"]
+        )
+        assert model.unread_state == self.unread_state.return_value
+        assert model.unread_counts == self.unread_state.return_value.counts
         assert model.active_emoji_data == OrderedDict(
             sorted(
                 {**unicode_emojis, **realm_emojis_data, **zulip_emoji}.items(),
@@ -205,9 +229,7 @@ class TestModel:
 
         mocker.patch(MODEL + "._update_users_data_from_initial_data")
         mocker.patch(MODEL + "._subscribe_to_streams")
-        self.classify_unread_counts = mocker.patch(
-            MODULE + ".classify_unread_counts", return_value=[]
-        )
+        self.unread_state = mocker.patch(MODULE + ".UnreadState")
 
         with pytest.raises(ServerConnectionFailure) as e:
             Model(self.controller)
@@ -223,9 +245,7 @@ class TestModel:
 
         mocker.patch(MODEL + "._update_users_data_from_initial_data")
         mocker.patch(MODEL + "._subscribe_to_streams")
-        self.classify_unread_counts = mocker.patch(
-            MODULE + ".classify_unread_counts", return_value=[]
-        )
+        self.unread_state = mocker.patch(MODULE + ".UnreadState")
 
         with pytest.raises(ServerConnectionFailure) as e:
             Model(self.controller)
@@ -245,8 +265,11 @@ class TestModel:
             "reaction",
             "submessage",
             "subscription",
+            "muted_topics",
+            "user_topic",
             "typing",
             "update_message_flags",
+            "delete_message",
             "user_settings",
             "realm_emoji",
             "realm_user",
@@ -519,6 +542,23 @@ class TestModel:
         model.index = index
         assert current_ids == model.get_message_ids_in_current_narrow()
 
+    def test_unload_messages_in_current_narrow(self, model):
+        model.stream_id = 1
+        model.narrow = [["stream", "FOO"]]
+        model.index = {
+            "all_msg_ids": {0, 1, 2},
+            "stream_msg_ids_by_stream_id": {1: {0, 1}, 2: {2}},
+        }
+        model._have_last_message = {repr(model.narrow): True, "[]": True}
+
+        model.unload_messages_in_current_narrow()
+
+        assert model.get_message_ids_in_current_narrow() == set()
+        # Other narrows are unchanged
+        assert model.index["all_msg_ids"] == {0, 1, 2}
+        assert model.index["stream_msg_ids_by_stream_id"][2] == {2}
+        assert model._have_last_message == {"[]": True}
+
     @pytest.mark.parametrize(
         "response, expected_index, return_value",
         [
@@ -530,7 +570,7 @@ class TestModel:
             ({"result": "success", "topics": []}, {23: []}, ""),
             (
                 {"result": "failure", "msg": "Some Error", "topics": []},
-                {23: []},
+                {},
                 "Some Error",
             ),
         ],
@@ -657,43 +697,43 @@ class TestModel:
             ),
             case(
                 ("joy_cat", "1f639", "unicode_emoji"),
-                [dict(user="me", emoji_code="1f44d")],
+                [dict(user="me", emoji_code="1f44d", emoji_name="thumbs_up")],
                 "POST",
                 id="add_unicode_original_mine_existing_different_emoji",
             ),
             case(
                 ("zulip", "zulip", "zulip_extra_emoji"),
-                [dict(user="me", emoji_code="1f639")],
+                [dict(user="me", emoji_code="1f639", emoji_name="joy_cat")],
                 "POST",
                 id="add_zulip_original_mine_existing_different_emoji",
             ),
             case(
                 ("rock_on", "1f918", "unicode_emoji"),
-                [dict(user="not me", emoji_code="1f918")],
+                [dict(user="not me", emoji_code="1f918", emoji_name="rock_on")],
                 "POST",
                 id="add_unicode_original_others_existing_same_emoji",
             ),
             case(
                 ("grinning", "1f600", "unicode_emoji"),
-                [dict(user="not me", emoji_code="1f600")],
+                [dict(user="not me", emoji_code="1f600", emoji_name="grinning")],
                 "POST",
                 id="add_unicode_alias_others_existing_same_emoji",
             ),
             case(
                 ("smiley", "1f603", "unicode_emoji"),
-                [dict(user="me", emoji_code="1f603")],
+                [dict(user="me", emoji_code="1f603", emoji_name="smiley")],
                 "DELETE",
                 id="remove_unicode_original_mine_existing_same_emoji",
             ),
             case(
                 ("smug", "1f60f", "unicode_emoji"),
-                [dict(user="me", emoji_code="1f60f")],
+                [dict(user="me", emoji_code="1f60f", emoji_name="smirk")],
                 "DELETE",
                 id="remove_unicode_alias_mine_existing_same_emoji",
             ),
             case(
                 ("zulip", "zulip", "zulip_extra_emoji"),
-                [dict(user="me", emoji_code="zulip")],
+                [dict(user="me", emoji_code="zulip", emoji_name="zulip")],
                 "DELETE",
                 id="remove_zulip_original_mine_existing_same_emoji",
             ),
@@ -718,7 +758,9 @@ class TestModel:
         full_existing_reactions = [
             dict(er, user={user_key: id})
             if user_key is not None
-            else dict(user_id=id, emoji_code=er["emoji_code"])
+            else dict(
+                user_id=id, emoji_code=er["emoji_code"], emoji_name=er["emoji_name"]
+            )
             for er in existing_reactions
         ]
         message = dict(id=msg_id, reactions=full_existing_reactions)
@@ -752,25 +794,25 @@ class TestModel:
         [
             case(
                 "1f600",
-                [{"user": {"id": 2}, "emoji_code": "1f602"}],
+                [{"user": {"id": 2}, "emoji_code": "1f602", "emoji_name": "joy"}],
                 False,
                 id="id_inside_user_field__user_not_reacted",
             ),
             case(
                 "1f44d",
-                [{"user": {"user_id": 1}, "emoji_code": "1f44d"}],
+                [{"user": {"user_id": 1}, "emoji_code": "1f44d", "emoji_name": "+1"}],
                 True,
                 id="user_id_inside_user_field__user_has_reacted",
             ),
             case(
                 "zulip",
-                [{"user_id": 1, "emoji_code": "zulip"}],
+                [{"user_id": 1, "emoji_code": "zulip", "emoji_name": "zulip"}],
                 True,
                 id="no_user_field_with_user_id__user_has_reacted",
             ),
             case(
                 "1f639",
-                [{"user_id": 2, "emoji_code": "1f44d"}],
+                [{"user_id": 2, "emoji_code": "1f44d", "emoji_name": "+1"}],
                 False,
                 id="no_user_field_with_user_id__user_not_reacted",
             ),
@@ -792,6 +834,25 @@ class TestModel:
 
         assert has_reacted == expected_has_user_reacted
 
+    def test_reaction_summary(self, model, user_id=1, message_id=5):
+        model.user_id = user_id
+        message = dict(
+            id=message_id,
+            reactions=[
+                {"user_id": 2, "emoji_code": "1f44d", "emoji_name": "+1"},
+                {"user_id": 3, "emoji_code": "2764", "emoji_name": "heart"},
+                {"user": {"id": 1}, "emoji_code": "1f44d", "emoji_name": "+1"},
+            ],
+        )
+
+        summary = model.reaction_summary(message)
+
+        assert summary == {
+            "+1": {"emoji_code": "1f44d", "user_ids": [2, 1], "mine": True},
+            "heart": {"emoji_code": "2764", "user_ids": [3], "mine": False},
+        }
+        assert model.reaction_summary(message) is summary
+
     @pytest.mark.parametrize(
         "user_data, expected_user_id",
         [
@@ -1237,6 +1298,101 @@ class TestModel:
         assert result == return_value
         self.display_error_if_present.assert_called_once_with(response, self.controller)
 
+    @pytest.mark.parametrize(
+        "loaded_ids, have_last_message, timestamp, expected_id, probe_anchors",
+        [
+            case(set(), False, 1000, None, [], id="no_messages"),
+            case({600, 1500, 2500}, False, 1000, 1500, [], id="within_loaded"),
+            case({600, 1500}, True, 3000, 1500, [], id="after_loaded:have_last"),
+            case({600, 1500}, False, 3000, 4000, [2500], id="after_loaded"),
+            case({600, 1500}, False, 5000, 4000, [2500], id="after_all"),
+            case({4000}, False, 1000, 1500, [3000, 1000, 0], id="before_loaded"),
+            case({4000}, False, 50, 100, [3000, 1000, 0], id="before_all"),
+        ],
+    )
+    def test_find_message_id_at_time(
+        self,
+        mocker,
+        model,
+        loaded_ids,
+        have_last_message,
+        timestamp,
+        expected_id,
+        probe_anchors,
+        server_ids=(100, 600, 1500, 2500, 4000),
+    ):
+        # Message timestamps match their ids, for simplicity
+        def get_messages(message_filters):
+            messages = [
+                {"id": msg_id, "timestamp": msg_id}
+                for msg_id in server_ids
+                if msg_id >= message_filters["anchor"]
+            ]
+            return {
+                "result": "success",
+                "messages": messages[: message_filters["num_after"]],
+            }
+
+        self.client.get_messages = mocker.Mock(side_effect=get_messages)
+        model.narrow = []
+        model.index = {
+            "all_msg_ids": loaded_ids,
+            "messages": {
+                msg_id: {"id": msg_id, "timestamp": msg_id} for msg_id in loaded_ids
+            },
+        }
+        model._have_last_message[repr([])] = have_last_message
+
+        assert model.find_message_id_at_time(timestamp) == expected_id
+
+        assert [
+            call[1]["message_filters"]["anchor"]
+            for call in self.client.get_messages.call_args_list
+        ] == probe_anchors
+
+    def test_find_message_id_at_time__bisects_between_probes(
+        self, mocker, model, server_ids=(100, 600, 1500, 2500, 4000)
+    ):
+        mocker.patch(MODULE + ".JUMP_TO_TIME_PROBE_SIZE", 1)
+        self.client.get_messages = mocker.Mock(
+            side_effect=lambda message_filters: {
+                "result": "success",
+                "messages": [
+                    {"id": msg_id, "timestamp": msg_id}
+                    for msg_id in server_ids
+                    if msg_id >= message_filters["anchor"]
+                ][:1],
+            }
+        )
+        model.narrow = []
+        model.index = {
+            "all_msg_ids": {4000},
+            "messages": {4000: {"id": 4000, "timestamp": 4000}},
+        }
+
+        assert model.find_message_id_at_time(1000) == 1500
+
+        anchors = [
+            call[1]["message_filters"]["anchor"]
+            for call in self.client.get_messages.call_args_list
+        ]
+        assert anchors[:5] == [3000, 1000, 0, 550, 800]
+        assert len(anchors) == JUMP_TO_TIME_MAXIMUM_PROBES
+
+    def test_find_message_id_at_time__request_failure(self, mocker, model):
+        response = {"result": "error", "msg": "Some Error"}
+        self.client.get_messages = mocker.Mock(return_value=response)
+        model.narrow = []
+        model.index = {
+            "all_msg_ids": {4000},
+            "messages": {4000: {"id": 4000, "timestamp": 4000}},
+        }
+
+        assert model.find_message_id_at_time(1000) == 4000
+
+        self.client.get_messages.assert_called_once()
+        self.display_error_if_present.assert_called_once_with(response, self.controller)
+
     @pytest.mark.parametrize(
         "user_role, user_type",
         [
@@ -1445,13 +1601,12 @@ class TestModel:
         self.client.register.return_value = initial_data
         mocker.patch(MODEL + "._update_users_data_from_initial_data")
         mocker.patch(MODEL + "._subscribe_to_streams")
-        self.classify_unread_counts = mocker.patch(
-            MODULE + ".classify_unread_counts", return_value=[]
-        )
+        self.unread_state = mocker.patch(MODULE + ".UnreadState")
 
         # Setup mocks before calling get_messages
         self.client.get_messages.return_value = messages_successful_response
         mocker.patch(MODULE + ".index_messages", return_value=index_all_messages)
+        pre_render = mocker.patch(MODULE + ".MessageBox.pre_render")
         model = Model(self.controller)
         request = {
             "anchor": 0,
@@ -1468,6 +1623,11 @@ class TestModel:
         if anchor < 10000000000000000:
             assert model.index["pointer"][repr(model.narrow)] == anchor
         assert model._have_last_message[repr(model.narrow)] is True
+        (contents, server_url), _ = pre_render.call_args
+        assert list(contents) == [
+            msg["content"] for msg in messages_successful_response["messages"]
+        ]
+        assert server_url == model.server_url
 
     @pytest.mark.parametrize(
         "messages, expected_messages_response",
@@ -1661,9 +1821,7 @@ class TestModel:
         self.client.register.return_value = initial_data
         mocker.patch(MODEL + "._update_users_data_from_initial_data")
         mocker.patch(MODEL + "._subscribe_to_streams")
-        self.classify_unread_counts = mocker.patch(
-            MODULE + ".classify_unread_counts", return_value=[]
-        )
+        self.unread_state = mocker.patch(MODULE + ".UnreadState")
 
         # Setup mocks before calling get_messages
         messages_successful_response["anchor"] = 0
@@ -1689,9 +1847,7 @@ class TestModel:
         self.client.register.return_value = initial_data
         mocker.patch(MODEL + "._update_users_data_from_initial_data")
         mocker.patch(MODEL + "._subscribe_to_streams")
-        self.classify_unread_counts = mocker.patch(
-            MODULE + ".classify_unread_counts", return_value=[]
-        )
+        self.unread_state = mocker.patch(MODULE + ".UnreadState")
 
         # Setup mock before calling get_messages
         # FIXME This has no influence on the result
@@ -1946,9 +2102,7 @@ class TestModel:
         mocker.patch(MODEL + ".get_messages", return_value="")
         self.client.register.return_value = initial_data
         mocker.patch(MODEL + "._subscribe_to_streams")
-        self.classify_unread_counts = mocker.patch(
-            MODULE + ".classify_unread_counts", return_value=[]
-        )
+        self.unread_state = mocker.patch(MODULE + ".UnreadState")
         model = Model(self.controller)
         assert model.user_dict == user_dict
         assert model.users == user_list
@@ -2028,7 +2182,7 @@ class TestModel:
         self.controller.view.message_view = mocker.Mock(log=[mocker.Mock()])
         mocker.patch(MODULE + ".create_msg_box_list", return_value=["msg_w"])
         model.notify_user = mocker.Mock()
-        set_count = mocker.patch(MODULE + ".set_count")
+        update_unread_counts = mocker.patch(MODULE + ".update_unread_counts_in_view")
 
         # Test event with flags
         event = {
@@ -2039,8 +2193,9 @@ class TestModel:
 
         model._handle_message_event(event)
 
-        # set count not called since 'read' flag present.
-        set_count.assert_not_called()
+        # unread counts not updated since 'read' flag present.
+        model.unread_state.add_message.assert_not_called()
+        update_unread_counts.assert_not_called()
 
         # Test event without flags
         model.notify_user.assert_called_once_with(event["message"])
@@ -2053,8 +2208,12 @@ class TestModel:
 
         model._handle_message_event(event)
 
-        # set count called since the message is unread.
-        set_count.assert_called_once_with([event["message"]["id"]], self.controller, 1)
+        # unread counts updated since the message is unread.
+        add_message = model.unread_state.add_message
+        add_message.assert_called_once_with(event["message"])
+        update_unread_counts.assert_called_once_with(
+            self.controller, [add_message.return_value]
+        )
 
     @pytest.mark.parametrize(
         "response, narrow, recipients, log",
@@ -2164,7 +2323,7 @@ class TestModel:
         mocker.patch(MODEL + "._update_topic_index")
         mocker.patch(MODULE + ".index_messages", return_value={})
         mocker.patch(MODULE + ".create_msg_box_list", return_value=["msg_w"])
-        set_count = mocker.patch(MODULE + ".set_count")
+        update_unread_counts = mocker.patch(MODULE + ".update_unread_counts_in_view")
         self.controller.view.message_view = mocker.Mock(log=[])
         (
             self.controller.view.left_panel.is_in_topic_view_with_stream_id.return_value
@@ -2182,7 +2341,9 @@ class TestModel:
         model._handle_message_event(event)
 
         assert self.controller.view.message_view.log == log
-        set_count.assert_called_once_with([response["id"]], self.controller, 1)
+        update_unread_counts.assert_called_once_with(
+            self.controller, [model.unread_state.add_message.return_value]
+        )
 
         model._have_last_message[repr(narrow)] = False
         model.notify_user.assert_called_once_with(response)
@@ -2781,11 +2942,25 @@ class TestModel:
         view.left_panel.is_in_topic_view_with_stream_id.return_value = (
             topic_view_enabled
         )
+        update_unread_counts = mocker.patch(MODULE + ".update_unread_counts_in_view")
 
         model._handle_update_message_event(event)
 
         assert model.index == expected_index
 
+        if "subject" in event:
+            move = model.unread_state.move
+            move.assert_called_once_with(
+                event["message_ids"],
+                stream_id=event["stream_id"],
+                topic=event["subject"],
+            )
+            update_unread_counts.assert_called_once_with(
+                model.controller, move.return_value
+            )
+        else:
+            model.unread_state.move.assert_not_called()
+
         calls_to_update_messages = model._update_rendered_view.call_count
         assert calls_to_update_messages == expected_times_messages_rerendered
 
@@ -2795,6 +2970,36 @@ class TestModel:
             view.left_panel.show_topic_view.assert_called_once_with(stream_button)
             model.controller.update_screen.assert_called_once_with()
 
+    @pytest.mark.parametrize("moved_unread_keys", [set(), {(20, "old subject")}])
+    def test__handle_update_message_event__move_stream(
+        self, mocker, model, moved_unread_keys
+    ):
+        event = {
+            "type": "update_message",
+            "message_id": 1,
+            "message_ids": [1, 2],
+            "stream_id": 10,
+            "new_stream_id": 20,
+            "orig_subject": "old subject",
+            "propagate_mode": "change_all",
+        }
+        model.index = deepcopy(initial_index)
+        model.unread_state.move.return_value = moved_unread_keys
+        update_unread_counts = mocker.patch(MODULE + ".update_unread_counts_in_view")
+
+        model._handle_update_message_event(event)
+
+        # Unread messages keep their topic when moved to another stream
+        model.unread_state.move.assert_called_once_with(
+            [1, 2], stream_id=20, topic=None
+        )
+        if moved_unread_keys:
+            update_unread_counts.assert_called_once_with(
+                model.controller, moved_unread_keys
+            )
+        else:
+            update_unread_counts.assert_not_called()
+
     @pytest.mark.parametrize(
         "subject, narrow, new_log_len",
         [
@@ -2832,6 +3037,54 @@ class TestModel:
         )
         assert model.controller.update_screen.called
 
+    @pytest.mark.parametrize(
+        "sections, flags, next_content_header_updated, attr",
+        [
+            (["reactions"], ["read"], False, None),
+            (["content_header"], ["read", "starred"], True, None),
+            ([], [], False, "unread"),
+        ],
+        ids=["reactions", "content_header", "no_sections"],
+    )
+    def test__update_rendered_view__sections(
+        self,
+        mocker,
+        model,
+        sections,
+        flags,
+        next_content_header_updated,
+        attr,
+        msg_id=1,
+    ):
+        message = {"id": msg_id, "subject": "foo", "flags": flags}
+        model.index["messages"] = {msg_id: message}
+        msg_w = mocker.Mock()
+        msg_w.original_widget.message = {"id": msg_id, "subject": "foo"}
+        next_msg_w = mocker.Mock()
+        next_msg_w.original_widget.message = {"id": 2}
+        self.controller.view.message_view = mocker.Mock(log=[msg_w, next_msg_w])
+        create_msg_box_list = mocker.patch(MODULE + ".create_msg_box_list")
+        model.message_list_cache.put("[]", CachedMessageList({msg_id}, [msg_w], 0))
+
+        model._update_rendered_view(msg_id, sections)
+
+        create_msg_box_list.assert_not_called()
+        assert len(model.message_list_cache) == 0  # Stale in other narrows
+        msg_box = msg_w.original_widget
+        assert msg_box.message is message
+        msg_box.update_sections.assert_called_once_with(sections)
+        msg_w.set_attr_map.assert_called_once_with({None: attr})
+        unread_frontier = self.controller.view.message_view.unread_frontier
+        unread_frontier.set_unread.assert_called_once_with(0, attr == "unread")
+        next_msg_box = next_msg_w.original_widget
+        if next_content_header_updated:
+            assert next_msg_box.last_message is message
+            next_msg_box.update_sections.assert_called_once_with(["content_header"])
+        else:
+            next_msg_box.update_sections.assert_not_called()
+        assert self.controller.view.message_view.log == [msg_w, next_msg_w]
+        model.controller.update_screen.assert_called_once_with()
+
     @pytest.mark.parametrize(
         "subject, narrow, narrow_changed",
         [
@@ -2935,7 +3188,8 @@ class TestModel:
                     }
                     for message_id, reactions in msgs
                     if reactions is not None
-                }
+                },
+                "reaction_summaries": {},
             }
 
         return _factory
@@ -3129,13 +3383,24 @@ class TestModel:
 
         model.index = reaction_event_index_factory(msgs, reaction_schema)
         model._update_rendered_view = mocker.Mock()
+        message = model.index["messages"][event_message_id]
+        model.user_id = 5140
+        # Summarize before the event, so it must be updated incrementally
+        model.reaction_summary(message)
 
         model._handle_reaction_event(reaction_event)
 
         end_reactions = model.index["messages"][event_message_id]["reactions"]
         assert len(end_reactions) == expected_number_after
+        assert model.reaction_summary(message) == summarize_reactions(
+            end_reactions,
+            my_user_id=model.user_id,
+            get_user_id=model.get_user_id_from_reaction,
+        )
 
-        model._update_rendered_view.assert_called_once_with(event_message_id)
+        model._update_rendered_view.assert_called_once_with(
+            event_message_id, ["reactions"]
+        )
 
     @pytest.mark.parametrize(
         "submessages, event, expected_updated_submessage",
@@ -3365,6 +3630,7 @@ class TestModel:
         model._handle_submessage_event(event)
 
         assert model.index["messages"][id]["submessages"] == expected_updated_submessage
+        model._update_rendered_view.assert_called_once_with(id, ["content"])
 
     @pytest.fixture(
         params=[
@@ -3390,13 +3656,13 @@ class TestModel:
             operation: "add",
         }
         mocker.patch(MODEL + "._update_rendered_view")
-        set_count = mocker.patch(MODULE + ".set_count")
+        update_unread_counts = mocker.patch(MODULE + ".update_unread_counts_in_view")
 
         model._handle_update_message_flags_event(event)
 
         assert model.index == dict(messages={})
         model._update_rendered_view.assert_not_called()
-        set_count.assert_not_called()
+        update_unread_counts.assert_not_called()
         self.controller.view.starred_button.update_count.assert_called()
 
     def test_update_star_status_invalid_operation(
@@ -3416,11 +3682,11 @@ class TestModel:
             "all": False,
         }
         mocker.patch(MODEL + "._update_rendered_view")
-        set_count = mocker.patch(MODULE + ".set_count")
+        update_unread_counts = mocker.patch(MODULE + ".update_unread_counts_in_view")
         with pytest.raises(RuntimeError):
             model._handle_update_message_flags_event(event)
         model._update_rendered_view.assert_not_called()
-        set_count.assert_not_called()
+        update_unread_counts.assert_not_called()
         self.controller.view.starred_button.update_count.assert_not_called()
 
     @pytest.mark.parametrize(
@@ -3477,7 +3743,7 @@ class TestModel:
         }
         self.controller.view.starred_button.count = 0
         mocker.patch(MODEL + "._update_rendered_view")
-        set_count = mocker.patch(MODULE + ".set_count")
+        update_unread_counts = mocker.patch(MODULE + ".update_unread_counts_in_view")
         update_star_count = self.controller.view.starred_button.update_count
 
         model._handle_update_message_flags_event(event)
@@ -3491,7 +3757,7 @@ class TestModel:
         for changed_id in changed_ids:
             assert model.index["messages"][changed_id]["flags"] == flags_after
         model._update_rendered_view.assert_has_calls(
-            [mocker.call(changed_id) for changed_id in changed_ids]
+            [mocker.call(changed_id, ["content_header"]) for changed_id in changed_ids]
         )
 
         for unchanged_id in set(indexed_ids) - set(event_message_ids):
@@ -3502,7 +3768,7 @@ class TestModel:
             self.controller.view.starred_button.count + count
         )
 
-        set_count.assert_not_called()
+        update_unread_counts.assert_not_called()
 
     @pytest.mark.parametrize(
         "event_message_ids, indexed_ids",
@@ -3523,10 +3789,10 @@ class TestModel:
             ("add", ["starred"], ["starred", "read"]),
             ("add", ["read", "starred"], ["read", "starred"]),
             ("remove", [], []),
-            ("remove", ["read"], ["read"]),  # msg cannot be marked 'unread'
+            ("remove", ["read"], []),
             ("remove", ["starred"], ["starred"]),
-            ("remove", ["starred", "read"], ["starred", "read"]),
-            ("remove", ["read", "starred"], ["read", "starred"]),
+            ("remove", ["starred", "read"], ["starred"]),
+            ("remove", ["read", "starred"], ["starred"]),
         ],
     )
     def test_update_read_status(
@@ -3543,7 +3809,7 @@ class TestModel:
         operation, model.server_feature_level = update_message_flags_operation
 
         model.index = dict(
-            messages={msg_id: {"flags": flags_before} for msg_id in indexed_ids},
+            messages={msg_id: {"flags": list(flags_before)} for msg_id in indexed_ids},
             starred_msg_ids={
                 msg_id for msg_id in indexed_ids if "starred" in flags_before
             },
@@ -3557,26 +3823,76 @@ class TestModel:
         }
 
         mocker.patch(MODEL + "._update_rendered_view")
-        set_count = mocker.patch(MODULE + ".set_count")
+        update_unread_counts = mocker.patch(MODULE + ".update_unread_counts_in_view")
 
         model._handle_update_message_flags_event(event)
 
         changed_ids = set(indexed_ids) & set(event_message_ids)
         for changed_id in changed_ids:
             assert model.index["messages"][changed_id]["flags"] == flags_after
-
-            if event_op == "add":
-                model._update_rendered_view.assert_has_calls([mocker.call(changed_id)])
-            elif event_op == "remove":
-                model._update_rendered_view.assert_not_called()
+        model._update_rendered_view.assert_has_calls(
+            [mocker.call(changed_id, []) for changed_id in changed_ids]
+        )
 
         for unchanged_id in set(indexed_ids) - set(event_message_ids):
             assert model.index["messages"][unchanged_id]["flags"] == flags_before
 
+        # Unread state is updated whether or not messages are indexed
         if event_op == "add":
-            set_count.assert_called_once_with(list(changed_ids), self.controller, -1)
+            unread_keys = model.unread_state.remove.return_value
+            model.unread_state.remove.assert_called_once_with(set(event_message_ids))
         elif event_op == "remove":
-            set_count.assert_not_called()
+            # Without message details, only indexed messages can be marked unread
+            add_message = model.unread_state.add_message
+            add_message.assert_has_calls(
+                [
+                    mocker.call(model.index["messages"][changed_id])
+                    for changed_id in changed_ids
+                ],
+                any_order=True,
+            )
+            unread_keys = {add_message.return_value} if changed_ids else set()
+        update_unread_counts.assert_called_once_with(self.controller, unread_keys)
+
+    def test_update_read_status__mark_unread_with_message_details(self, mocker, model):
+        model.server_feature_level = 121
+        model.index = dict(messages={}, starred_msg_ids=set())
+        details = {"type": "stream", "stream_id": 1, "topic": "Topic"}
+        event = {
+            "type": "update_message_flags",
+            "messages": [1, 2],
+            "flag": "read",
+            "op": "remove",
+            "all": False,
+            "message_details": {"1": details},
+        }
+        update_unread_counts = mocker.patch(MODULE + ".update_unread_counts_in_view")
+
+        model._handle_update_message_flags_event(event)
+
+        add_message_details = model.unread_state.add_message_details
+        add_message_details.assert_called_once_with(1, details)
+        update_unread_counts.assert_called_once_with(
+            self.controller, {add_message_details.return_value}
+        )
+
+    @pytest.mark.parametrize(
+        "event",
+        [
+            case({"message_type": "stream", "message_id": 1}, id="one_message"),
+            case({"message_type": "stream", "message_ids": [1]}, id="bulk_deletion"),
+        ],
+    )
+    def test__handle_delete_message_event(self, mocker, model, event):
+        event["type"] = "delete_message"
+        update_unread_counts = mocker.patch(MODULE + ".update_unread_counts_in_view")
+
+        model._handle_delete_message_event(event)
+
+        model.unread_state.remove.assert_called_once_with([1])
+        update_unread_counts.assert_called_once_with(
+            self.controller, model.unread_state.remove.return_value
+        )
 
     @pytest.mark.parametrize(
         "pinned_streams, pin_to_top",
@@ -3921,17 +4237,158 @@ class TestModel:
 
         assert model.muted_streams == final_muted_streams
 
+        update_stream_muting = model.unread_state.update_stream_muting
         if model.muted_streams != {15, 19}:
+            # The overall unread count is updated from the unread state
+            update_stream_muting.assert_called_once_with(event["stream_id"])
             # This condition is to check if the stream is unmuted or not
             if (event["value"] and event["property"] == "in_home_view") or (
                 not event["value"] and event["property"] == "is_muted"
             ):
                 mark_unmuted.assert_called_once_with(99)
-                assert model.unread_counts["all_msg"] == 399
             else:
                 mark_muted.assert_called_once_with()
-                assert model.unread_counts["all_msg"] == 201
             model.controller.update_screen.assert_called_once_with()
+        else:
+            update_stream_muting.assert_not_called()
+
+    @pytest.mark.parametrize("value", [True, False], ids=["mute", "unmute"])
+    def test__handle_subscription_event_mute_streams__button_not_built(
+        self, model, value
+    ):
+        event = {
+            "type": "subscription",
+            "op": "update",
+            "property": "is_muted",
+            "stream_id": 30,
+            "value": value,
+        }
+        model.muted_streams = {15}
+        model.unread_counts = {"all_msg": 300, "streams": {30: 99}}
+        # Stream buttons are only built once their stream is displayed
+        model.controller.view.stream_id_to_button = {}
+
+        model._handle_subscription_event(event)
+
+        assert (30 in model.muted_streams) == value
+        home_button = model.controller.view.home_button
+        if value:
+            model.unread_state.update_stream_muting.assert_called_once_with(30)
+            home_button.update_count.assert_called_once_with(300)
+        else:
+            home_button.update_count.assert_not_called()
+        model.controller.update_screen.assert_called_once_with()
+
+    def test__handle_muted_topics_event(self, mocker, model, stream_dict):
+        update_unread_counts_in_view = mocker.patch(
+            MODULE + ".update_unread_counts_in_view"
+        )
+        model.stream_dict = stream_dict
+        model._muted_topics = {
+            ("Some general stream", "muted"): None,
+            ("Secret stream", "still muted"): None,
+        }
+        model.message_list_cache = mocker.Mock()
+        view = model.controller.view
+        view.left_panel.is_in_topic_view_with_stream_id.side_effect = (
+            lambda stream_id: stream_id == 99
+        )
+        topic_button = mocker.Mock()
+        view.topic_w.topic_name_to_button = {"newly muted": topic_button}
+        event = {
+            "type": "muted_topics",
+            "muted_topics": [
+                ["Secret stream", "still muted"],
+                ["Secret stream", "newly muted"],
+                ["Unsubscribed stream", "newly muted"],
+            ],
+        }
+
+        model._handle_muted_topics_event(event)
+
+        assert model._muted_topics == {
+            ("Secret stream", "still muted"): None,
+            ("Secret stream", "newly muted"): None,
+            ("Unsubscribed stream", "newly muted"): None,
+        }
+        # Only toggled topics in subscribed streams affect unread counts
+        update_topic_muting = model.unread_state.update_topic_muting
+        assert sorted(update_topic_muting.call_args_list) == [
+            mocker.call(99, "newly muted"),
+            mocker.call(1000, "muted"),
+        ]
+        model.message_list_cache.clear.assert_called_once_with()
+        topic_button.mark_muted.assert_called_once_with()
+        update_unread_counts_in_view.assert_called_once_with(
+            model.controller, {(99, "newly muted"), (1000, "muted")}
+        )
+
+    @pytest.mark.parametrize(
+        "visibility_policy, was_muted, is_toggled",
+        [
+            case(1, False, True, id="mute"),
+            case(1, True, False, id="mute:already_muted"),
+            case(0, True, True, id="unmute"),
+            case(0, False, False, id="unmute:already_unmuted"),
+            case(3, True, True, id="follow_muted"),
+        ],
+    )
+    def test__handle_user_topic_event(
+        self, mocker, model, stream_dict, visibility_policy, was_muted, is_toggled
+    ):
+        update_unread_counts_in_view = mocker.patch(
+            MODULE + ".update_unread_counts_in_view"
+        )
+        model.stream_dict = stream_dict
+        model._muted_topics = {("Secret stream", "topic"): 1} if was_muted else {}
+        model.unread_counts = {"unread_topics": {(99, "topic"): 4}}
+        view = model.controller.view
+        view.left_panel.is_in_topic_view_with_stream_id.return_value = True
+        topic_button = mocker.Mock()
+        view.topic_w.topic_name_to_button = {"topic": topic_button}
+        event = {
+            "type": "user_topic",
+            "stream_id": 99,
+            "topic_name": "topic",
+            "last_updated": 2,
+            "visibility_policy": visibility_policy,
+        }
+
+        model._handle_user_topic_event(event)
+
+        is_muted = visibility_policy == 1
+        assert (("Secret stream", "topic") in model._muted_topics) == is_muted
+        update_topic_muting = model.unread_state.update_topic_muting
+        if is_toggled:
+            update_topic_muting.assert_called_once_with(99, "topic")
+            if is_muted:
+                topic_button.mark_muted.assert_called_once_with()
+            else:
+                topic_button.mark_unmuted.assert_called_once_with(4)
+            update_unread_counts_in_view.assert_called_once_with(
+                model.controller, {(99, "topic")}
+            )
+        else:
+            update_topic_muting.assert_not_called()
+            update_unread_counts_in_view.assert_not_called()
+
+    def test__handle_user_topic_event__unsubscribed_stream(self, mocker, model):
+        update_unread_counts_in_view = mocker.patch(
+            MODULE + ".update_unread_counts_in_view"
+        )
+        model._muted_topics = {}
+        event = {
+            "type": "user_topic",
+            "stream_id": 12345,
+            "topic_name": "topic",
+            "last_updated": 2,
+            "visibility_policy": 1,
+        }
+
+        model._handle_user_topic_event(event)
+
+        assert model._muted_topics == {}
+        update_unread_counts_in_view.assert_not_called()
 
     @pytest.mark.parametrize(
         "event, expected_pinned_streams, expected_unpinned_streams",
@@ -3990,6 +4447,10 @@ class TestModel:
         assert set_from_list_of_dict(model.unpinned_streams) == set_from_list_of_dict(
             expected_unpinned_streams
         )
+        assert model.stream_search_index.match("") == [
+            stream["name"] for stream in model.pinned_streams + model.unpinned_streams
+        ]
+        model.unread_state.update_stream_order.assert_called_once_with()
         update_left_panel = model.controller.view.left_panel.update_stream_view
         update_left_panel.assert_called_once_with()
         model.controller.update_screen.assert_called_once_with()
@@ -4464,21 +4925,75 @@ class TestModel:
             "property": setting,
             "value": value,
         }
-        first_msg_w = mocker.Mock()
-        second_msg_w = mocker.Mock()
-        first_msg_w.original_widget.message = {"id": 1}
-        second_msg_w.original_widget.message = {"id": 2}
-        self.controller.view.message_view = mocker.Mock(log=[first_msg_w, second_msg_w])
+        msg_w_list = [mocker.Mock(), mocker.Mock()]
+        settings_when_updated = []
+        for msg_w in msg_w_list:
+            msg_w.original_widget.update_header_time.side_effect = (
+                lambda: settings_when_updated.append(
+                    model.user_settings()["twenty_four_hour_time"]
+                )
+            )
+        self.controller.view.message_view = mocker.Mock(log=msg_w_list)
         create_msg_box_list = mocker.patch(MODULE + ".create_msg_box_list")
-        model._user_settings["twenty_four_hour_format"] = not value
+        model._user_settings["twenty_four_hour_time"] = not value
 
         model._handle_user_settings_event(event)
 
         assert model.user_settings()["twenty_four_hour_time"] == event["value"]
-        assert create_msg_box_list.call_count == len(
-            self.controller.view.message_view.log
+        # Only the header times are updated, after the setting is stored
+        assert settings_when_updated == [value, value]
+        create_msg_box_list.assert_not_called()
+        model.controller.update_screen.assert_called_once_with()
+
+    @pytest.mark.parametrize(
+        "use_24h_format, show_seconds, show_year, expected_format",
+        [
+            (True, False, False, "%a %b %d %H:%M"),
+            (False, False, False, "%a %b %d %I:%M %p"),
+            (True, True, False, "%a %b %d %H:%M:%S"),
+            (False, True, True, "%a %b %d %Y %I:%M:%S %p"),
+        ],
+    )
+    def test_formatted_local_time(
+        self, model, use_24h_format, show_seconds, show_year, expected_format
+    ):
+        model._user_settings["twenty_four_hour_time"] = use_24h_format
+        timestamp = 1532103840  # At the start of a minute
+
+        formatted_times = [
+            model.formatted_local_time(
+                timestamp + seconds, show_seconds=show_seconds, show_year=show_year
+            )
+            for seconds in (0, 30)
+        ]
+
+        assert formatted_times == [
+            datetime.fromtimestamp(timestamp + seconds).strftime(expected_format)
+            for seconds in (0, 30)
+        ]
+        # Times are only shown to the minute without seconds, so can be shared
+        assert model._formatted_time_cache.hits == (0 if show_seconds else 1)
+
+    def test_formatted_local_time__twenty_four_hour_time_changed(self, mocker, model):
+        mocker.patch.object(model, "_update_display")
+        model._user_settings["twenty_four_hour_time"] = False
+        timestamp = 1532103840
+        model.formatted_local_time(timestamp, show_seconds=False)
+        assert len(model._formatted_time_cache) == 1
+
+        model._handle_user_settings_event(
+            {
+                "type": "user_settings",
+                "op": "update",
+                "property": "twenty_four_hour_time",
+                "value": True,
+            }
         )
-        assert model.controller.update_screen.called
+
+        assert len(model._formatted_time_cache) == 0
+        assert model.formatted_local_time(
+            timestamp, show_seconds=False
+        ) == datetime.fromtimestamp(timestamp).strftime("%a %b %d %H:%M")
 
     @pytest.mark.parametrize(
         "muted_streams, stream_id, is_muted",
@@ -4594,6 +5109,12 @@ class TestModel:
                 None,
                 id="unread_present_starting_in_muted_stream",  # TODO See other 2 cases
             ),
+            case(
+                {(3, "topic3"), (4, "topic4")},
+                (3, "topic3"),
+                (4, "topic4"),
+                id="unread_present_after_current_topic_in_muted_stream",
+            ),
             case(
                 {(3, "topic3"), (4, "topic4")},
                 None,
@@ -4665,11 +5186,6 @@ class TestModel:
     def test_next_unread_topic_from_message(
         self, mocker, model, unread_topics, current_topic, next_unread_topic
     ):
-        # NOTE Not important how many unreads per topic, so just use '1'
-        model.unread_counts = {
-            "unread_topics": {stream_topic: 1 for stream_topic in unread_topics}
-        }
-
         current_message_id = 10  # Arbitrary value due to mock below
         model.stream_topic_from_message_id = mocker.Mock(return_value=current_topic)
 
@@ -4702,6 +5218,7 @@ class TestModel:
                 ("Stream 3", "topic3 muted"),
             ]
         }
+        model.unread_state = UnreadState(model, unread_msgs_in_topics(unread_topics))
 
         unread_topic = model.next_unread_topic_from_message_id(current_message_id)
 
@@ -4727,10 +5244,6 @@ class TestModel:
         narrow_stream_id,
         next_unread_topic,
     ):
-        # NOTE Not important how many unreads per topic, so just use '1'
-        model.unread_counts = {
-            "unread_topics": {stream_topic: 1 for stream_topic in unread_topics}
-        }
         model.pinned_streams = [
             {"name": "Stream 1", "id": 1},
             {"name": "Stream 2", "id": 2},
@@ -4739,6 +5252,7 @@ class TestModel:
             {"name": "Stream 3", "id": 3},
             {"name": "Stream 4", "id": 4},
         ]
+        model.unread_state = UnreadState(model, unread_msgs_in_topics(unread_topics))
 
         model.stream_id_from_name = mocker.Mock(return_value=narrow_stream_id)
         model.narrow = empty_narrow
@@ -5020,3 +5534,100 @@ class TestModel:
         model._register_desired_events.assert_has_calls(registers)
         assert self.client.get_events.called
         assert sleep.call_count == len(registers) - 1
+
+    def test_poll_for_events__events_queued_in_order(
+        self, mocker, model, raising_event
+    ):
+        mocker.patch(MODEL + "._register_desired_events")
+        mocker.patch(MODULE + ".time.sleep")
+        handler_thread = mocker.patch(MODULE + ".Thread")
+        events = [
+            {"id": 1, "type": "message"},
+            {"id": 2, "type": "unhandled_event_type"},
+            {"id": 3, "type": "reaction"},
+        ]
+        self.client.get_events.side_effect = [
+            {"events": events, "result": "success"},
+            {"events": [raising_event], "result": "success"},
+        ]
+
+        with pytest.raises(self.LoopEnder):
+            model.poll_for_events()
+
+        handler_thread.assert_called_once_with(
+            target=model._handle_queued_events, daemon=True
+        )
+        handler_thread.return_value.start.assert_called_once_with()
+        # Second poll continues from the last event received
+        assert self.client.get_events.call_args.kwargs["last_event_id"] == 3
+        queued_events = [
+            model._event_queue.get_nowait() for _ in range(model.event_queue_depth())
+        ]
+        assert queued_events == [events[0], events[2]]
+        assert model.event_queue_peak_depth == 2
+
+    def test__handle_queued_events__applied_in_order(self, mocker, model):
+        applied = []
+        model.event_actions = {
+            "a": lambda event: applied.append(event["id"]),
+            "b": lambda event: applied.append(event["id"]),
+        }
+        events = [
+            {"id": 1, "type": "a"},
+            {"id": 2, "type": "b"},
+            {"id": 3, "type": "a"},
+        ]
+        mocker.patch.object(
+            model._event_queue, "get", side_effect=[*events, self.LoopEnder]
+        )
+        task_done = mocker.patch.object(model._event_queue, "task_done")
+
+        with pytest.raises(self.LoopEnder):
+            model._handle_queued_events()
+
+        assert applied == [1, 2, 3]
+        assert task_done.call_count == len(events)
+
+    def test__handle_event__holds_state_lock(self, mocker, model):
+        model.state_lock = mocker.MagicMock()
+        handler = mocker.Mock()
+        model.event_actions = {"a": handler}
+
+        model._handle_event({"type": "a"})
+
+        handler.assert_called_once_with({"type": "a"})
+        model.state_lock.__enter__.assert_called_once_with()
+        model.state_lock.__exit__.assert_called_once()
+
+    def test__handle_event__exception_reported_in_main_thread(self, mocker, model):
+        model.event_actions = {"a": mocker.Mock(side_effect=RuntimeError)}
+
+        model._handle_event({"type": "a"})
+
+        (exc_info,), kwargs = self.controller.raise_exception_in_main_thread.call_args
+        assert exc_info[0] == RuntimeError
+        assert kwargs == {"critical": False}
+
+    def test_init__event_queue_bounded_with_block_policy(self, model):
+        assert model._event_queue.maxsize == EVENT_QUEUE_HIGH_WATER_MARK
+
+    @pytest.mark.parametrize(
+        "policy, warnings_reported",
+        [
+            case("block", 0, id="block_policy_silent"),
+            case("warn", 1, id="warn_policy_warns_once"),
+        ],
+    )
+    def test__enqueue_event__high_water_mark(
+        self, mocker, model, policy, warnings_reported, high_water_mark=2
+    ):
+        mocker.patch(MODULE + ".EVENT_QUEUE_HIGH_WATER_MARK", high_water_mark)
+        mocker.patch(MODULE + ".EVENT_QUEUE_POLICY", policy)
+        model._event_queue = Queue()  # Unbounded, to not block the test
+
+        for event_id in range(high_water_mark + 2):
+            model._enqueue_event({"id": event_id, "type": "message"})
+
+        assert model.event_queue_depth() == high_water_mark + 2
+        assert model.event_queue_peak_depth == high_water_mark + 2
+        assert self.controller.report_warning.call_count == warnings_reported
@@ -1,15 +1,17 @@
 from collections import OrderedDict
 
 import pytest
-import urwid
 from pytest import param as case
 from urwid import Divider
 
 from zulipterminal.config.keys import keys_for_command, primary_key_for_command
 from zulipterminal.config.symbols import STATUS_ACTIVE
-from zulipterminal.helper import powerset
+from zulipterminal.helper import StreamSearchIndex
+from zulipterminal.ui_tools.buttons import UserButton
 from zulipterminal.ui_tools.views import (
+    MIDDLE_COLUMN_MOUSE_SCROLL_LINES,
     SIDE_PANELS_MOUSE_SCROLL_LINES,
+    TOPIC_BUTTONS_KEPT,
     LeftColumnView,
     MessageView,
     MiddleColumnView,
@@ -19,6 +21,7 @@ from zulipterminal.ui_tools.views import (
     StreamsViewDivider,
     TabView,
     TopicsView,
+    UnreadFrontier,
     UsersView,
 )
 
@@ -48,6 +51,39 @@ class TestModListWalker:
         mod_walker.extend(items)
         mod_walker._set_focus.assert_called_once_with(focus_position)
 
+    @pytest.mark.parametrize(
+        "start, stop, focus_position, expected_contents, expected_focus",
+        [
+            case(0, 0, None, ["A", "B", "C", 0, 1, 2], 4, id="prepend"),
+            case(3, 3, None, [0, 1, 2, "A", "B", "C"], 1, id="append"),
+            case(0, 1, None, ["A", "B", "C", 1, 2], 3, id="replace_first"),
+            case(1, 2, None, [0, "A", "B", "C", 2], 1, id="replace_focus"),
+            case(0, 3, 2, ["A", "B", "C"], 2, id="replace_all_with_focus"),
+            case(0, 1, 2, ["A", "B", "C", 1, 2], 2, id="replace_first_with_focus"),
+        ],
+    )
+    def test_splice(
+        self,
+        mocker,
+        start,
+        stop,
+        focus_position,
+        expected_contents,
+        expected_focus,
+    ):
+        mod_walker = ModListWalker(contents=[0, 1, 2], action=mocker.Mock())
+        mod_walker.focus = 1
+        mod_walker._action.reset_mock()
+        modified = mocker.patch.object(mod_walker, "_modified")
+
+        mod_walker.splice(start, stop, ["A", "B", "C"], focus_position)
+
+        assert mod_walker == expected_contents
+        assert mod_walker.focus == expected_focus
+        # Callbacks are run once, rather than once per item
+        modified.assert_called_once_with()
+        mod_walker._action.assert_called_once_with()
+
     def test__set_focus(self, mod_walker, mocker):
         mod_walker._action.assert_not_called()
         mod_walker._set_focus(0)
@@ -59,6 +95,133 @@ class TestModListWalker:
         mod_walker._action.assert_called_once_with()
 
 
+class TestUnreadFrontier:
+    @pytest.fixture
+    def msg_ws(self, mocker):
+        def msg_ws(*unread):
+            return [
+                mocker.Mock(attr_map={None: "unread" if is_unread else None})
+                for is_unread in unread
+            ]
+
+        return msg_ws
+
+    def test_init(self, msg_ws):
+        frontier = UnreadFrontier(msg_ws(True, False, True, True) + ["not a message"])
+
+        assert frontier.positions == [0, 2, 3]
+
+    @pytest.mark.parametrize(
+        "start, stop, new_unread, expected_positions",
+        [
+            case(0, 0, [True, False], [0, 3, 5], id="prepend"),
+            case(4, 4, [True, False], [1, 3, 4], id="append"),
+            case(0, 1, [True, True], [0, 1, 2, 4], id="replace_first"),
+            case(2, 4, [], [1], id="remove_last"),
+            case(0, 4, [False], [], id="replace_all"),
+        ],
+    )
+    def test_contents_modified(
+        self, mocker, msg_ws, start, stop, new_unread, expected_positions
+    ):
+        log = ModListWalker(
+            contents=msg_ws(False, True, False, True), action=mocker.Mock()
+        )
+        frontier = UnreadFrontier(log)
+        log.set_validate_contents_modified(frontier.contents_modified)
+
+        log.splice(start, stop, msg_ws(*new_unread))
+
+        assert frontier.positions == expected_positions
+        assert frontier.positions == UnreadFrontier(log).positions
+
+    def test_contents_modified__clear_and_set_item(self, mocker, msg_ws):
+        log = ModListWalker(contents=msg_ws(True, False), action=mocker.Mock())
+        frontier = UnreadFrontier(log)
+        log.set_validate_contents_modified(frontier.contents_modified)
+
+        log[1] = msg_ws(True)[0]
+        assert frontier.positions == [0, 1]
+
+        log.clear()
+        assert frontier.positions == []
+
+    @pytest.mark.parametrize(
+        "position, unread, expected_positions",
+        [
+            (1, True, [1, 2, 4]),
+            (2, True, [2, 4]),
+            (2, False, [4]),
+            (3, False, [2, 4]),
+        ],
+    )
+    def test_set_unread(self, msg_ws, position, unread, expected_positions):
+        frontier = UnreadFrontier(msg_ws(False, False, True, False, True))
+
+        frontier.set_unread(position, unread)
+
+        assert frontier.positions == expected_positions
+
+    @pytest.mark.parametrize(
+        "position, expected_read_positions, expected_positions",
+        [
+            case(3, [2, 3], [0, 5], id="consecutive_unread"),
+            case(2, [2], [0, 3, 5], id="read_above"),
+            case(0, [0], [2, 3, 5], id="first_message"),
+            case(4, [], [0, 2, 3, 5], id="focus_read"),
+        ],
+    )
+    def test_pop_read(
+        self, msg_ws, position, expected_read_positions, expected_positions
+    ):
+        frontier = UnreadFrontier(msg_ws(True, False, True, True, False, True))
+
+        assert frontier.pop_read(position) == expected_read_positions
+        assert frontier.positions == expected_positions
+
+    @pytest.mark.parametrize(
+        "scrolls, position, expected_read_positions, expected_positions",
+        [
+            case([(5, 3)], 3, [2, 3, 5], [0], id="scrolled_up"),
+            case([(0, 1), (1, 2)], 2, [0, 2], [3, 5], id="scrolled_down"),
+            case([(4, 4)], 1, [2, 3], [0, 5], id="scrolled_down_after"),
+            case([(4, 1)], 1, [2, 3], [0, 5], id="scrolled_past_read"),
+        ],
+    )
+    def test_pop_read__scrolled_past(
+        self, msg_ws, scrolls, position, expected_read_positions, expected_positions
+    ):
+        frontier = UnreadFrontier(msg_ws(True, False, True, True, False, True))
+        for start, stop in scrolls:
+            frontier.scroll_past(start, stop)
+
+        assert frontier.pop_read(position) == expected_read_positions
+        assert frontier.positions == expected_positions
+        assert frontier.scrolled_past is None
+
+    @pytest.mark.parametrize(
+        "start, stop, new_unread, expected_scrolled_past",
+        [
+            case(0, 1, [True, False, True], (3, 5), id="older_loaded"),
+            case(4, 4, [True], (1, 3), id="newer_loaded"),
+            case(0, 4, [False], None, id="replaced"),
+        ],
+    )
+    def test_contents_modified__scrolled_past(
+        self, mocker, msg_ws, start, stop, new_unread, expected_scrolled_past
+    ):
+        log = ModListWalker(
+            contents=msg_ws(False, True, False, True), action=mocker.Mock()
+        )
+        frontier = UnreadFrontier(log)
+        log.set_validate_contents_modified(frontier.contents_modified)
+        frontier.scroll_past(3, 1)
+
+        log.splice(start, stop, msg_ws(*new_unread))
+
+        assert frontier.scrolled_past == expected_scrolled_past
+
+
 class TestMessageView:
     @pytest.fixture(autouse=True)
     def mock_external_classes(self, mocker):
@@ -71,6 +234,10 @@ class TestMessageView:
         mocker.patch(MESSAGEVIEW + ".main_view", return_value=[msg_box])
         mocker.patch(MESSAGEVIEW + ".read_message")
         mocker.patch(MESSAGEVIEW + ".set_focus")
+        # Run alarms immediately, eg. applying scrolling and reading messages
+        self.model.controller.loop.set_alarm_in.side_effect = (
+            lambda seconds, callback: callback(None, None)
+        )
         msg_view = MessageView(self.model, self.view)
         msg_view.log = mocker.Mock()
         msg_view.body = mocker.Mock()
@@ -129,13 +296,16 @@ class TestMessageView:
             VIEWS + ".create_msg_box_list", return_value=new_msg_widgets
         )
         # Specific to this version of the test
-        msg_view.log = []
+        msg_view.log = mocker.MagicMock(__bool__=lambda _: False)
 
         msg_view.load_old_messages(0)
 
         assert msg_view.old_loading is False
-        assert msg_view.log == list(messages_fetched.values())  # code vs orig
         if messages_fetched:
+            # Focus the newest message, with the page inserted in one operation
+            msg_view.log.splice.assert_called_once_with(
+                0, 0, new_msg_widgets, len(new_msg_widgets) - 1
+            )
             create_msg_box_list.assert_called_once_with(msg_view.model, new_msg_ids)
             self.model.controller.update_screen.assert_called_once_with()
         else:
@@ -161,8 +331,15 @@ class TestMessageView:
             (99, {101, 103}),
         ],
     )
+    @pytest.mark.parametrize("focus", [0, 1])
     def test_load_old_messages_mocked_log(
-        self, mocker, msg_view, top_id_in_narrow, other_ids_in_narrow, messages_fetched
+        self,
+        mocker,
+        msg_view,
+        top_id_in_narrow,
+        other_ids_in_narrow,
+        messages_fetched,
+        focus,
     ):
         # Expand parameters to use in test
         new_msg_ids = set(messages_fetched.keys())
@@ -187,13 +364,17 @@ class TestMessageView:
             return_value=(new_msg_widgets + [top_widget]),
         )
         initial_log = [top_widget] + len(other_ids_in_narrow) * ["existing"]
-        msg_view.log = initial_log[:]
+        msg_view.log = mocker.MagicMock(__bool__=lambda _: True, focus=focus)
+        msg_view.log.__getitem__.side_effect = initial_log.__getitem__
 
         msg_view.load_old_messages(0)
 
         assert msg_view.old_loading is False
-        assert msg_view.log == new_msg_widgets + initial_log
         if messages_fetched:
+            # The top message is updated, keeping focus upon the same message
+            msg_view.log.splice.assert_called_once_with(
+                0, 1, new_msg_widgets + [top_widget], focus + len(new_msg_widgets)
+            )
             create_msg_box_list.assert_called_once_with(
                 msg_view.model, {top_id_in_narrow} | new_msg_ids
             )
@@ -268,16 +449,100 @@ class TestMessageView:
 
     def test_mouse_event(self, mocker, msg_view, mouse_scroll_event, widget_size):
         event, button, keypress = mouse_scroll_event
-        mocker.patch.object(msg_view, "keypress")
+        mocker.patch.object(msg_view, "_queue_scroll")
         size = widget_size(msg_view)
         msg_view.mouse_event(size, event, button, 0, 0, mocker.Mock())
-        msg_view.keypress.assert_called_once_with(size, keypress)
+        direction = 1 if keypress in keys_for_command("GO_DOWN") else -1
+        msg_view._queue_scroll.assert_called_once_with(
+            direction * MIDDLE_COLUMN_MOUSE_SCROLL_LINES
+        )
+
+    @pytest.mark.parametrize(
+        "scrolls, expected_position, expected_from",
+        [
+            case([1, 1, 1], 5, "above", id="down"),
+            case([-1, -1], 0, "below", id="up"),
+            case([1, -1, -1, 1, -1], 1, "below", id="up_and_down"),
+        ],
+    )
+    def test__queue_scroll(
+        self, mocker, msg_view, scrolls, expected_position, expected_from
+    ):
+        mocker.patch(MESSAGEVIEW + ".focus_position", 2)
+        mocker.patch(MESSAGEVIEW + ".set_focus_valign")
+        msg_view.log = ModListWalker(contents=list(range(10)), action=mocker.Mock())
+        loop = self.model.controller.loop
+        loop.set_alarm_in.side_effect = None
+        msg_view.set_focus.reset_mock()
+        msg_view.read_message.reset_mock()
+
+        for steps in scrolls:
+            msg_view._queue_scroll(steps)
+
+        # Scrolling is applied and messages read once, after all the input
+        msg_view.set_focus.assert_not_called()
+        (_, apply_scroll), _ = loop.set_alarm_in.call_args
+        loop.set_alarm_in.reset_mock()
+        apply_scroll(loop, None)
+        msg_view.set_focus.assert_called_once_with(expected_position, expected_from)
+        msg_view.read_message.assert_not_called()
+        (_, read_settled_message), _ = loop.set_alarm_in.call_args
+        read_settled_message(loop, None)
+        msg_view.read_message.assert_called_once_with()
+
+    @pytest.mark.parametrize("steps", [-1, 1])
+    def test__queue_scroll__no_messages(self, mocker, msg_view, steps):
+        msg_view.log = ModListWalker(contents=[], action=mocker.Mock())
+        mocker.patch.object(msg_view, "load_new_messages")
+        mocker.patch.object(msg_view, "load_old_messages")
+        msg_view.set_focus.reset_mock()
+
+        msg_view._queue_scroll(steps)
+
+        msg_view.set_focus.assert_not_called()
+        msg_view.load_new_messages.assert_not_called()
+        msg_view.load_old_messages.assert_not_called()
+
+    def test__queue_scroll__reads_messages_scrolled_past(self, mocker, msg_box):
+        mocker.patch(MESSAGEVIEW + ".main_view", return_value=[msg_box])
+        mocker.patch(MESSAGEVIEW + ".set_focus")
+        mocker.patch(MESSAGEVIEW + ".set_focus_valign")
+        mocker.patch(MESSAGEVIEW + ".focus_position", 4)
+        mocker.patch(MESSAGEVIEW + ".update_search_box_narrow")
+        msg_view = MessageView(self.model, self.view)
+        msg_view.body = mocker.Mock()
+        msg_view.model.is_search_narrow = lambda: False
+        msg_view.model.controller.in_explore_mode = False
+        msg_view.model.controller.view.body.focus_col = 1
+        msg_ws = []
+        for msg_id, is_unread in enumerate([True, True, False, True, True], start=1):
+            msg_w = mocker.Mock(attr_map={None: "unread" if is_unread else None})
+            msg_w.original_widget.message = {"id": msg_id}
+            msg_ws.append(msg_w)
+        msg_view.log = ModListWalker(contents=msg_ws, action=mocker.Mock())
+        msg_view.unread_frontier = UnreadFrontier(msg_view.log)
+        msg_view.model.index = {
+            "messages": {msg_id: {"flags": []} for msg_id in range(1, 6)}
+        }
+        loop = self.model.controller.loop
+        msg_view.set_focus.reset_mock()
+
+        # Scroll upwards to the second message, past the unread messages below it
+        msg_view._queue_scroll(-3)
+        (_, apply_scroll), _ = loop.set_alarm_in.call_args
+        apply_scroll(loop, None)
+        msg_view.set_focus.assert_called_once_with(1, "below")
+        msg_view.body.get_focus.return_value = (msg_ws[1], 1)
+        (_, read_settled_message), _ = loop.set_alarm_in.call_args
+        read_settled_message(loop, None)
+
+        self.model.mark_message_ids_as_read.assert_called_once_with([5, 4, 2, 1])
 
     @pytest.mark.parametrize("key", keys_for_command("GO_DOWN"))
     def test_keypress_GO_DOWN(self, mocker, msg_view, key, widget_size):
         size = widget_size(msg_view)
         msg_view.new_loading = False
-        mocker.patch(MESSAGEVIEW + ".focus_position", return_value=0)
+        mocker.patch(MESSAGEVIEW + ".focus_position", 0)
         mocker.patch(MESSAGEVIEW + ".set_focus_valign")
         msg_view.log.next_position.return_value = 1
         msg_view.keypress(size, key)
@@ -292,7 +557,7 @@ class TestMessageView:
     ):
         size = widget_size(msg_view)
         msg_view.new_loading = False
-        mocker.patch(MESSAGEVIEW + ".focus_position", return_value=0)
+        mocker.patch(MESSAGEVIEW + ".focus_position", 0)
         mocker.patch(MESSAGEVIEW + ".set_focus_valign")
 
         msg_view.log.next_position = Exception()
@@ -315,7 +580,7 @@ class TestMessageView:
     @pytest.mark.parametrize("key", keys_for_command("GO_UP"))
     def test_keypress_GO_UP(self, mocker, msg_view, key, widget_size):
         size = widget_size(msg_view)
-        mocker.patch(MESSAGEVIEW + ".focus_position", return_value=0)
+        mocker.patch(MESSAGEVIEW + ".focus_position", 0)
         mocker.patch(MESSAGEVIEW + ".set_focus_valign")
         msg_view.old_loading = False
         msg_view.log.prev_position.return_value = 1
@@ -331,7 +596,7 @@ class TestMessageView:
     ):
         size = widget_size(msg_view)
         msg_view.old_loading = False
-        mocker.patch(MESSAGEVIEW + ".focus_position", return_value=0)
+        mocker.patch(MESSAGEVIEW + ".focus_position", 0)
         mocker.patch(MESSAGEVIEW + ".set_focus_valign")
 
         msg_view.log.prev_position = Exception()
@@ -381,12 +646,60 @@ class TestMessageView:
         mocker.patch(MESSAGEVIEW + ".focus_position")
         msg_view.focus_position = 1
         msg_view.model.controller.view.body.focus_col = 1
-        msg_view.log = list(msg_view.model.index["messages"])
+        msg_view.log = [msg_w]
+        msg_view.unread_frontier = UnreadFrontier(msg_view.log)
         msg_view.read_message()
         assert msg_view.update_search_box_narrow.called
         assert msg_view.model.index["messages"][1]["flags"] == ["read"]
+        msg_w.set_attr_map.assert_called_once_with({None: None})
         self.model.mark_message_ids_as_read.assert_called_once_with([1])
 
+    @pytest.mark.parametrize(
+        "unread, focus_position, expected_read_msg_ids",
+        [
+            case([True, True, True], 2, [3, 2, 1], id="all_unread"),
+            case([True, False, True, True], 3, [4, 3], id="read_above"),
+            case([True, True, False], 2, [], id="focus_read"),
+            case([True, True, True], 1, [2, 1], id="unread_below"),
+        ],
+    )
+    def test_read_message__unread_above(
+        self, mocker, msg_box, unread, focus_position, expected_read_msg_ids
+    ):
+        mocker.patch(MESSAGEVIEW + ".main_view", return_value=[msg_box])
+        mocker.patch(MESSAGEVIEW + ".set_focus")
+        mocker.patch(MESSAGEVIEW + ".focus_position")
+        msg_view = MessageView(self.model, self.view)
+        msg_view.body = mocker.Mock()
+        msg_view.model.is_search_narrow = lambda: False
+        msg_view.model.controller.in_explore_mode = False
+        msg_view.model.controller.view.body.focus_col = 1
+        mocker.patch(MESSAGEVIEW + ".update_search_box_narrow")
+        msg_ws = []
+        for msg_id, is_unread in enumerate(unread, start=1):
+            msg_w = mocker.Mock(attr_map={None: "unread" if is_unread else None})
+            msg_w.original_widget.message = {"id": msg_id}
+            msg_ws.append(msg_w)
+        msg_view.log = msg_ws
+        msg_view.unread_frontier = UnreadFrontier(msg_view.log)
+        msg_view.body.get_focus.return_value = (msg_ws[focus_position], focus_position)
+        msg_view.model.index = {
+            "messages": {msg_id: {"flags": []} for msg_id in range(1, len(unread) + 1)}
+        }
+
+        msg_view.read_message()
+
+        self.model.mark_message_ids_as_read.assert_called_once_with(
+            expected_read_msg_ids
+        )
+        for msg_id in expected_read_msg_ids:
+            assert msg_view.model.index["messages"][msg_id]["flags"] == ["read"]
+            msg_ws[msg_id - 1].set_attr_map.assert_called_once_with({None: None})
+        # Messages which were read are no longer found upon focus again
+        self.model.mark_message_ids_as_read.reset_mock()
+        msg_view.read_message()
+        self.model.mark_message_ids_as_read.assert_called_once_with([])
+
     def test_message_calls_search_and_header_bar(self, mocker, msg_view):
         msg_w = mocker.MagicMock()
         msg_w.original_widget.message = {"id": 1}
@@ -402,6 +715,20 @@ class TestMessageView:
 
         self.model.mark_message_ids_as_read.assert_not_called()
 
+    def test_read_message_while_scrolling(self, mocker, msg_box):
+        mocker.patch(MESSAGEVIEW + ".main_view", return_value=[msg_box])
+        mocker.patch(MESSAGEVIEW + ".set_focus")
+        mocker.patch(MESSAGEVIEW + ".update_search_box_narrow")
+        msg_view = MessageView(self.model, self.view)
+        msg_view.body = mocker.Mock()
+        msg_view._read_alarm = mocker.Mock()  # Reading once scrolling settles
+
+        msg_view.read_message()
+
+        msg_view.body.get_focus.assert_not_called()
+        assert not msg_view.update_search_box_narrow.called
+        assert not self.model.mark_message_ids_as_read.called
+
     def test_read_message_in_explore_mode(self, mocker, msg_box):
         mocker.patch(MESSAGEVIEW + ".main_view", return_value=[msg_box])
         mocker.patch(MESSAGEVIEW + ".set_focus")
@@ -443,7 +770,6 @@ class TestMessageView:
         msg_view = MessageView(self.model, self.view)
         msg_view.model.is_search_narrow = lambda: False
         msg_view.model.controller.in_explore_mode = False
-        msg_view.log = [0, 1]
         msg_view.body = mocker.Mock()
         msg_view.update_search_box_narrow = mocker.Mock()
 
@@ -454,6 +780,8 @@ class TestMessageView:
         msg_w = mocker.Mock()
         msg_w.attr_map = {None: "unread"}
         msg_w.original_widget.message = message_fixture
+        msg_view.log = [mocker.Mock(attr_map={None: None}), msg_w]
+        msg_view.unread_frontier = UnreadFrontier(msg_view.log)
 
         msg_view.body.get_focus.return_value = (msg_w, 1)
         msg_view.body.get_prev.return_value = (None, 0)
@@ -473,23 +801,117 @@ class TestStreamsViewDivider:
 
 
 class TestStreamsView:
+    @pytest.fixture(autouse=True)
+    def stream_button(self, mocker):
+        self.stream_button = mocker.patch(
+            VIEWS + ".StreamButton",
+            side_effect=lambda **kwargs: mocker.Mock(
+                stream_id=kwargs["properties"]["id"],
+                stream_name=kwargs["properties"]["name"],
+            ),
+        )
+
+    def set_streams(self, stream_names, to_pin=()):
+        streams = [
+            {"name": name, "id": index, "color": "#baf"}
+            for index, name in enumerate(
+                sorted(stream_names, key=lambda stream_name: stream_name.lower())
+            )
+        ]
+        self.view.pinned_streams = [s for s in streams if s["name"] in to_pin]
+        self.view.unpinned_streams = [s for s in streams if s["name"] not in to_pin]
+        self.view.model.stream_search_index = StreamSearchIndex(
+            self.view.pinned_streams, self.view.unpinned_streams
+        )
+
     @pytest.fixture
     def stream_view(self, mocker):
         mocker.patch(VIEWS + ".threading.Lock")
         self.view = mocker.Mock()
+        self.view.palette = [(None, "black", "white")]
+        self.view.model.unread_counts = {"streams": {1: 5}}
         self.stream_search_box = mocker.patch(VIEWS + ".PanelSearchBox")
-        stream_btn = mocker.Mock()
-        stream_btn.stream_name = "FOO"
-        self.streams_btn_list = [stream_btn]
-        return StreamsView(self.streams_btn_list, view=self.view)
+        self.set_streams(["FOO", "bar"])
+        return StreamsView(view=self.view)
 
     def test_init(self, mocker, stream_view):
         assert stream_view.view == self.view
-        assert stream_view.streams_btn_list == self.streams_btn_list
+        assert stream_view.stream_rows == [0, 1]
+        assert stream_view.log.rows == stream_view.stream_rows
         assert stream_view.stream_search_box
         self.stream_search_box.assert_called_once_with(
             stream_view, "SEARCH_STREAMS", stream_view.update_streams
         )
+        # Stream colors are added to the palette, for buttons built later
+        self.stream_button.add_color_to_palette.assert_called_once_with(
+            self.view.palette, "#baf"
+        )
+
+    def test_stream_buttons_built_when_displayed(self, stream_view):
+        self.stream_button.assert_not_called()
+        assert stream_view.stream_id_to_button == {}
+
+        focus_button, position = stream_view.log.get_focus()
+        next_button, _ = stream_view.log.get_next(position)
+
+        assert [focus_button.stream_name, next_button.stream_name] == ["bar", "FOO"]
+        self.stream_button.assert_called_with(
+            properties=self.view.unpinned_streams[1],
+            controller=self.view.controller,
+            view=self.view,
+            count=5,
+        )
+        assert stream_view.stream_id_to_button == {0: focus_button, 1: next_button}
+        # Buttons are only built once
+        assert stream_view.log[0] is focus_button
+        assert self.stream_button.call_count == 2
+        assert stream_view.log.get_next(1) == (None, None)
+        assert stream_view.log.get_prev(0) == (None, None)
+
+    @pytest.mark.parametrize(
+        "to_pin, expected_rows, expected_focus",
+        [
+            ([], [0, 1, 2], 1),
+            (["bar"], [0, "", 1, 2], 2),
+            (["FOO"], [1, "", 0, 2], 0),
+        ],
+        ids=["no_pinned_streams", "pin_unfocused_stream", "pin_focused_stream"],
+    )
+    def test_update_stream_order(
+        self, stream_view, to_pin, expected_rows, expected_focus
+    ):
+        stream_view.log.set_focus(1)
+        focus_button = stream_view.log.get_focus()[0]
+        self.set_streams(["FOO", "bar", "new"], to_pin)
+
+        stream_view.update_stream_order()
+
+        assert [
+            row if isinstance(row, int) else row.stream_name
+            for row in stream_view.log.rows
+        ] == expected_rows
+        # The focus stays upon the same stream, using the same button
+        assert stream_view.log.get_focus() == (focus_button, expected_focus)
+
+    def test_update_stream_order__removed_stream(self, stream_view):
+        stream_view.log.get_focus()
+        stream_view.log.get_next(0)
+        self.set_streams(["bar"])
+
+        stream_view.update_stream_order()
+
+        assert stream_view.log.rows == [0]
+        assert list(stream_view.stream_id_to_button) == [0]
+
+    def test_update_stream_order__while_searching(self, stream_view):
+        stream_view.is_showing_search_results = True
+        search_rows = stream_view.log.rows
+        self.set_streams(["FOO", "bar"], ["FOO"])
+
+        stream_view.update_stream_order()
+
+        assert stream_view.log.rows is search_rows
+        assert len(stream_view.stream_rows) == 3
 
     @pytest.mark.parametrize(
         "new_text, expected_log, to_pin",
@@ -510,20 +932,19 @@ class TestStreamsView:
             ("baar", "search error", []),
         ],
     )
-    def test_update_streams(self, mocker, stream_view, new_text, expected_log, to_pin):
+    def test_update_streams(self, mocker, new_text, expected_log, to_pin):
+        mocker.patch(VIEWS + ".threading.Lock")
+        mocker.patch(VIEWS + ".PanelSearchBox")
+        self.view = mocker.Mock()
+        self.view.palette = [(None, "black", "white")]
+        self.view.model.unread_counts = {"streams": {}}
         stream_names = ["FOO", "FOOBAR", "foo", "fan", "boo", "BOO", "bar", "test here"]
-        stream_names.sort(key=lambda stream_name: stream_name.lower())
-        self.view.pinned_streams = [{"name": name} for name in to_pin]
-        stream_names.sort(
-            key=lambda stream_name: stream_name in to_pin,
-            reverse=True,
-        )
+        self.set_streams(stream_names, to_pin)
         self.view.controller.is_in_editor_mode = lambda: True
+        stream_view = StreamsView(view=self.view)
         search_box = stream_view.stream_search_box
-        stream_view.streams_btn_list = [
-            mocker.Mock(stream_name=stream_name) for stream_name in stream_names
-        ]
         stream_view.update_streams(search_box, new_text)
+        assert stream_view.is_showing_search_results
         if expected_log != "search error":
             assert [stream.stream_name for stream in stream_view.log] == expected_log
         else:
@@ -547,7 +968,7 @@ class TestStreamsView:
         size = widget_size(stream_view)
         mocker.patch.object(stream_view, "set_focus")
         mocker.patch.object(stream_view.stream_search_box, "set_caption")
-        stream_view.log.extend(["FOO", "foo", "fan", "boo", "BOO"])
+        stream_view.log.set_rows([0, 1, 0, 1, 0])
         stream_view.log.set_focus(3)
 
         stream_view.keypress(size, key)
@@ -565,14 +986,11 @@ class TestStreamsView:
         mocker.patch.object(stream_view, "set_focus")
         mocker.patch(VIEWS + ".urwid.Frame.keypress")
         mocker.patch.object(stream_view.stream_search_box, "reset_search_text")
-        stream_view.streams_btn_list = ["FOO", "foo", "fan", "boo", "BOO"]
-        stream_view.focus_index_before_search = 3
+        stream_view.focus_index_before_search = 1
 
         # Simulate search
-        stream_view.log.clear()
-        stream_view.log.extend(stream_view.streams_btn_list[3])
-        stream_view.log.set_focus(0)
-        stream_view.keypress(size, primary_key_for_command("GO_DOWN"))
+        stream_view.is_showing_search_results = True
+        stream_view.log.set_rows([0])
         assert stream_view.log.get_focus()[1] != stream_view.focus_index_before_search
 
         # Exit search
@@ -581,9 +999,29 @@ class TestStreamsView:
         # Check state reset after search
         stream_view.set_focus.assert_called_once_with("body")
         assert stream_view.stream_search_box.reset_search_text.called
-        assert stream_view.log == stream_view.streams_btn_list
+        assert not stream_view.is_showing_search_results
+        assert stream_view.log.rows == stream_view.stream_rows
         assert stream_view.log.get_focus()[1] == stream_view.focus_index_before_search
 
+    @pytest.mark.parametrize("search_key", keys_for_command("SEARCH_STREAMS"))
+    @pytest.mark.parametrize("clear_key", keys_for_command("CLEAR_SEARCH"))
+    def test_keypress_SEARCH_STREAMS_then_CLEAR_SEARCH__no_streams(
+        self, mocker, stream_view, search_key, clear_key, widget_size
+    ):
+        size = widget_size(stream_view)
+        mocker.patch.object(stream_view, "set_focus")
+        mocker.patch.object(stream_view.stream_search_box, "set_caption")
+        mocker.patch.object(stream_view.stream_search_box, "reset_search_text")
+        stream_view.stream_rows = []
+        stream_view.log.set_rows([])
+
+        stream_view.keypress(size, search_key)
+        stream_view.keypress(size, clear_key)
+
+        assert stream_view.focus_index_before_search == 0
+        assert stream_view.log.rows == []
+        assert stream_view.log.get_focus() == (None, None)
+
 
 class TestTopicsView:
     @pytest.fixture
@@ -591,18 +1029,32 @@ class TestTopicsView:
         self.stream_button = stream_button
         mocker.patch(VIEWS + ".threading.Lock")
         self.topic_search_box = mocker.patch(VIEWS + ".PanelSearchBox")
+        self.topic_button = mocker.patch(
+            VIEWS + ".TopicButton",
+            side_effect=lambda **kwargs: mocker.Mock(topic_name=kwargs["topic"]),
+        )
         self.view = mocker.Mock()
         self.view.controller = mocker.Mock()
-        topic_btn = mocker.Mock()
-        topic_btn.caption = "BOO"
-        self.topics_btn_list = [topic_btn]
+        self.view.saved_topic_in_stream_id.return_value = None
+        self.view.model.unread_counts = {"unread_topics": {(205, "BOO"): 3}}
+        self.topic_names = ["BOO"]
         self.header_list = mocker.patch(VIEWS + ".urwid.Pile")
         self.divider = mocker.patch(VIEWS + ".urwid.Divider")
-        return TopicsView(self.topics_btn_list, self.view, self.stream_button)
+        return TopicsView(self.topic_names, self.view, self.stream_button)
 
     def test_init(self, mocker, topic_view):
         assert topic_view.stream_button == self.stream_button
         assert topic_view.view == self.view
+        assert topic_view.topic_names == topic_view.listed_topic_names == ["BOO"]
+        topic_btn = topic_view.log[0]
+        assert topic_view.topic_name_to_button == {"BOO": topic_btn}
+        self.topic_button.assert_called_once_with(
+            stream_id=self.stream_button.stream_id,
+            topic="BOO",
+            controller=self.view.controller,
+            view=self.view,
+            count=3,
+        )
         assert topic_view.topic_search_box
         self.topic_search_box.assert_called_once_with(
             topic_view, "SEARCH_TOPICS", topic_view.update_topics
@@ -616,6 +1068,43 @@ class TestTopicsView:
             ]
         )
 
+    def test_init__many_topics(self, mocker, topic_view, stream_button):
+        topic_names = [f"Topic {index}" for index in range(3 * TOPIC_BUTTONS_KEPT)]
+        self.view.saved_topic_in_stream_id.return_value = "Topic 250"
+
+        topic_view = TopicsView(topic_names, self.view, stream_button)
+
+        # Only the button for the focused topic is built until more are displayed
+        assert len(topic_view.log) == len(topic_names)
+        assert topic_view.log.get_focus() == (topic_view.log[250], 250)
+        assert list(topic_view.topic_name_to_button) == ["Topic 250"]
+
+    def test__topic_button__evicts_least_recently_displayed(self, mocker, topic_view):
+        topic_names = [f"Topic {index}" for index in range(TOPIC_BUTTONS_KEPT + 1)]
+        topic_view._list_topics(topic_names)
+        first_button = topic_view.log[0]
+
+        for position in range(1, TOPIC_BUTTONS_KEPT + 1):
+            topic_view.log[position]
+
+        assert len(topic_view.topic_name_to_button) == TOPIC_BUTTONS_KEPT
+        assert "Topic 0" not in topic_view.topic_name_to_button
+        # Rebuilt when displayed again, evicting the now least recent
+        assert topic_view.log[0] is not first_button
+        assert "Topic 1" not in topic_view.topic_name_to_button
+
+    def test__topic_button__reuses_recently_displayed(self, mocker, topic_view):
+        topic_names = [f"Topic {index}" for index in range(TOPIC_BUTTONS_KEPT + 1)]
+        topic_view._list_topics(topic_names)
+        first_button = topic_view.log[0]
+
+        for position in range(1, TOPIC_BUTTONS_KEPT + 1):
+            topic_view.log[0]
+            topic_view.log[position]
+
+        assert topic_view.log[0] is first_button
+        assert "Topic 1" not in topic_view.topic_name_to_button
+
     @pytest.mark.parametrize(
         "stream_id, saved_topic_state, expected_focus_index",
         [
@@ -628,13 +1117,7 @@ class TestTopicsView:
         self, mocker, stream_id, saved_topic_state, topic_view, expected_focus_index
     ):
         topic_view.stream_button.stream_id = stream_id
-        topic_view.list_box = mocker.MagicMock(spec=urwid.ListBox)
-        topic_view.list_box.body = [
-            mocker.Mock(topic_name="Topic 1"),
-            mocker.Mock(topic_name="Topic 2"),
-            mocker.Mock(topic_name="Topic 3"),
-        ]
-        topic_view.log = urwid.SimpleFocusListWalker(topic_view.list_box.body)
+        topic_view.topic_names = ["Topic 1", "Topic 2", "Topic 3"]
         mocker.patch.object(
             topic_view.view, "saved_topic_in_stream_id", return_value=saved_topic_state
         )
@@ -661,16 +1144,45 @@ class TestTopicsView:
         self.view.controller.is_in_editor_mode = lambda: True
         new_text = new_text
         search_box = topic_view.topic_search_box
-        topic_view.topics_btn_list = [
-            mocker.Mock(topic_name=topic_name) for topic_name in topic_names
-        ]
+        topic_view.topic_names = topic_names
         topic_view.update_topics(search_box, new_text)
         if expected_log != "search error":
             assert [topic.topic_name for topic in topic_view.log] == expected_log
+            assert topic_view.listed_topic_names == expected_log
         else:
             assert hasattr(topic_view.log[0].original_widget, "text")
         self.view.controller.update_screen.assert_called_once_with()
 
+    def test_update_topics__narrows_last_results(self, mocker, topic_view):
+        self.view.controller.is_in_editor_mode = lambda: True
+        search_box = topic_view.topic_search_box
+        topic_view.topic_names = ["foo", "bar", "fob"]
+        topic_view.update_topics(search_box, "f")
+        # The last results are searched, not the whole list
+        topic_view.topic_names.pop()
+
+        topic_view.update_topics(search_box, "fo")
+
+        assert [topic.topic_name for topic in topic_view.log] == ["foo", "fob"]
+
+    def test_update_topics__outdated_search(self, mocker, topic_view):
+        self.view.controller.is_in_editor_mode = lambda: True
+        search_box = topic_view.topic_search_box
+        search_box.search_generation = 1
+        log = list(topic_view.log)
+
+        def newer_search(*args):
+            search_box.search_generation = 2
+
+        # Newer text is entered while the search waits for an earlier one
+        topic_view.search_lock = mocker.MagicMock()
+        topic_view.search_lock.__enter__.side_effect = newer_search
+
+        topic_view.update_topics(search_box, "B")
+
+        assert list(topic_view.log) == log
+        self.view.controller.update_screen.assert_not_called()
+
     @pytest.mark.parametrize(
         "topic_name, topic_initial_log, topic_final_log",
         [
@@ -693,26 +1205,36 @@ class TestTopicsView:
     def test_update_topics_list(
         self, mocker, topic_view, topic_name, topic_initial_log, topic_final_log
     ):
-        mocker.patch(SUBDIR + ".buttons.TopButton.__init__", return_value=None)
         set_focus_valign = mocker.patch(VIEWS + ".urwid.ListBox.set_focus_valign")
-        topic_view.view.controller.model.stream_dict = {86: {"name": "PTEST"}}
-        topic_view.view.controller.model.is_muted_topic = mocker.Mock(
-            return_value=False
-        )
-        topic_view.log = [
-            mocker.Mock(topic_name=topic_name) for topic_name in topic_initial_log
-        ]
+        topic_view.topic_names = topic_initial_log
+        topic_view._list_topics(topic_initial_log)
+        initial_buttons = {topic.topic_name: topic for topic in topic_view.log}
 
         topic_view.update_topics_list(86, topic_name, 1001)
+
         assert [topic.topic_name for topic in topic_view.log] == topic_final_log
+        assert topic_view.topic_names == topic_view.listed_topic_names
+        assert topic_view.topic_names == topic_final_log
+        assert topic_view.topic_name_to_button[topic_name] is topic_view.log[0]
+        if topic_name in initial_buttons:
+            assert topic_view.log[0] is initial_buttons[topic_name]
         set_focus_valign.assert_called_once_with("bottom")
 
+    def test_update_topics_list__searching(self, mocker, topic_view):
+        topic_view.topic_names = ["TOPIC1", "TOPIC2"]
+        topic_view._list_topics(["TOPIC2"])
+
+        topic_view.update_topics_list(86, "TOPIC3", 1001)
+
+        assert topic_view.topic_names == ["TOPIC3", "TOPIC1", "TOPIC2"]
+        assert [topic.topic_name for topic in topic_view.log] == ["TOPIC2"]
+
     @pytest.mark.parametrize("key", keys_for_command("SEARCH_TOPICS"))
     def test_keypress_SEARCH_TOPICS(self, mocker, topic_view, key, widget_size):
         size = widget_size(topic_view)
         mocker.patch(VIEWS + ".TopicsView.set_focus")
         mocker.patch.object(topic_view.topic_search_box, "set_caption")
-        topic_view.log.extend(["FOO", "foo", "fan", "boo", "BOO"])
+        topic_view._list_topics(["FOO", "foo", "fan", "boo", "BOO"])
         topic_view.log.set_focus(3)
 
         topic_view.keypress(size, key)
@@ -731,12 +1253,11 @@ class TestTopicsView:
         mocker.patch(VIEWS + ".TopicsView.set_focus")
         mocker.patch(VIEWS + ".urwid.Frame.keypress")
         mocker.patch.object(topic_view.topic_search_box, "reset_search_text")
-        topic_view.topics_btn_list = ["FOO", "foo", "fan", "boo", "BOO"]
+        topic_view.topic_names = ["FOO", "foo", "fan", "boo", "BOO"]
         topic_view.focus_index_before_search = 3
 
         # Simulate search
-        topic_view.log.clear()
-        topic_view.log.extend(topic_view.topics_btn_list[3])
+        topic_view._list_topics(["boo", "BOO"])
         topic_view.log.set_focus(0)
         topic_view.keypress(size, primary_key_for_command("GO_DOWN"))
         assert topic_view.log.get_focus()[1] != topic_view.focus_index_before_search
@@ -747,9 +1268,29 @@ class TestTopicsView:
         # Check state reset after search
         topic_view.set_focus.assert_called_once_with("body")
         assert topic_view.topic_search_box.reset_search_text.called
-        assert topic_view.log == topic_view.topics_btn_list
+        assert [topic.topic_name for topic in topic_view.log] == topic_view.topic_names
+        assert topic_view.listed_topic_names == topic_view.topic_names
         assert topic_view.log.get_focus()[1] == topic_view.focus_index_before_search
 
+    @pytest.mark.parametrize("search_key", keys_for_command("SEARCH_TOPICS"))
+    @pytest.mark.parametrize("clear_key", keys_for_command("CLEAR_SEARCH"))
+    def test_keypress_SEARCH_TOPICS_then_CLEAR_SEARCH__no_topics(
+        self, mocker, topic_view, search_key, clear_key, widget_size
+    ):
+        size = widget_size(topic_view)
+        mocker.patch(VIEWS + ".TopicsView.set_focus")
+        mocker.patch.object(topic_view.topic_search_box, "set_caption")
+        mocker.patch.object(topic_view.topic_search_box, "reset_search_text")
+        topic_view.topic_names = []
+        topic_view._list_topics([])
+
+        topic_view.keypress(size, search_key)
+        topic_view.keypress(size, clear_key)
+
+        assert topic_view.focus_index_before_search == 0
+        assert topic_view.listed_topic_names == []
+        assert topic_view.log.get_focus() == (None, None)
+
     def test_mouse_event(self, mocker, topic_view, mouse_scroll_event, widget_size):
         event, button, key = mouse_scroll_event
         topic_view_keypress = mocker.patch.object(topic_view, "keypress")
@@ -1008,6 +1549,7 @@ class TestRightColumnView:
         assert right_col_view.view == self.view
         assert right_col_view.user_search == self.user_search(right_col_view)
         assert right_col_view.view.user_search == right_col_view.user_search
+        assert right_col_view.view.user_id_to_button is right_col_view.user_id_to_button
         self.thread.Lock.assert_called_with()
         assert right_col_view.search_lock == self.thread.Lock()
         self.super.assert_called_once_with(
@@ -1046,13 +1588,46 @@ class TestRightColumnView:
             right_col_view.users_view.assert_called_with(assert_list)
         set_body.assert_called_once_with(right_col_view.body)
 
-    def test_update_user_presence(self, right_col_view, mocker, user_list):
+    def test_update_user_presence(self, right_col_view, mocker):
         set_body = mocker.patch(VIEWS + ".urwid.Frame.set_body")
+        mocker.patch(VIEWS + ".RightColumnView.body")
+        self.view.controller.is_in_editor_mode = lambda: False
+
+        def users(*names_and_statuses):
+            return [
+                {
+                    "user_id": ord(name),
+                    "full_name": name,
+                    "email": f"{name}@example.com",
+                    "status": status,
+                }
+                for name, status in names_and_statuses
+            ]
 
-        right_col_view.update_user_list(user_list=user_list)
+        self.view.users = users(("A", "active"), ("B", "idle"), ("C", "offline"))
+        old_buttons = right_col_view._users_btn_list(self.view.users)
+        self.view.user_w = UsersView(self.view.controller, old_buttons)
+        self.view.user_w.log.set_focus(1)
+        user_button = mocker.spy(UserButton, "__init__")
 
-        right_col_view.users_view.assert_called_with(user_list)
-        set_body.assert_called_once_with(right_col_view.body)
+        # A goes idle, D arrives, C goes inactive (is hidden)
+        right_col_view.update_user_list(
+            user_list=users(
+                ("B", "idle"), ("D", "active"), ("A", "idle"), ("C", "inactive")
+            )
+        )
+
+        log = self.view.user_w.log
+        assert [button.label_text for button in log] == ["B", "D", "A"]
+        # Only D needs a new button, with A's restyled for its new status
+        assert user_button.call_count == 1
+        assert log[0] is old_buttons[1] and log[2] is old_buttons[0]
+        assert log[2].prefix_style == log[2].label_style == "user_idle"
+        # B stays in focus
+        assert log.focus == 0
+        assert right_col_view.users_btn_list == list(log)
+        set_body.assert_called_once_with(self.view.user_w)
+        self.view.controller.update_screen.assert_called_once_with()
 
     @pytest.mark.parametrize(
         "users, users_btn_len, editor_mode, status",
@@ -1166,60 +1741,44 @@ class TestLeftColumnView:
             controller=left_col_view.controller, count=3
         )
 
-    @pytest.mark.parametrize("pinned", powerset([1, 2, 99, 999, 1000]))
-    def test_streams_view(self, mocker, streams, pinned):
-        self.view.unpinned_streams = [s for s in streams if s["id"] not in pinned]
-        self.view.pinned_streams = [s for s in streams if s["id"] in pinned]
-        stream_button = mocker.patch(VIEWS + ".StreamButton")
-        mocker.patch(VIEWS + ".StreamsView")
+    def test_streams_view(self, mocker):
+        streams_view = mocker.patch(VIEWS + ".StreamsView")
         mocker.patch(VIEWS + ".urwid.LineBox")
-        divider = mocker.patch(VIEWS + ".StreamsViewDivider")
 
         LeftColumnView(self.view)
 
-        if pinned:
-            assert divider.called
-        else:
-            divider.assert_not_called()
-
-        stream_button.assert_has_calls(
-            [
-                mocker.call(
-                    properties=stream,
-                    controller=self.view.controller,
-                    view=self.view,
-                    count=mocker.ANY,
-                )
-                for stream in (self.view.pinned_streams + self.view.unpinned_streams)
-            ]
+        # Stream buttons are built by the StreamsView, as they are displayed
+        streams_view.assert_called_once_with(self.view)
+        assert self.view.stream_w == streams_view.return_value
+        assert (
+            self.view.stream_id_to_button
+            == streams_view.return_value.stream_id_to_button
         )
 
+    def test_update_stream_view(self, mocker):
+        mocker.patch(VIEWS + ".StreamsView")
+        mocker.patch(VIEWS + ".urwid.LineBox")
+        left_col_view = LeftColumnView(self.view)
+
+        left_col_view.update_stream_view()
+
+        self.view.stream_w.update_stream_order.assert_called_once_with()
+
     def test_topics_view(self, mocker, stream_button):
         mocker.patch(VIEWS + ".LeftColumnView.streams_view")
         mocker.patch(VIEWS + ".LeftColumnView.menu_view")
-        topic_button = mocker.patch(VIEWS + ".TopicButton")
-        mocker.patch(VIEWS + ".TopicsView")
+        topics_view = mocker.patch(VIEWS + ".TopicsView")
         mocker.patch(VIEWS + ".urwid.LineBox")
         topic_list = ["TOPIC1", "TOPIC2", "TOPIC3"]
-        unread_count_list = [34, 100, 0]
         self.view.model.topics_in_stream = mocker.Mock(return_value=topic_list)
         left_col_view = LeftColumnView(self.view)
 
         left_col_view.topics_view(stream_button)
 
         self.view.model.topics_in_stream.assert_called_once_with(205)
-        topic_button.assert_has_calls(
-            [
-                mocker.call(
-                    stream_id=205,
-                    topic=topic,
-                    controller=self.view.controller,
-                    view=self.view,
-                    count=count,
-                )
-                for topic, count in zip(topic_list, unread_count_list)
-            ]
-        )
+        # Topic buttons are built by the TopicsView, as they are displayed
+        topics_view.assert_called_once_with(topic_list, self.view, stream_button)
+        assert self.view.topic_w == topics_view.return_value
 
 
 class TestTabView:
@@ -24,9 +24,11 @@ from zulipterminal.config.symbols import (
     STREAM_MARKER_WEB_PUBLIC,
 )
 from zulipterminal.config.ui_mappings import StreamAccessType
-from zulipterminal.helper import Index, MinimalUserData
+from zulipterminal.helper import Index, MinimalUserData, StreamSearchIndex
 from zulipterminal.ui_tools.boxes import (
     MAX_MESSAGE_LENGTH_CONFIRMATION_POPUP,
+    PANEL_SEARCH_DEBOUNCE_DELAY,
+    JumpToTimeBox,
     PanelSearchBox,
     WriteBox,
     _MessageEditState,
@@ -78,6 +80,9 @@ class TestWriteBox:
             [{"name": stream["name"]} for stream in streams_fixture],
             key=lambda stream: stream["name"].lower(),
         )
+        write_box.model.stream_search_index = StreamSearchIndex(
+            write_box.view.pinned_streams, write_box.view.unpinned_streams
+        )
 
         return write_box
 
@@ -1018,6 +1023,9 @@ class TestWriteBox:
         for stream in streams_to_pin:
             write_box.view.unpinned_streams.remove(stream)
         write_box.view.pinned_streams = streams_to_pin
+        write_box.model.stream_search_index.rebuild(
+            write_box.view.pinned_streams, write_box.view.unpinned_streams
+        )
         write_box.stream_id = stream_categories.get("current_stream", None)
         write_box.model.stream_dict = stream_dict
         write_box.model.muted_streams = {
@@ -1303,6 +1311,9 @@ class TestWriteBox:
         for stream in streams_to_pin:
             write_box.view.unpinned_streams.remove(stream)
         write_box.view.pinned_streams = streams_to_pin
+        write_box.model.stream_search_index.rebuild(
+            write_box.view.pinned_streams, write_box.view.unpinned_streams
+        )
         _process_typeaheads = mocker.patch(WRITEBOX + "._process_typeaheads")
 
         write_box._stream_box_autocomplete(text, state)
@@ -1836,6 +1847,66 @@ class TestWriteBox:
         assert len(write_box.header_write_box.widget_list) == expected_box_size
 
 
+class TestJumpToTimeBox:
+    @pytest.fixture
+    def jump_to_time_box(self, mocker: MockerFixture) -> JumpToTimeBox:
+        return JumpToTimeBox(mocker.Mock())
+
+    @pytest.mark.parametrize("enter_key", keys_for_command("EXECUTE_SEARCH"))
+    def test_keypress_EXECUTE_SEARCH(
+        self,
+        jump_to_time_box: JumpToTimeBox,
+        enter_key: str,
+        widget_size: Callable[[Widget], urwid_Size],
+    ) -> None:
+        jump_to_time_box.edit_text = "2023-05-01T14:30:00+00:00"
+        controller = jump_to_time_box.controller
+        size = widget_size(jump_to_time_box)
+
+        jump_to_time_box.keypress(size, enter_key)
+
+        controller.exit_editor_mode.assert_called_once_with()
+        controller.exit_popup.assert_called_once_with()
+        controller.jump_to_time.assert_called_once_with(1682951400)
+
+    @pytest.mark.parametrize("enter_key", keys_for_command("EXECUTE_SEARCH"))
+    @pytest.mark.parametrize("text", ["", "not a time", "2023-13-45"])
+    def test_keypress_EXECUTE_SEARCH__invalid_time(
+        self,
+        jump_to_time_box: JumpToTimeBox,
+        enter_key: str,
+        text: str,
+        widget_size: Callable[[Widget], urwid_Size],
+    ) -> None:
+        jump_to_time_box.edit_text = text
+        controller = jump_to_time_box.controller
+        size = widget_size(jump_to_time_box)
+
+        jump_to_time_box.keypress(size, enter_key)
+
+        controller.report_error.assert_called_once_with(
+            [f"Unable to understand date/time '{text}'"]
+        )
+        controller.exit_editor_mode.assert_not_called()
+        controller.jump_to_time.assert_not_called()
+
+    @pytest.mark.parametrize("esc_key", keys_for_command("CLEAR_SEARCH"))
+    def test_keypress_CLEAR_SEARCH(
+        self,
+        jump_to_time_box: JumpToTimeBox,
+        esc_key: str,
+        widget_size: Callable[[Widget], urwid_Size],
+    ) -> None:
+        controller = jump_to_time_box.controller
+        size = widget_size(jump_to_time_box)
+
+        jump_to_time_box.keypress(size, esc_key)
+
+        controller.exit_editor_mode.assert_called_once_with()
+        controller.exit_popup.assert_called_once_with()
+        controller.jump_to_time.assert_not_called()
+
+
 class TestPanelSearchBox:
     search_caption = " Search Results  "
 
@@ -1844,8 +1915,8 @@ class TestPanelSearchBox:
         # X is the return from display_keys_for_command("UNTESTED_TOKEN")
         mocker.patch(MODULE + ".display_keys_for_command", return_value="X")
         panel_view = mocker.Mock()
-        update_func = mocker.Mock()
-        return PanelSearchBox(panel_view, "UNTESTED_TOKEN", update_func)
+        self.update_func = mocker.Mock()
+        return PanelSearchBox(panel_view, "UNTESTED_TOKEN", self.update_func)
 
     def test_init(self, panel_search_box: PanelSearchBox) -> None:
         assert panel_search_box.search_text == " Search [X]: "
@@ -1855,11 +1926,40 @@ class TestPanelSearchBox:
     def test_reset_search_text(self, panel_search_box: PanelSearchBox) -> None:
         panel_search_box.set_caption(self.search_caption)
         panel_search_box.edit_text = "key words"
+        generation = panel_search_box.search_generation
+        loop = panel_search_box.panel_view.view.controller.loop
 
         panel_search_box.reset_search_text()
 
         assert panel_search_box.caption == panel_search_box.search_text
         assert panel_search_box.edit_text == ""
+        # The pending search is cancelled, and any running search outdated
+        loop.remove_alarm.assert_called_with(loop.set_alarm_in.return_value)
+        assert panel_search_box.search_generation > generation
+        self.update_func.assert_not_called()
+
+    def test_change__search_debounced(self, panel_search_box: PanelSearchBox) -> None:
+        loop = panel_search_box.panel_view.view.controller.loop
+
+        panel_search_box.edit_text = "k"
+        panel_search_box.edit_text = "ke"
+
+        assert panel_search_box.search_generation == 2
+        loop.remove_alarm.assert_called_once_with(loop.set_alarm_in.return_value)
+        assert loop.set_alarm_in.call_count == 2
+        delay, callback = loop.set_alarm_in.call_args[0]
+        assert delay == PANEL_SEARCH_DEBOUNCE_DELAY
+        self.update_func.assert_not_called()
+
+        callback(loop, None)
+
+        self.update_func.assert_called_once_with(panel_search_box, "ke")
+
+    def test_change__same_text(self, panel_search_box: PanelSearchBox) -> None:
+        panel_search_box.edit_text = ""
+
+        assert panel_search_box.search_generation == 0
+        panel_search_box.panel_view.view.controller.loop.set_alarm_in.assert_not_called()
 
     @pytest.mark.parametrize(
         "search_text, entered_string, expected_result",
@@ -1919,6 +2019,8 @@ class TestPanelSearchBox:
         assert panel_search_box.edit_text == "key words"
 
         panel_view = panel_search_box.panel_view
+        # The pending search is run immediately
+        self.update_func.assert_called_once_with(panel_search_box, "key words")
         if expect_body_focus_set:
             assert panel_search_box.caption == self.search_caption
             # Leave editor mode
@@ -307,6 +307,19 @@ class TestUserButton:
 
         pop_up.assert_called_once_with(user_button.user_id)
 
+    def test_update_status(self, user_button: UserButton) -> None:
+        label_text = user_button.label_text
+
+        user_button.update_status(state_marker="~", color="user_idle")
+
+        assert (user_button.prefix_style, user_button.prefix_text) == ("user_idle", "~")
+        assert (user_button.label_style, user_button.label_text) == (
+            "user_idle",
+            label_text,
+        )
+        assert user_button.button_prefix.text == " ~ "
+        assert user_button._w.attr_map == {None: "user_idle"}
+
 
 class TestEmojiButton:
     @pytest.mark.parametrize(
@@ -510,6 +523,18 @@ class TestTopicButton:
         assert topic_button.suffix_text == MUTE_MARKER
         update_widget.assert_called_once_with()
 
+    def test_mark_unmuted(
+        self, mocker: MockerFixture, topic_button: TopicButton
+    ) -> None:
+        update_count = mocker.patch(MODULE + ".TopicButton.update_count")
+        topic_button.mark_muted()
+
+        topic_button.mark_unmuted(7)
+
+        assert topic_button.label_style is None
+        assert topic_button.suffix_style == "unread_count"
+        update_count.assert_called_once_with(7)
+
     @pytest.mark.parametrize("key", keys_for_command("TOGGLE_TOPIC"))
     def test_keypress_EXIT_TOGGLE_TOPIC(
         self,
@@ -1,14 +1,18 @@
 from collections import OrderedDict, defaultdict
-from datetime import date
+from concurrent.futures import BrokenExecutor, Future, ThreadPoolExecutor
+from datetime import date, datetime
+from threading import Event
 from unittest.mock import patch
 
 import pytest
 import pytz
 from bs4 import BeautifulSoup
+from lxml import etree
 from pytest import param as case
 from urwid import Columns, Divider, Padding, Text
 
 from zulipterminal.config.keys import keys_for_command, primary_key_for_command
+from zulipterminal.config.markdown_examples import MARKDOWN_ELEMENTS
 from zulipterminal.config.symbols import (
     ALL_MESSAGES_MARKER,
     DIRECT_MESSAGE_MARKER,
@@ -20,7 +24,15 @@ from zulipterminal.config.symbols import (
     STREAM_TOPIC_SEPARATOR,
     TIME_MENTION_MARKER,
 )
-from zulipterminal.ui_tools.messages import MessageBox
+from zulipterminal.helper import summarize_reactions
+from zulipterminal.ui_tools import messages
+from zulipterminal.ui_tools.messages import (
+    SECONDS_PER_DAY,
+    MessageBox,
+    code_block_cache,
+    local_time,
+    transformed_content_cache,
+)
 
 
 MODULE = "zulipterminal.ui_tools.messages"
@@ -72,6 +84,113 @@ class TestMessageBox:
         with pytest.raises(RuntimeError):
             MessageBox(message, self.model, None)
 
+    @pytest.mark.parametrize(
+        "use_box",
+        [
+            case(lambda box: box.render((80,)), id="render"),
+            case(lambda box: box.rows((80,)), id="rows"),
+            case(lambda box: box.keypress((80,), "unknown"), id="keypress"),
+        ],
+    )
+    def test_init__lazy_built_on_first_use(self, mocker, message_fixture, use_box):
+        main_view = mocker.patch.object(
+            MessageBox, "main_view", return_value=[Text("content")]
+        )
+
+        msg_box = MessageBox(message_fixture, self.model, None, lazy=True)
+
+        assert not msg_box.is_built
+        main_view.assert_not_called()
+
+        use_box(msg_box)
+
+        assert msg_box.is_built
+        main_view.assert_called_once_with()
+
+    def test_release__rebuilt_on_next_use(self, mocker, message_fixture):
+        main_view = mocker.patch.object(
+            MessageBox, "main_view", return_value=[Text("content")]
+        )
+        msg_box = MessageBox(message_fixture, self.model, None, lazy=True)
+        msg_box.render((80,))
+
+        msg_box.release()
+
+        assert not msg_box.is_built
+        assert msg_box.render((80,)).text == [b"content" + b" " * 73]
+        assert main_view.call_count == 2
+
+    def test_lazy_boxes_released_when_others_used_more_recently(
+        self, mocker, message_fixture
+    ):
+        mocker.patch(MODULE + ".MAXIMUM_BUILT_LAZY_MESSAGE_BOXES", 2)
+        mocker.patch(MODULE + "._built_lazy_message_boxes", OrderedDict())
+        mocker.patch.object(MessageBox, "main_view", return_value=[Text("content")])
+        boxes = [
+            MessageBox(message_fixture, self.model, None, lazy=True) for _ in range(3)
+        ]
+
+        for box in boxes:
+            box.render((80,))
+
+        assert [box.is_built for box in boxes] == [False, True, True]
+
+    def test_update_sections(self, mocker, message_fixture):
+        msg_box = MessageBox(message_fixture, self.model, None)
+        sections_before = dict(msg_box.sections)
+        transform_content = mocker.spy(MessageBox, "transform_content")
+        new_reactions = Text("reactions")
+        mocker.patch.object(MessageBox, "reactions_view", return_value=new_reactions)
+
+        msg_box.update_sections(["reactions"])
+
+        transform_content.assert_not_called()
+        assert msg_box.sections == dict(sections_before, reactions=new_reactions)
+        assert msg_box.footer[-1] is new_reactions
+        assert msg_box.contents[-1][0] is new_reactions
+
+    def test_update_sections__content_updates_footlinks(self, mocker, message_fixture):
+        msg_box = MessageBox(message_fixture, self.model, None)
+        header_before = list(msg_box.header)
+        transform_content = mocker.spy(MessageBox, "transform_content")
+        footlinks_view = mocker.spy(MessageBox, "footlinks_view")
+
+        msg_box.update_sections(["content"])
+
+        transform_content.assert_called_once()
+        footlinks_view.assert_called_once()
+        assert msg_box.header == header_before
+
+    def test_update_sections__lazy_box_not_built(self, mocker, message_fixture):
+        msg_box = MessageBox(message_fixture, self.model, None, lazy=True)
+        build_section = mocker.spy(MessageBox, "_build_section")
+
+        msg_box.update_sections(["reactions"])
+
+        build_section.assert_not_called()
+        assert not msg_box.is_built
+
+    def test_update_header_time(self, mocker, message_fixture):
+        msg_box = MessageBox(message_fixture, self.model, None)
+        content_header = msg_box.sections["content_header"]
+        transform_content = mocker.spy(MessageBox, "transform_content")
+        self.model.formatted_local_time = mocker.Mock(return_value="NEW TIME")
+
+        msg_box.update_header_time()
+
+        transform_content.assert_not_called()
+        assert msg_box.sections["content_header"] is content_header
+        assert msg_box.header_time is not None
+        assert msg_box.header_time.text == msg_box.header_time_prefix + "NEW TIME"
+
+    def test_update_header_time__lazy_box_not_built(self, mocker, message_fixture):
+        msg_box = MessageBox(message_fixture, self.model, None, lazy=True)
+        self.model.formatted_local_time = mocker.Mock(return_value="NEW TIME")
+
+        msg_box.update_header_time()
+
+        self.model.formatted_local_time.assert_not_called()
+
     def test_private_message_to_self(self, mocker):
         message = dict(
             type="private",
@@ -94,6 +213,7 @@ class TestMessageBox:
         assert msg_box.recipient_emails == ["foo@zulip.com"]
         msg_box._is_private_message_to_self.assert_called_once_with()
 
+    @pytest.mark.parametrize("converter", ["soup", "lxml"])
     @pytest.mark.parametrize(
         "content, expected_markup",
         [
@@ -672,11 +792,10 @@ class TestMessageBox:
             ),
         ],
     )
-    def test_soup2markup(self, content, expected_markup, mocker):
+    def test_soup2markup(self, content, expected_markup, converter, mocker):
         mocker.patch(
             MODULE + ".get_localzone", return_value=pytz.timezone("Asia/Kolkata")
         )
-        soup = BeautifulSoup(content, "lxml").find(name="body")
         metadata = dict(
             server_url=SERVER_URL,
             message_links=OrderedDict(),
@@ -684,7 +803,13 @@ class TestMessageBox:
             bq_len=0,
         )
 
-        markup, *_ = MessageBox.soup2markup(soup, metadata)
+        if converter == "soup":
+            soup = BeautifulSoup(content, "lxml").find(name="body")
+            markup, *_ = MessageBox.soup2markup(soup, metadata)
+        else:
+            root = etree.HTML(content) if content else None
+            tree = root.find("body") if root is not None else None
+            markup, *_ = MessageBox.tree2markup(tree, metadata)
 
         assert markup == [""] + expected_markup
 
@@ -1130,6 +1255,28 @@ class TestMessageBox:
         assert [w.text for w in view_components[0].widget_list] == expected_header
         assert isinstance(view_components[1], Padding)
 
+    @pytest.mark.parametrize(
+        "this_timestamp, last_timestamp",
+        [
+            case(1532103879, 1532103779, id="same_minute"),
+            case(1532103879, 1532017479, id="exactly_a_day_apart"),
+            case(1532103879, 1532017480, id="just_under_a_day_apart"),
+            case(1532103879, 0, id="years_apart"),
+            case(0, 1532103879, id="out_of_order"),
+        ],
+    )
+    def test_local_time(self, this_timestamp, last_timestamp):
+        this_datetime = datetime.fromtimestamp(this_timestamp)
+        last_datetime = datetime.fromtimestamp(last_timestamp)
+
+        this_local_time = local_time(this_timestamp)
+        last_local_time = local_time(last_timestamp)
+
+        assert this_local_time.year == this_datetime.year
+        assert (
+            this_local_time.seconds - last_local_time.seconds
+        ) // SECONDS_PER_DAY == (this_datetime - last_datetime).days
+
     @pytest.mark.parametrize(
         "to_vary_in_each_message",
         [
@@ -1586,7 +1733,9 @@ class TestMessageBox:
             # fmt: on
         ],
     )
-    def test_transform_content(self, mocker, raw_html, expected_content):
+    @pytest.mark.parametrize("converter", ["soup", "lxml"])
+    def test_transform_content(self, mocker, raw_html, expected_content, converter):
+        mocker.patch(MODULE + ".HTML_CONVERTER", converter)
         expected_content = expected_content.replace("{}", QUOTED_TEXT_MARKER)
 
         content, *_ = MessageBox.transform_content(raw_html, SERVER_URL)
@@ -1594,6 +1743,255 @@ class TestMessageBox:
         rendered_text = Text(content)
         assert rendered_text.text == expected_content
 
+    @pytest.mark.parametrize(
+        "raw_html",
+        [
+            *(element["html_element"] for element in MARKDOWN_ELEMENTS),
+            case(
+                "<p>a<!-- comment --> <strong>b  <em>c</em>\n </strong></p>",
+                id="comment_and_whitespace",
+            ),
+            case(
+                '<div class="codehilite"><pre><span></span>x\n  '
+                '<span class="k">def</span>  \n</pre></div>',
+                id="codeblock_without_code_tag",
+            ),
+            case("<pre>  a\n   <b>  </b>\n</pre>", id="pre_preserves_whitespace"),
+            case(
+                "<blockquote><p>a<br><b>bold</b> and<br><i>x</i></p>\n"
+                "<blockquote><p>q</p></blockquote></blockquote>",
+                id="quote_with_tags_after_br",
+            ),
+            case(
+                '<ul>\n<li>a<ul>\n<li>b<ol start="3">\n<li>c</li>\n</ol>\n'
+                "</li>\n</ul>\n</li>\n<li>e</li>\n</ul>",
+                id="nested_lists",
+            ),
+        ],
+    )
+    def test_transform_content__converters_equivalent(self, mocker, raw_html):
+        mocker.patch(
+            MODULE + ".get_localzone", return_value=pytz.timezone("Asia/Kolkata")
+        )
+
+        soup_result = MessageBox._transform_content(raw_html, SERVER_URL)
+        lxml_result = MessageBox._transform_content_with_lxml(raw_html, SERVER_URL)
+
+        assert lxml_result == soup_result
+
+    def test_transform_content__cached(self, mocker):
+        transform = mocker.spy(MessageBox, "_transform_content")
+        raw_html = "<p>Hello</p>"
+
+        first = MessageBox.transform_content(raw_html, SERVER_URL)
+        second = MessageBox.transform_content(raw_html, SERVER_URL)
+        MessageBox.transform_content(raw_html, "https://other.zulipchat.com")
+
+        assert second is first
+        assert transform.call_count == 2
+        assert transformed_content_cache.hits == 1
+        assert transformed_content_cache.misses == 2
+
+    @pytest.mark.parametrize(
+        "code_markup, expected_markup",
+        [
+            case(
+                [("pygments:k", "def"), ("pygments:w", " f():\n    pass\n")],
+                [("pygments:k", "def"), ("pygments:w", " f():\n    pass\n")],
+                id="short_block_unchanged",
+            ),
+            case(
+                [("pygments:w", "1\n2\n"), ("pygments:k", "3\n")],
+                [("pygments:w", "1\n2\n"), ("pygments:k", "3\n")],
+                id="block_of_maximum_length_unchanged",
+            ),
+            case(
+                [("pygments:w", "1\n2"), ("pygments:k", "\n3\n4\n"), ("w", "5\n")],
+                [
+                    ("pygments:w", "1\n2"),
+                    ("pygments:k", "\n3\n"),
+                    ("pygments:w", "[2 MORE LINES NOT SHOWN]\n"),
+                ],
+                id="long_block_folded_within_text",
+            ),
+            case(
+                [("pygments:w", "1\n2\n3\n"), ("pygments:k", "4\n")],
+                [
+                    ("pygments:w", "1\n2\n3\n"),
+                    ("pygments:w", "[1 MORE LINES NOT SHOWN]\n"),
+                ],
+                id="long_block_folded_at_end_of_text",
+            ),
+        ],
+    )
+    def test_fold_code_block(self, code_markup, expected_markup):
+        assert MessageBox.fold_code_block(code_markup, 3) == expected_markup
+
+    @pytest.mark.parametrize("converter", ["soup", "lxml"])
+    def test_transform_content__code_block_cached(self, mocker, converter):
+        mocker.patch(MODULE + ".HTML_CONVERTER", converter)
+        code_block = (
+            '<div class="codehilite" data-code-language="{}"><pre><span></span><code>'
+            '<span class="k">def</span> <span class="nf">f</span>():\n'
+            "</code></pre></div>"
+        )
+
+        first, *_ = MessageBox.transform_content(
+            code_block.format("Python"), SERVER_URL
+        )
+        second, *_ = MessageBox.transform_content(
+            "<p>Quoting:</p>\n" + code_block.format("Python"), SERVER_URL
+        )
+        MessageBox.transform_content(code_block.format("Python 3"), SERVER_URL)
+
+        assert code_block_cache.hits == 1
+        assert len(code_block_cache) == 2  # Keyed by language as well as text
+        assert second[1][-3:] == first[1][-3:]
+
+    @pytest.mark.parametrize("converter", ["soup", "lxml"])
+    @pytest.mark.parametrize("fold_long_blocks", [True, False])
+    def test_transform_content__long_code_block(
+        self, mocker, converter, fold_long_blocks
+    ):
+        mocker.patch(MODULE + ".HTML_CONVERTER", converter)
+        mocker.patch(MODULE + ".MAXIMUM_CODE_BLOCK_LINES", 2)
+        lines = "".join(f"line {number}\n" for number in range(5))
+        code_block = (
+            '<div class="codehilite"><pre><span></span>'
+            f"<code>{lines}</code></pre></div>"
+        )
+
+        (_, markup), *_ = MessageBox.transform_content(
+            code_block, SERVER_URL, fold_long_blocks=fold_long_blocks
+        )
+
+        if fold_long_blocks:
+            assert markup[1:] == [
+                ("pygments:w", "line 0\nline 1\n"),
+                ("pygments:w", "[3 MORE LINES NOT SHOWN]\n"),
+            ]
+        else:
+            assert markup[1:] == [("pygments:w", lines)]
+
+    @pytest.mark.parametrize("converter", ["soup", "lxml"])
+    @pytest.mark.parametrize("fold_long_blocks", [True, False])
+    def test_transform_content__long_table(self, mocker, converter, fold_long_blocks):
+        mocker.patch(MODULE + ".HTML_CONVERTER", converter)
+        mocker.patch(MODULE + ".MAXIMUM_TABLE_ROWS", 2)
+        rows = "".join(f"<tr><td>{number}</td></tr>" for number in range(5))
+        table = (
+            "<table><thead><tr><th>Number</th></tr></thead>"
+            f"<tbody>{rows}</tbody></table>"
+        )
+
+        (_, markup), *_ = MessageBox.transform_content(
+            table, SERVER_URL, fold_long_blocks=fold_long_blocks
+        )
+
+        cells = [item[1].strip() for item in markup if isinstance(item, tuple)]
+        if fold_long_blocks:
+            assert markup[-1] == "\n[3 MORE ROWS NOT SHOWN]"
+            assert cells == ["Number", "0", "1"]
+        else:
+            assert markup[-1] == "─┘"
+            assert cells == ["Number", "0", "1", "2", "3", "4"]
+
+    @pytest.fixture
+    def pre_render_with_threads(self, mocker):
+        mocker.patch(MODULE + ".PRE_RENDER_POOL", "thread")
+        executors = mocker.patch(MODULE + "._pre_render_executors", {})
+        mocker.patch(MODULE + ".PRE_RENDER_WORKERS", 2)
+        mocker.patch(MODULE + ".PRE_RENDER_MINIMUM_BATCH", 2)
+        yield executors
+        self.finish_pre_render(executors)
+
+    @staticmethod
+    def finish_pre_render(executors):
+        # Waits for conversions, and storing their results in the cache
+        for executor in executors.values():
+            executor.shutdown()
+
+    def test_pre_render(self, mocker, pre_render_with_threads):
+        contents = ["<p>a</p>", "<p>b</p>", "<p>a</p>", "<p>c</p>"]
+        cached = MessageBox.transform_content(
+            "<p>c</p>", SERVER_URL, fold_long_blocks=True
+        )
+        convert = mocker.spy(messages, "_convert_content")
+
+        futures = MessageBox.pre_render(contents, SERVER_URL)
+        self.finish_pre_render(pre_render_with_threads)
+
+        assert len(futures) == 2
+        assert sorted(call.args[0] for call in convert.call_args_list) == [
+            "<p>a</p>",
+            "<p>b</p>",
+        ]
+        assert (
+            MessageBox.transform_content("<p>c</p>", SERVER_URL, fold_long_blocks=True)
+            is cached
+        )
+        for content in ("<p>a</p>", "<p>b</p>"):
+            assert (content, SERVER_URL, True) in transformed_content_cache
+            assert transformed_content_cache.get(
+                (content, SERVER_URL, True)
+            ) == MessageBox._transform_content(content, SERVER_URL)
+
+    def test_pre_render__small_batch(self, mocker, pre_render_with_threads):
+        convert = mocker.spy(messages, "_convert_content")
+
+        assert MessageBox.pre_render(["<p>a</p>"], SERVER_URL) == []
+
+        convert.assert_not_called()
+        assert len(transformed_content_cache) == 0
+
+    def test_pre_render__single_worker(self, mocker, pre_render_with_threads):
+        mocker.patch(MODULE + ".PRE_RENDER_WORKERS", 1)
+        convert = mocker.spy(messages, "_convert_content")
+
+        MessageBox.pre_render(["<p>a</p>", "<p>b</p>"], SERVER_URL)
+
+        convert.assert_not_called()
+
+    def test_pre_render__does_not_wait(self, mocker, pre_render_with_threads):
+        converting = Event()
+        convert = mocker.patch(
+            MODULE + "._convert_contents", side_effect=lambda *args: converting.wait()
+        )
+
+        futures = MessageBox.pre_render(["<p>a</p>", "<p>b</p>"], SERVER_URL)
+
+        assert not any(future.done() for future in futures)
+        converting.set()
+        self.finish_pre_render(pre_render_with_threads)
+        assert convert.call_count == 2
+
+    @pytest.mark.parametrize(
+        "broken_upon", ["submit", "result"], ids=["broken_upon_submit", "broken_later"]
+    )
+    def test_pre_render__broken_process_pool(
+        self, mocker, pre_render_with_threads, broken_upon
+    ):
+        mocker.patch(MODULE + ".PRE_RENDER_POOL", "process")
+        process_pool = mocker.patch(MODULE + ".ProcessPoolExecutor")
+        if broken_upon == "submit":
+            process_pool.return_value.submit.side_effect = BrokenExecutor
+        else:
+            broken_future = Future()
+            broken_future.set_exception(BrokenExecutor())
+            process_pool.return_value.submit.return_value = broken_future
+        contents = ["<p>a</p>", "<p>b</p>"]
+
+        MessageBox.pre_render(contents, SERVER_URL)
+        self.finish_pre_render(pre_render_with_threads)
+
+        process_pool.return_value.shutdown.assert_called_once_with(wait=False)
+        assert isinstance(pre_render_with_threads["process"], ThreadPoolExecutor)
+        assert pre_render_with_threads["process"] is pre_render_with_threads["thread"]
+        assert all(
+            (content, SERVER_URL, True) in transformed_content_cache
+            for content in contents
+        )
+
     # FIXME This is the same parametrize as MsgInfoView:test_height_reactions
     @pytest.mark.parametrize(
         "to_vary_in_each_message, expected_text, expected_attributes",
@@ -1755,12 +2153,12 @@ class TestMessageBox:
                 return reaction["user_id"]
             return reaction["user"]["id"]
 
-        with patch.object(
-            self.model,
-            "get_user_id_from_reaction",
-            side_effect=mock_get_user_id,
-        ), patch.object(self.model, "_all_users_by_id", mock_all_users_by_id):
-            reactions_view = msg_box.reactions_view(reactions)
+        reaction_summary = summarize_reactions(
+            reactions, my_user_id=1, get_user_id=mock_get_user_id
+        )
+
+        with patch.object(self.model, "_all_users_by_id", mock_all_users_by_id):
+            reactions_view = msg_box.reactions_view(reaction_summary)
 
             assert reactions_view.original_widget.text == expected_text
             assert reactions_view.original_widget.attrib == expected_attributes
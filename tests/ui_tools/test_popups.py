@@ -10,7 +10,7 @@ from urwid import Columns, Pile, Text, Widget
 from zulipterminal.api_types import Message
 from zulipterminal.config.keys import is_command_key, keys_for_command
 from zulipterminal.config.ui_mappings import EDIT_MODE_CAPTIONS
-from zulipterminal.helper import CustomProfileData, TidiedUserInfo
+from zulipterminal.helper import CustomProfileData, TidiedUserInfo, summarize_reactions
 from zulipterminal.ui_tools.messages import MessageBox
 from zulipterminal.ui_tools.views import (
     AboutView,
@@ -21,6 +21,7 @@ from zulipterminal.ui_tools.views import (
     FullRawMsgView,
     FullRenderedMsgView,
     HelpView,
+    JumpToTimeView,
     MarkdownHelpView,
     MsgInfoView,
     PopUpConfirmationView,
@@ -496,7 +497,7 @@ class TestFullRenderedMsgView:
         mocker.patch.object(
             self.controller, "maximum_popup_dimensions", return_value=(64, 64)
         )
-        mocker.patch(MODULE + ".MessageBox", return_value=msg_box)
+        self.message_box = mocker.patch(MODULE + ".MessageBox", return_value=msg_box)
         # NOTE: Given that the FullRenderedMsgView just uses the message ID from
         # the message data currently, message_fixture is not used to avoid
         # adding extra test runs unnecessarily.
@@ -519,6 +520,9 @@ class TestFullRenderedMsgView:
         assert self.full_rendered_message.time_mentions == list()
         assert self.full_rendered_message.header.widget_list == msg_box.header
         assert self.full_rendered_message.footer.widget_list == msg_box.footer
+        self.message_box.assert_called_once_with(
+            self.message, self.controller.model, None, fold_long_blocks=False
+        )
 
     @pytest.mark.parametrize("key", keys_for_command("MSG_INFO"))
     def test_keypress_exit_popup(
@@ -890,6 +894,20 @@ class TestEditModeView:
         mode_button.set_selected_mode.assert_called_once_with(mode)
 
 
+class TestJumpToTimeView:
+    def test_init(self, mocker: MockerFixture) -> None:
+        controller = mocker.Mock()
+        controller.maximum_popup_dimensions.return_value = (64, 64)
+
+        jump_to_time_view = JumpToTimeView(controller, "Jump to date/time")
+
+        assert jump_to_time_view.command == "JUMP_TO_TIME"
+        assert jump_to_time_view.body.focus is jump_to_time_view.time_box
+        controller.enter_editor_mode_with.assert_called_once_with(
+            jump_to_time_view.time_box
+        )
+
+
 class TestMarkdownHelpView:
     @pytest.fixture(autouse=True)
     def mock_external_classes(self, mocker: MockerFixture) -> None:
@@ -976,6 +994,13 @@ class TestMsgInfoView:
             "Tue Mar 13 10:55:22",
             "Tue Mar 13 10:55:37",
         ]
+        self.controller.model.reaction_summary.side_effect = (
+            lambda message: summarize_reactions(
+                message["reactions"],
+                my_user_id=1,
+                get_user_id=self.controller.model.get_user_id_from_reaction,
+            )
+        )
         self.msg_info_view = MsgInfoView(
             self.controller,
             message_fixture,
@@ -1654,6 +1679,7 @@ class TestEmojiPickerView:
             self.controller, "maximum_popup_dimensions", return_value=(64, 64)
         )
         mocker.patch(MODULE + ".urwid.SimpleFocusListWalker", return_value=[])
+        self.controller.model.reaction_summary.return_value = {}
         self.emoji_picker_view = EmojiPickerView(
             self.controller,
             "ADD EMOJI",
@@ -1712,6 +1738,32 @@ class TestEmojiPickerView:
         assert emojis_display_name == assert_list
         assert self.emoji_picker_view.get_focus() == "header"
 
+    @pytest.mark.parametrize(
+        "emoji_code, expected_count",
+        [
+            case("1f44d", 3, id="same_code_under_two_names"),
+            case("2764", 1, id="single_reaction"),
+            case("1f642", 0, id="no_reactions"),
+        ],
+    )
+    def test_count_reactions(
+        self, message_fixture: Message, emoji_code: str, expected_count: int
+    ) -> None:
+        self.controller.model.reaction_summary.return_value = {
+            "thumbs_up": {"emoji_code": "1f44d", "user_ids": [1, 2], "mine": True},
+            "heart": {"emoji_code": "2764", "user_ids": [2], "mine": False},
+            "+1": {"emoji_code": "1f44d", "user_ids": [3], "mine": False},
+        }
+        emoji_picker_view = EmojiPickerView(
+            self.controller,
+            "ADD EMOJI",
+            [("zulip", "4", [])],
+            message_fixture,
+            self.view,
+        )
+
+        assert emoji_picker_view.count_reactions(emoji_code) == expected_count
+
     @pytest.mark.parametrize(
         "event, button, keypress",
         [
@@ -0,0 +1,73 @@
+from typing import Iterator, List, Optional
+
+import pytest
+from bs4 import BeautifulSoup
+from pytest import param as case
+
+from zulipterminal.ui_tools.tables import (
+    TableCells,
+    iter_html_table,
+    render_table_cells,
+)
+
+
+TABLE_HTML = (
+    '<table><thead><tr><th align="left">Name</th><th align="right">Id</th></tr>'
+    "</thead><tbody><tr><td>Foo</td><td>1</td></tr><tr><td>Barbaz</td><td>2</td>"
+    "</tr><tr><td>Quux</td><td>300</td></tr></tbody></table>"
+)
+
+
+def test_iter_html_table() -> None:
+    table_element = BeautifulSoup(TABLE_HTML, "lxml").table
+
+    table_cells = iter_html_table(table_element)
+
+    assert table_cells.column_alignments == ["left", "right"]
+    assert table_cells.header == ["Name", "Id"]
+    assert table_cells.row_count == 3
+    assert next(table_cells.rows) == ["Foo", "1"]
+    assert list(table_cells.rows) == [["Barbaz", "2"], ["Quux", "300"]]
+
+
+@pytest.mark.parametrize(
+    "maximum_rows, expected_shown_rows, expected_name_width, expected_marker",
+    [
+        case(None, 3, 6, None, id="no_maximum"),
+        case(3, 3, 6, None, id="maximum_equal_to_rows"),
+        case(1, 1, 4, "\n[2 MORE ROWS NOT SHOWN]", id="rows_hidden"),
+        case(0, 0, 4, "\n[3 MORE ROWS NOT SHOWN]", id="only_header"),
+    ],
+)
+def test_render_table_cells__maximum_rows(
+    maximum_rows: Optional[int],
+    expected_shown_rows: int,
+    expected_name_width: int,
+    expected_marker: Optional[str],
+) -> None:
+    rows = [["Foo", "1"], ["Barbaz", "2"], ["Quux", "300"]]
+    extracted_rows: List[List[str]] = []
+
+    def extract_rows() -> Iterator[List[str]]:
+        for row in rows:
+            extracted_rows.append(row)
+            yield row
+
+    table_cells = TableCells(
+        column_alignments=["left", "right"],
+        header=["Name", "Id"],
+        rows=extract_rows(),
+        row_count=len(rows),
+    )
+
+    table = render_table_cells(table_cells, maximum_rows)
+
+    # Only rows which are shown are extracted, and used to size columns
+    assert extracted_rows == rows[:expected_shown_rows]
+    assert table[1] == "─" * expected_name_width
+    body_rows = [item for item in table if isinstance(item, tuple)][2::2]
+    assert len(body_rows) == expected_shown_rows
+    if expected_marker is None:
+        assert table[-1] == "─┘"
+    else:
+        assert table[-2:] == ["─┘", expected_marker]
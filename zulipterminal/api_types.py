@@ -400,7 +400,7 @@ class UpdateMessagesLocationEvent(BaseUpdateMessageEvent):
     # topic_links: NotRequired[List[Any]]
 
     # Only present if messages are moved to a different stream
-    # new_stream_id: NotRequired[int]
+    new_stream_id: NotRequired[int]
 
 
 # -----------------------------------------------------------------------------
@@ -561,6 +561,14 @@ class TypingEvent(TypedDict):
 # See https://zulip.com/api/get-events#update_message_flags-add and -remove
 
 
+class UnreadMessageDetails(TypedDict):
+    type: MessageType
+    mentioned: NotRequired[bool]  # Only present if True
+    user_ids: NotRequired[List[int]]  # Only if type == "private"; excludes own id
+    stream_id: NotRequired[int]  # Only if type == "stream"
+    topic: NotRequired[str]  # Only if type == "stream"
+
+
 class UpdateMessageFlagsEvent(TypedDict):
     type: Literal["update_message_flags"]
     messages: List[int]
@@ -568,6 +576,42 @@ class UpdateMessageFlagsEvent(TypedDict):
     op: MessageFlagStatusChange
     flag: ModifiableMessageFlag
     all: bool
+    # Only present when marking messages unread, keyed by (string) message id
+    message_details: NotRequired[Dict[str, UnreadMessageDetails]]  # New in ZFL 121
+
+
+# -----------------------------------------------------------------------------
+# See https://zulip.com/api/get-events#delete_message
+class DeleteMessageEvent(TypedDict):
+    type: Literal["delete_message"]
+    message_type: MessageType
+    # Without the bulk_message_deletion client capability, one message per event
+    message_id: NotRequired[int]
+    message_ids: NotRequired[List[int]]
+
+
+# -----------------------------------------------------------------------------
+# See https://zulip.com/api/get-events#muted_topics
+# NOTE: Replaced by user_topic events in Zulip 6.0 / ZFL 134
+class MutedTopicsEvent(TypedDict):
+    type: Literal["muted_topics"]
+    # [stream_name, topic], with date_muted appended from Zulip 3.0 / ZFL 1
+    muted_topics: List[List[Any]]
+
+
+# -----------------------------------------------------------------------------
+# See https://zulip.com/api/get-events#user_topic
+# NOTE: New in Zulip 6.0 / ZFL 134
+
+USER_TOPIC_VISIBILITY_MUTED: Final = 1
+
+
+class UserTopicEvent(TypedDict):
+    type: Literal["user_topic"]
+    stream_id: int
+    topic_name: str
+    last_updated: int
+    visibility_policy: int  # 0: none, 1: muted, 2: unmuted, 3: followed
 
 
 # -----------------------------------------------------------------------------
@@ -614,6 +658,9 @@ Event = Union[
     SubscriptionPeerAddRemoveEvent,
     TypingEvent,
     UpdateMessageFlagsEvent,
+    DeleteMessageEvent,
+    MutedTopicsEvent,
+    UserTopicEvent,
     UpdateRealmEmojiEvent,
     UpdateUserSettingsEvent,
     RealmUserEvent,
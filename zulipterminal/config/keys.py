@@ -102,6 +102,11 @@ KEY_BINDINGS: Dict[str, KeyBinding] = {
         'help_text': 'Go to bottom / Last message',
         'key_category': 'navigation',
     },
+    'JUMP_TO_TIME': {
+        'keys': ['D'],
+        'help_text': 'Jump to a date/time in the current narrow',
+        'key_category': 'navigation',
+    },
     'ACTIVATE_BUTTON': {
         'keys': ['enter', ' '],
         'help_text': 'Trigger the selected entry',
@@ -26,7 +26,7 @@ from zulipterminal.config.ui_sizes import (
     MAX_LINEAR_SCALING_WIDTH,
     MIN_SUPPORTED_POPUP_WIDTH,
 )
-from zulipterminal.helper import asynch, suppress_output
+from zulipterminal.helper import CachedMessageList, asynch, suppress_output
 from zulipterminal.model import Model
 from zulipterminal.platform_code import detected_platform
 from zulipterminal.ui import Screen, View
@@ -40,6 +40,7 @@ from zulipterminal.ui_tools.views import (
     FullRawMsgView,
     FullRenderedMsgView,
     HelpView,
+    JumpToTimeView,
     MarkdownHelpView,
     MsgInfoView,
     NoticeView,
@@ -261,6 +262,9 @@ class Controller:
         markdown_view = MarkdownHelpView(self, f"Markdown Help Menu {SCROLL_PROMPT}")
         self.show_pop_up(markdown_view, "area:help")
 
+    def show_jump_to_time(self) -> None:
+        self.show_pop_up(JumpToTimeView(self, "Jump to date/time"), "area:msg")
+
     def show_topic_edit_mode(self, button: Any) -> None:
         self.show_pop_up(EditModeView(self, button), "area:msg")
 
@@ -606,32 +610,62 @@ class Controller:
                 )
 
     def _narrow_to(self, anchor: Optional[int], **narrow: Any) -> None:
+        log = self.view.message_view.log
+        previous_msg_w_list = list(log)
+        previous_narrow = CachedMessageList(
+            (
+                self.model.get_message_ids_in_current_narrow()
+                if previous_msg_w_list
+                else set()
+            ),
+            previous_msg_w_list,
+            log.focus,
+        )
+        previous_narrow_key = repr(self.model.narrow)
         already_narrowed = self.model.set_narrow(**narrow)
 
         if already_narrowed and anchor is None:
             return
 
-        msg_id_list = self.model.get_message_ids_in_current_narrow()
-
-        # If no messages are found in the current narrow
-        # OR, given anchor is not present in msg_id_list
-        # then, get more messages.
-        if len(msg_id_list) == 0 or (anchor is not None and anchor not in msg_id_list):
-            self.model.get_messages(num_before=30, num_after=10, anchor=anchor)
-            msg_id_list = self.model.get_message_ids_in_current_narrow()
+        # Keep the widgets of the previous narrow, in case it is returned to
+        message_list_cache = self.model.message_list_cache
+        message_list_cache.put(previous_narrow_key, previous_narrow)
 
-        w_list = create_msg_box_list(self.model, msg_id_list, focus_msg_id=anchor)
+        msg_id_list = self.model.get_message_ids_in_current_narrow()
 
-        focus_position = self.model.get_focus_in_current_narrow()
+        # Reuse the widgets of a recent narrow, if its messages are unchanged
+        cached = (
+            message_list_cache.pop(repr(self.model.narrow), msg_id_list)
+            if anchor is None
+            else None
+        )
+        if cached is not None:
+            w_list = cached.msg_w_list
+            focus_position: Optional[int] = cached.focus_position
+            self.model.set_focus_in_current_narrow(cached.focus_position)
+        else:
+            # If no messages are found in the current narrow
+            # OR, given anchor is not present in msg_id_list
+            # then, get more messages.
+            if len(msg_id_list) == 0 or (
+                anchor is not None and anchor not in msg_id_list
+            ):
+                self.model.get_messages(num_before=30, num_after=10, anchor=anchor)
+                msg_id_list = self.model.get_message_ids_in_current_narrow()
+
+            w_list = create_msg_box_list(self.model, msg_id_list, focus_msg_id=anchor)
+
+            focus_position = self.model.get_focus_in_current_narrow()
         if focus_position is None:  # No available focus; set to end
             focus_position = len(w_list) - 1
         assert focus_position is not None
 
-        self.view.message_view.log.clear()
-        if 0 <= focus_position < len(w_list):
-            self.view.message_view.log.extend(w_list, focus_position)
-        else:
-            self.view.message_view.log.extend(w_list)
+        if not 0 <= focus_position < len(w_list):
+            focus_position = 0
+        log.splice(0, len(log), w_list, focus_position)
+
+        if self.debug_path is not None:
+            sys.stdout.write(f"Narrow cache: {message_list_cache}\n")
 
     def narrow_to_stream(
         self, *, stream_name: str, contextual_message_id: Optional[int] = None
@@ -680,6 +714,35 @@ class Controller:
         # (nothing currently requires narrowing around a message id)
         self._narrow_to(anchor=None, mentioned=True)
 
+    @asynch
+    def jump_to_time(self, timestamp: int) -> None:
+        msg_id = self.model.find_message_id_at_time(timestamp)
+        if msg_id is None:
+            self.report_error(["No messages to jump to in this narrow"])
+            return
+
+        log = self.view.message_view.log
+        msg_id_list = self.model.get_message_ids_in_current_narrow()
+        if msg_id in msg_id_list:
+            for position, msg_w in enumerate(log):
+                if msg_w.original_widget.message["id"] == msg_id:
+                    log.set_focus(position)
+                    self.update_screen()
+                    return
+        else:
+            # Load only the messages around the time, not every page up to it,
+            # listing them alone since there may be a gap from those loaded
+            self.model.unload_messages_in_current_narrow()
+            self.model.get_messages(num_before=30, num_after=10, anchor=msg_id)
+            msg_id_list = self.model.get_message_ids_in_current_narrow()
+
+        w_list = create_msg_box_list(self.model, msg_id_list, focus_msg_id=msg_id)
+        focus_position = self.model.get_focus_in_current_narrow()
+        if focus_position is None or not 0 <= focus_position < len(w_list):
+            focus_position = 0
+        log.splice(0, len(log), w_list, focus_position)
+        self.update_screen()
+
     def deregister_client(self) -> None:
         queue_id = self.model.queue_id
         self.client.deregister(queue_id, 1.0)
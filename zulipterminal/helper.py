@@ -5,34 +5,43 @@ Helper functions used in multiple places
 import os
 import subprocess
 import time
-from collections import defaultdict
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict, defaultdict
 from contextlib import contextmanager
 from functools import partial, wraps
 from itertools import chain, combinations
 from re import ASCII, MULTILINE, findall, match
 from tempfile import NamedTemporaryFile
-from threading import Thread
+from threading import Lock, Thread
 from typing import (
     Any,
     Callable,
-    DefaultDict,
     Dict,
     FrozenSet,
+    Generic,
+    Hashable,
     Iterable,
     Iterator,
     List,
+    NamedTuple,
     Optional,
     Set,
     Tuple,
     TypeVar,
     Union,
+    cast,
 )
 from urllib.parse import unquote
 
 import requests
 from typing_extensions import Literal, ParamSpec, TypedDict
 
-from zulipterminal.api_types import Composition, EmojiType, Message
+from zulipterminal.api_types import (
+    Composition,
+    EmojiType,
+    Message,
+    UnreadMessageDetails,
+)
 from zulipterminal.config.keys import primary_display_key_for_command
 from zulipterminal.config.regexes import (
     REGEX_COLOR_3_DIGIT,
@@ -98,6 +107,12 @@ class MinimalUserData(TypedDict):
     status: UserStatus
 
 
+class ReactionSummary(TypedDict):
+    emoji_code: str
+    user_ids: List[int]  # In order of reacting
+    mine: bool  # Whether the current user is in user_ids
+
+
 class Index(TypedDict):
     pointer: Dict[str, Optional[int]]  # narrow_str, message_id (or no data)
     # Various sets of downloaded message ids (all, starred, ...)
@@ -112,6 +127,8 @@ class Index(TypedDict):
     edited_messages: Set[int]  # {message_id, ...}
     topics: Dict[int, List[str]]  # {topic names, ...}
     search: Set[int]  # {message_id, ...}
+    # {message_id: {emoji_name: summary, ...}, ...}, built on demand
+    reaction_summaries: Dict[int, Dict[str, ReactionSummary]]
     # Downloaded message data by message id
     messages: Dict[int, Message]
 
@@ -128,6 +145,7 @@ initial_index = Index(
     edited_messages=set(),
     topics=defaultdict(list),
     search=set(),
+    reaction_summaries=dict(),
     # mypy bug: https://github.com/python/mypy/issues/7217
     messages=defaultdict(lambda: Message()),
 )
@@ -165,146 +183,631 @@ def asynch(func: Callable[ParamT, None]) -> Callable[ParamT, None]:
     return wrapper
 
 
-def sort_unread_topics(
-    unread_topics: Dict[Tuple[int, str], int], stream_list: List[int]
-) -> List[Tuple[int, str]]:
-    return sorted(
-        unread_topics.keys(),
-        key=lambda stream_topic: (
-            stream_list.index(stream_topic[0])
-            if stream_topic[0] in stream_list
-            else len(stream_list),
-            stream_topic[1],
-        ),
-    )
+CacheKeyT = TypeVar("CacheKeyT", bound=Hashable)
+CacheValueT = TypeVar("CacheValueT")
 
 
-def _set_count_in_model(
-    new_count: int, changed_messages: List[Message], unread_counts: UnreadCounts
-) -> None:
+class LRUCache(Generic[CacheKeyT, CacheValueT]):
     """
-    This function doesn't explicitly set counts in model,
-    but updates `unread_counts` (which can update the model
-    if it's passed in, but is not tied to it).
+    Thread-safe cache of the most recently used max_size entries, which
+    counts hits and misses to help with tuning
     """
-    # broader unread counts (for all_*) are updated
-    # later conditionally in _set_count_in_view.
-    KeyT = TypeVar("KeyT")
 
-    def update_unreads(unreads: Dict[KeyT, int], key: KeyT) -> None:
-        if key in unreads:
-            unreads[key] += new_count
-            if unreads[key] == 0:
-                unreads.pop(key)
-        elif new_count == 1:
-            unreads[key] = new_count
+    def __init__(self, max_size: int) -> None:
+        assert max_size > 0
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[CacheKeyT, CacheValueT]" = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        # NOTE: Unlike get, this neither counts as a hit/miss nor affects order
+        return key in self._entries
+
+    def get(self, key: CacheKeyT) -> Optional[CacheValueT]:
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: CacheKeyT, value: CacheValueT) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class CachedMessageList(NamedTuple):
+    msg_ids: Set[int]  # Message ids in the narrow (before any were hidden)
+    msg_w_list: List[Any]
+    focus_position: int
+
+
+class MessageListCache:
+    """
+    Thread-safe cache of the message widget lists of the most recently viewed
+    narrows, up to max_narrows narrows and max_messages widgets in total,
+    so that returning to a narrow does not rebuild every message
+    """
 
-    for message in changed_messages:
-        if message["type"] == "stream":
-            stream_id = message["stream_id"]
-            update_unreads(
-                unread_counts["unread_topics"], (stream_id, message["subject"])
+    def __init__(self, max_narrows: int, max_messages: int) -> None:
+        assert max_narrows > 0
+        self.max_narrows = max_narrows
+        self.max_messages = max_messages
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, CachedMessageList]" = OrderedDict()
+        self._messages = 0
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, narrow_key: str) -> CachedMessageList:
+        entry = self._entries.pop(narrow_key)
+        self._messages -= len(entry.msg_w_list)
+        return entry
+
+    def put(self, narrow_key: str, entry: CachedMessageList) -> None:
+        with self._lock:
+            if narrow_key in self._entries:
+                self._remove(narrow_key)
+            if not entry.msg_w_list or len(entry.msg_w_list) > self.max_messages:
+                return
+            self._entries[narrow_key] = entry
+            self._messages += len(entry.msg_w_list)
+            while (
+                len(self._entries) > self.max_narrows
+                or self._messages > self.max_messages
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def pop(self, narrow_key: str, msg_ids: Set[int]) -> Optional[CachedMessageList]:
+        """
+        Removes and returns the entry for the narrow, if its messages are still
+        msg_ids; entries are removed while in use, since their widgets are then
+        updated in place, and the narrow is cached again when it is left
+        """
+        with self._lock:
+            entry = self._remove(narrow_key) if narrow_key in self._entries else None
+            if entry is None or entry.msg_ids != msg_ids:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry
+
+    def discard_messages(self, msg_ids: Iterable[int]) -> None:
+        """
+        Drops the narrows which contain any of these messages, eg. as they
+        have changed and their cached widgets would be stale
+        """
+        with self._lock:
+            msg_ids = set(msg_ids)
+            for narrow_key, entry in list(self._entries.items()):
+                if not msg_ids.isdisjoint(entry.msg_ids):
+                    self._remove(narrow_key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._messages = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{len(self._entries)}/{self.max_narrows} narrows,"
+            f" {self._messages}/{self.max_messages} messages,"
+            f" {self.hits} hits, {self.misses} misses"
+        )
+
+
+class UnreadTopicOrder:
+    """
+    The unread topics to move between, kept sorted by the position of their
+    stream in the left panel and then by topic name, so the next unread topic
+    is found by bisection. Topics in muted streams are retained to be restored
+    upon unmuting, but are not in the order.
+    """
+
+    def __init__(self, stream_ids: List[int], muted_stream_ids: Set[int]) -> None:
+        self._topics: Dict[int, Set[str]] = {}
+        self._muted_stream_ids = set(muted_stream_ids)
+        self._stream_ids: List[int] = []
+        self._positions: Dict[int, int] = {}
+        self._entries: List[Tuple[int, str]] = []  # (stream position, topic)
+        self.set_stream_order(stream_ids)
+
+    def _position(self, stream_id: int) -> int:
+        position = self._positions.get(stream_id)
+        if position is None:
+            # Streams missing from the left panel are ordered after it
+            position = self._positions[stream_id] = len(self._stream_ids)
+            self._stream_ids.append(stream_id)
+        return position
+
+    def set_stream_order(self, stream_ids: List[int]) -> None:
+        self._stream_ids = list(stream_ids)
+        self._positions = {
+            stream_id: position for position, stream_id in enumerate(stream_ids)
+        }
+        self._entries = sorted(
+            (self._position(stream_id), topic)
+            for stream_id, topics in self._topics.items()
+            if stream_id not in self._muted_stream_ids
+            for topic in topics
+        )
+
+    def update(self, stream_id: int, topic: str, is_unread: bool) -> None:
+        topics = self._topics.get(stream_id, set())
+        if (topic in topics) == is_unread:
+            return
+        if is_unread:
+            self._topics.setdefault(stream_id, topics).add(topic)
+        else:
+            topics.remove(topic)
+            if not topics:
+                del self._topics[stream_id]
+
+        if stream_id in self._muted_stream_ids:
+            return
+        entry = (self._position(stream_id), topic)
+        if is_unread:
+            insort(self._entries, entry)
+        else:
+            del self._entries[bisect_left(self._entries, entry)]
+
+    def set_stream_muted(self, stream_id: int, is_muted: bool) -> None:
+        if (stream_id in self._muted_stream_ids) == is_muted:
+            return
+        position = self._position(stream_id)
+        if is_muted:
+            self._muted_stream_ids.add(stream_id)
+            # Topics of a stream are contiguous in the order
+            start = bisect_left(self._entries, (position, ""))
+            end = bisect_left(self._entries, (position + 1, ""))
+            del self._entries[start:end]
+        else:
+            self._muted_stream_ids.remove(stream_id)
+            for topic in self._topics.get(stream_id, ()):
+                insort(self._entries, (position, topic))
+
+    def next_topic(
+        self, current_topic: Optional[Tuple[int, str]]
+    ) -> Optional[Tuple[int, str]]:
+        """
+        Returns the next unread topic in the stream of current_topic, wrapping
+        around to its first unread topic, or otherwise in the following streams
+        """
+        if not self._entries:
+            return None
+        if current_topic is None:
+            position, topic = self._entries[0]
+            return self._stream_ids[position], topic
+
+        stream_id, topic = current_topic
+        current_entry = (self._positions.get(stream_id, len(self._stream_ids)), topic)
+        index = bisect_right(self._entries, current_entry)
+        if index < len(self._entries) and self._entries[index][0] == current_entry[0]:
+            next_entry = self._entries[index]
+        else:
+            # Wrap around to the first unread topic of the current stream, unless
+            # that is the current topic, so then move on to the following streams
+            stream_start = bisect_left(self._entries, (current_entry[0], ""))
+            next_entry = self._entries[stream_start % len(self._entries)]
+            if next_entry[0] != current_entry[0] or next_entry == current_entry:
+                next_entry = self._entries[index % len(self._entries)]
+        if next_entry == current_entry:
+            return None
+        position, topic = next_entry
+        return self._stream_ids[position], topic
+
+
+# Unread messages are grouped by topic (stream_id, topic), the sender of direct
+# messages (sender_id), or the users in group direct messages
+UnreadKey = Union[Tuple[int, str], int, FrozenSet[int]]
+
+
+class UnreadState:
+    """
+    The unread message ids of each topic, direct message sender and group, from
+    which the unread counts are derived as set sizes, so messages can be marked
+    read or unread, moved or deleted repeatedly without the counts drifting.
+    Stream messages are tracked only for subscribed streams, and not counted if
+    in muted topics, or in the overall count if in muted streams.
+    """
+
+    def __init__(self, model: Any, unread_msgs: Dict[str, Any]) -> None:
+        self.model = model
+        self.counts = UnreadCounts(
+            all_msg=0,
+            all_pms=0,
+            all_mentions=0,
+            unread_topics=dict(),
+            unread_pms=dict(),
+            unread_huddles=dict(),
+            streams=dict(),
+        )
+        self._message_keys: Dict[int, UnreadKey] = {}
+        self._message_ids: Dict[UnreadKey, Set[int]] = {}
+        # Unread messages counted for each stream, ie. not in muted topics
+        self._stream_message_ids: Dict[int, Set[int]] = {}
+        # Unread messages for the overall counts
+        self._all_msg_ids: Set[int] = set()
+        self._all_pm_ids: Set[int] = set()
+        self._mention_ids: Set[int] = set(unread_msgs["mentions"])
+        self.topic_order = UnreadTopicOrder(self._stream_order(), model.muted_streams)
+
+        for pm in unread_msgs["pms"]:
+            for message_id in pm["unread_message_ids"]:
+                self._add(message_id, pm["sender_id"])
+        for stream in unread_msgs["streams"]:
+            for message_id in stream["unread_message_ids"]:
+                self._add(message_id, (stream["stream_id"], stream["topic"]))
+        for group_pm in unread_msgs["huddles"]:
+            user_ids = frozenset(map(int, group_pm["user_ids_string"].split(",")))
+            for message_id in group_pm["unread_message_ids"]:
+                self._add(message_id, user_ids)
+        self._update_totals()
+
+    def _stream_order(self) -> List[int]:
+        return [
+            stream["id"]
+            for stream in self.model.pinned_streams + self.model.unpinned_streams
+        ]
+
+    def _add(self, message_id: int, key: UnreadKey, mentioned: bool = False) -> bool:
+        if isinstance(key, tuple):
+            stream_id, topic = key
+            # unsubscribed streams may be in raw unreads, but are not tracked
+            if not self.model.is_user_subscribed_to_stream(stream_id):
+                return False
+        if self._message_keys.get(message_id) == key:
+            return False
+        self._remove(message_id)
+
+        self._message_keys[message_id] = key
+        self._message_ids.setdefault(key, set()).add(message_id)
+        if isinstance(key, tuple):
+            if not self.model.is_muted_topic(stream_id, topic):
+                self._stream_message_ids.setdefault(stream_id, set()).add(message_id)
+                if stream_id not in self.model.muted_streams:
+                    self._all_msg_ids.add(message_id)
+        else:
+            self._all_pm_ids.add(message_id)
+            self._all_msg_ids.add(message_id)
+        if mentioned:
+            self._mention_ids.add(message_id)
+        self._update_count(key)
+        return True
+
+    def _remove(self, message_id: int) -> Optional[UnreadKey]:
+        key = self._message_keys.pop(message_id, None)
+        if key is None:
+            return None
+        message_ids = self._message_ids[key]
+        message_ids.discard(message_id)
+        if not message_ids:
+            del self._message_ids[key]
+        if isinstance(key, tuple):
+            stream_message_ids = self._stream_message_ids.get(key[0], set())
+            stream_message_ids.discard(message_id)
+            if not stream_message_ids:
+                self._stream_message_ids.pop(key[0], None)
+        self._all_msg_ids.discard(message_id)
+        self._all_pm_ids.discard(message_id)
+        self._update_count(key)
+        return key
+
+    def _update_count(self, key: UnreadKey) -> None:
+        count = len(self._message_ids.get(key, ()))
+        if isinstance(key, tuple):
+            stream_id, topic = key
+            if count and not self.model.is_muted_topic(stream_id, topic):
+                self.counts["unread_topics"][key] = count
+            else:
+                self.counts["unread_topics"].pop(key, None)
+            self.topic_order.update(
+                stream_id, topic, key in self.counts["unread_topics"]
             )
-            update_unreads(unread_counts["streams"], stream_id)
+            stream_count = len(self._stream_message_ids.get(stream_id, ()))
+            if stream_count:
+                self.counts["streams"][stream_id] = stream_count
+            else:
+                self.counts["streams"].pop(stream_id, None)
+        elif isinstance(key, int):
+            if count:
+                self.counts["unread_pms"][key] = count
+            else:
+                self.counts["unread_pms"].pop(key, None)
+        else:
+            if count:
+                self.counts["unread_huddles"][key] = count
+            else:
+                self.counts["unread_huddles"].pop(key, None)
+
+    def _update_totals(self) -> None:
+        self.counts["all_msg"] = len(self._all_msg_ids)
+        self.counts["all_pms"] = len(self._all_pm_ids)
+        self.counts["all_mentions"] = len(self._mention_ids)
+
+    def add_message(self, message: Message) -> Optional[UnreadKey]:
+        """
+        Marks a message unread, returning its key if it was not already unread
+        """
+        key: UnreadKey
+        if message["type"] == "stream":
+            key = (message["stream_id"], message["subject"])
         # self-pm has only one display_recipient
         # 1-1 pms have 2 display_recipient
         elif len(message["display_recipient"]) <= 2:
-            update_unreads(unread_counts["unread_pms"], message["sender_id"])
+            key = message["sender_id"]
         else:  # If it's a group pm
-            update_unreads(
-                unread_counts["unread_huddles"],
-                frozenset(
-                    recipient["id"] for recipient in message["display_recipient"]
-                ),
+            key = frozenset(
+                recipient["id"] for recipient in message["display_recipient"]
             )
-
-
-def _set_count_in_view(
-    controller: Any,
-    new_count: int,
-    changed_messages: List[Message],
-    unread_counts: UnreadCounts,
-) -> None:
-    """
-    This function for the most part contains the logic for setting the
-    count in the UI buttons. The later buttons (all_msg, all_pms)
-    additionally set the current count in the model and make use of the
-    same in the UI.
-    """
-    stream_buttons_list = controller.view.stream_w.streams_btn_list
-    is_open_topic_view = controller.view.left_panel.is_in_topic_view
-    if is_open_topic_view:
-        topic_buttons_list = controller.view.topic_w.topics_btn_list
-        toggled_stream_id = controller.view.topic_w.stream_button.stream_id
-    user_buttons_list = controller.view.user_w.users_btn_list
-    all_msg = controller.view.home_button
-    all_pm = controller.view.pm_button
-    all_mentioned = controller.view.mentioned_button
-    for message in changed_messages:
-        user_id = message["sender_id"]
-
-        # If we sent this message, don't increase the count
-        if user_id == controller.model.user_id:
-            continue
-
-        msg_type = message["type"]
-        add_to_counts = True
-        if {"mentioned", "wildcard_mentioned"} & set(message["flags"]):
-            unread_counts["all_mentions"] += new_count
-            all_mentioned.update_count(unread_counts["all_mentions"])
-
-        if msg_type == "stream":
-            stream_id = message["stream_id"]
-            msg_topic = message["subject"]
-            if controller.model.is_muted_stream(stream_id):
-                add_to_counts = False  # if muted, don't add to eg. all_msg
+        mentioned = bool({"mentioned", "wildcard_mentioned"} & set(message["flags"]))
+        added = self._add(message["id"], key, mentioned)
+        self._update_totals()
+        return key if added else None
+
+    def add_message_details(
+        self, message_id: int, details: UnreadMessageDetails
+    ) -> Optional[UnreadKey]:
+        """
+        Marks a message unread from its details in an update_message_flags
+        event, returning its key if it was not already unread
+        """
+        key: UnreadKey
+        if details["type"] == "stream":
+            key = (details["stream_id"], details["topic"])
+        else:
+            user_ids = details["user_ids"]
+            if len(user_ids) == 0:  # self-pm
+                key = self.model.user_id
+            elif len(user_ids) == 1:
+                key = user_ids[0]
             else:
-                for stream_button in stream_buttons_list:
-                    if stream_button.stream_id == stream_id:
-                        stream_button.update_count(stream_button.count + new_count)
-                        break
-            # FIXME: Update unread_counts['unread_topics']?
-            if controller.model.is_muted_topic(stream_id, msg_topic):
-                add_to_counts = False
-            if is_open_topic_view and stream_id == toggled_stream_id:
-                # If topic_view is open for incoming messages's stream,
-                # We update the respective TopicButton count accordingly.
-                for topic_button in topic_buttons_list:
-                    if topic_button.topic_name == msg_topic:
-                        topic_button.update_count(topic_button.count + new_count)
+                key = frozenset(user_ids + [self.model.user_id])
+        added = self._add(message_id, key, details.get("mentioned", False))
+        self._update_totals()
+        return key if added else None
+
+    def remove(self, message_ids: Iterable[int]) -> Set[UnreadKey]:
+        """
+        Marks messages read (or deleted), returning the keys of those which
+        were unread
+        """
+        keys = set()
+        for message_id in message_ids:
+            self._mention_ids.discard(message_id)
+            key = self._remove(message_id)
+            if key is not None:
+                keys.add(key)
+        self._update_totals()
+        return keys
+
+    def move(
+        self, message_ids: Iterable[int], *, stream_id: int, topic: Optional[str]
+    ) -> Set[UnreadKey]:
+        """
+        Moves unread stream messages to stream_id, and to topic unless None,
+        returning the keys of the topics which they were moved from and to
+        """
+        keys: Set[UnreadKey] = set()
+        for message_id in message_ids:
+            key = self._message_keys.get(message_id)
+            if not isinstance(key, tuple):
+                # Either not unread, or unexpectedly not a stream message
+                continue
+            new_key = (stream_id, key[1] if topic is None else topic)
+            self._remove(message_id)
+            keys.add(key)
+            if self._add(message_id, new_key):
+                keys.add(new_key)
+        self._update_totals()
+        return keys
+
+    def update_stream_muting(self, stream_id: int) -> None:
+        """
+        Applies a change in whether a stream is muted to the overall count
+        """
+        message_ids = self._stream_message_ids.get(stream_id, set())
+        if stream_id in self.model.muted_streams:
+            self._all_msg_ids -= message_ids
         else:
-            for user_button in user_buttons_list:
-                if user_button.user_id == user_id:
-                    user_button.update_count(user_button.count + new_count)
-                    break
-            unread_counts["all_pms"] += new_count
-            all_pm.update_count(unread_counts["all_pms"])
-
-        if add_to_counts:
-            unread_counts["all_msg"] += new_count
-            all_msg.update_count(unread_counts["all_msg"])
+            self._all_msg_ids |= message_ids
+        self.topic_order.set_stream_muted(
+            stream_id, stream_id in self.model.muted_streams
+        )
+        self._update_totals()
+
+    def update_stream_order(self) -> None:
+        """
+        Applies a change in the order of streams in the left panel
+        """
+        self.topic_order.set_stream_order(self._stream_order())
+
+    def update_topic_muting(self, stream_id: int, topic: str) -> None:
+        """
+        Applies a change in whether a topic is muted to the counts
+        """
+        key = (stream_id, topic)
+        message_ids = self._message_ids.get(key, set())
+        stream_message_ids = self._stream_message_ids.setdefault(stream_id, set())
+        if self.model.is_muted_topic(stream_id, topic):
+            stream_message_ids -= message_ids
+            self._all_msg_ids -= message_ids
+        else:
+            stream_message_ids |= message_ids
+            if stream_id not in self.model.muted_streams:
+                self._all_msg_ids |= message_ids
+        if not stream_message_ids:
+            del self._stream_message_ids[stream_id]
+        self._update_count(key)
+        self._update_totals()
+
+    def find_inconsistencies(self, unread_msgs: Dict[str, Any]) -> List[str]:
+        """
+        Compares this state with one from the unread_msgs of a fresh register
+        response, returning a description of each difference
+        """
+        fresh = UnreadState(self.model, unread_msgs)
+        inconsistencies = []
+        for message_id in sorted(self._message_keys.keys() | fresh._message_keys):
+            key = self._message_keys.get(message_id)
+            fresh_key = fresh._message_keys.get(message_id)
+            if key != fresh_key:
+                inconsistencies.append(
+                    f"Message {message_id} is unread in {key!r},"
+                    f" but in {fresh_key!r} from the server"
+                )
+        for message_id in sorted(self._mention_ids - fresh._mention_ids):
+            inconsistencies.append(
+                f"Message {message_id} is an unread mention, but not from the server"
+            )
+        for message_id in sorted(fresh._mention_ids - self._mention_ids):
+            inconsistencies.append(
+                f"Message {message_id} is not an unread mention, but is from the server"
+            )
+        counts = cast(Dict[str, Any], self.counts)
+        fresh_counts = cast(Dict[str, Any], fresh.counts)
+        for name, count in counts.items():
+            if count != fresh_counts[name]:
+                inconsistencies.append(
+                    f"Counts {name} are {count!r}, but {fresh_counts[name]!r}"
+                    " from the server"
+                )
+        return inconsistencies
 
 
-def set_count(id_list: List[int], controller: Any, new_count: int) -> None:
-    # This method applies new_count for 'new message' (1) or 'read' (-1)
-    # (we could ensure this in a different way by a different type)
-    assert new_count == 1 or new_count == -1
-    messages = controller.model.index["messages"]
-    unread_counts: UnreadCounts = controller.model.unread_counts
-    changed_messages = [messages[id] for id in id_list]
-    _set_count_in_model(new_count, changed_messages, unread_counts)
+def update_unread_counts_in_view(controller: Any, keys: Iterable[UnreadKey]) -> None:
+    """
+    Sets the counts of the buttons for these unread keys, and of the buttons
+    with overall counts, to the unread counts in the model.
+    Buttons are found through the view's id-keyed registries.
+    """
+    model = controller.model
+    unread_counts: UnreadCounts = model.unread_counts
 
     # if view is not yet loaded. Usually the case when first message is read.
     while not hasattr(controller, "view"):
         time.sleep(0.1)
 
-    _set_count_in_view(controller, new_count, changed_messages, unread_counts)
+    view = controller.view
+    is_open_topic_view = view.left_panel.is_in_topic_view
+    if is_open_topic_view:
+        toggled_stream_id = view.topic_w.stream_button.stream_id
+    stream_ids = set()
+    for key in keys:
+        if isinstance(key, tuple):
+            stream_id, topic = key
+            stream_ids.add(stream_id)
+            if (
+                is_open_topic_view
+                and stream_id == toggled_stream_id
+                and not model.is_muted_topic(stream_id, topic)
+            ):
+                topic_button = view.topic_w.topic_name_to_button.get(topic)
+                if topic_button is not None:
+                    topic_button.update_count(
+                        unread_counts["unread_topics"].get(key, 0)
+                    )
+        elif isinstance(key, int):
+            user_button = view.user_id_to_button.get(key)
+            if user_button is not None:
+                user_button.update_count(unread_counts["unread_pms"].get(key, 0))
+    for stream_id in stream_ids:
+        stream_button = view.stream_id_to_button.get(stream_id)
+        # Muted stream buttons show that they are muted, rather than a count
+        if stream_button is not None and not model.is_muted_stream(stream_id):
+            stream_button.update_count(unread_counts["streams"].get(stream_id, 0))
+
+    for button, count in (
+        (view.mentioned_button, unread_counts["all_mentions"]),
+        (view.pm_button, unread_counts["all_pms"]),
+        (view.home_button, unread_counts["all_msg"]),
+    ):
+        if button.count != count:
+            button.update_count(count)
 
     while not hasattr(controller, "loop"):
         time.sleep(0.1)
     controller.update_screen()
 
 
+def summarize_reactions(
+    reactions: List[Dict[str, Any]],
+    *,
+    my_user_id: int,
+    get_user_id: Callable[[Dict[str, Any]], int],
+) -> Dict[str, ReactionSummary]:
+    """
+    Groups reactions by emoji name, in order of first use of each emoji
+    """
+    summary: Dict[str, ReactionSummary] = dict()
+    for reaction in reactions:
+        add_to_reaction_summary(
+            summary,
+            emoji_name=reaction["emoji_name"],
+            emoji_code=reaction["emoji_code"],
+            user_id=get_user_id(reaction),
+            my_user_id=my_user_id,
+        )
+    return summary
+
+
+def add_to_reaction_summary(
+    summary: Dict[str, ReactionSummary],
+    *,
+    emoji_name: str,
+    emoji_code: str,
+    user_id: int,
+    my_user_id: int,
+) -> None:
+    if emoji_name not in summary:
+        summary[emoji_name] = ReactionSummary(
+            emoji_code=emoji_code, user_ids=[], mine=False
+        )
+    emoji_summary = summary[emoji_name]
+    emoji_summary["user_ids"].append(user_id)
+    if user_id == my_user_id:
+        emoji_summary["mine"] = True
+
+
+def remove_from_reaction_summary(
+    summary: Dict[str, ReactionSummary],
+    *,
+    emoji_code: str,
+    user_id: int,
+    my_user_id: int,
+) -> None:
+    # Reactions are removed by emoji code, matching the server
+    for emoji_name, emoji_summary in summary.items():
+        if (
+            emoji_summary["emoji_code"] == emoji_code
+            and user_id in emoji_summary["user_ids"]
+        ):
+            emoji_summary["user_ids"].remove(user_id)
+            if user_id == my_user_id:
+                emoji_summary["mine"] = False
+            if not emoji_summary["user_ids"]:
+                del summary[emoji_name]
+            return
+
+
 def index_messages(messages: List[Message], model: Any, index: Index) -> Index:
     """
     STRUCTURE OF INDEX
@@ -436,6 +939,8 @@ def index_messages(messages: List[Message], model: Any, index: Index) -> Index:
             index["edited_messages"].add(msg["id"])
 
         index["messages"][msg["id"]] = msg
+        # Reactions may have changed since any summary was built
+        index["reaction_summaries"].pop(msg["id"], None)
         if not narrow:
             index["all_msg_ids"].add(msg["id"])
 
@@ -481,58 +986,6 @@ def index_messages(messages: List[Message], model: Any, index: Index) -> Index:
     return index
 
 
-def classify_unread_counts(model: Any) -> UnreadCounts:
-    # TODO: support group pms
-    unread_msg_counts = model.initial_data["unread_msgs"]
-
-    unread_counts = UnreadCounts(
-        all_msg=0,
-        all_pms=0,
-        all_mentions=0,
-        unread_topics=dict(),
-        unread_pms=dict(),
-        unread_huddles=dict(),
-        streams=defaultdict(int),
-    )
-
-    mentions_count = len(unread_msg_counts["mentions"])
-    unread_counts["all_mentions"] += mentions_count
-
-    for pm in unread_msg_counts["pms"]:
-        count = len(pm["unread_message_ids"])
-        unread_counts["unread_pms"][pm["sender_id"]] = count
-        unread_counts["all_msg"] += count
-        unread_counts["all_pms"] += count
-
-    for stream in unread_msg_counts["streams"]:
-        count = len(stream["unread_message_ids"])
-        stream_id = stream["stream_id"]
-        # unsubscribed streams may be in raw unreads, but are not tracked
-        if not model.is_user_subscribed_to_stream(stream_id):
-            continue
-        if model.is_muted_topic(stream_id, stream["topic"]):
-            continue
-        stream_topic = (stream_id, stream["topic"])
-        unread_counts["unread_topics"][stream_topic] = count
-        if not unread_counts["streams"].get(stream_id):
-            unread_counts["streams"][stream_id] = count
-        else:
-            unread_counts["streams"][stream_id] += count
-        if stream_id not in model.muted_streams:
-            unread_counts["all_msg"] += count
-
-    # store unread count of group pms in `unread_huddles`
-    for group_pm in unread_msg_counts["huddles"]:
-        count = len(group_pm["unread_message_ids"])
-        user_ids = group_pm["user_ids_string"].split(",")
-        user_ids = frozenset(map(int, user_ids))
-        unread_counts["unread_huddles"][user_ids] = count
-        unread_counts["all_msg"] += count
-        unread_counts["all_pms"] += count
-
-    return unread_counts
-
-
 def match_user(user: Any, text: str) -> bool:
     """
     Matches if the user full name, last name or email matches
@@ -585,61 +1038,107 @@ def match_topics(topic_names: List[str], search_text: str) -> List[str]:
     return matching_topics
 
 
-DataT = TypeVar("DataT")
+SearchItemT = TypeVar("SearchItemT")
 
 
-def match_stream(
-    data: List[Tuple[DataT, str]], search_text: str, pinned_streams: List[StreamData]
-) -> Tuple[List[DataT], List[str]]:
+class IncrementalSearch(Generic[SearchItemT]):
     """
-    Returns a list of DataT (streams) and a list of their corresponding names
-    whose words match with the 'text' in the following order:
-    * 1st-word startswith match > 2nd-word startswith match > ... (pinned)
-    * 1st-word startswith match > 2nd-word startswith match > ... (unpinned)
-
-    Note: This function expects `data` to be sorted, in a non-decreasing
-    order, and ordered by their pinning status.
+    Remembers the results of the last search of a list, so that a search for
+    text extending that of the last one need only filter its results, as long
+    as matching is case insensitive and only narrows as the text is extended
     """
-    pinned_stream_names = [stream["name"] for stream in pinned_streams]
 
-    # Assert that the data is sorted, in a non-decreasing order, and ordered by
-    # their pinning status.
-    assert data == sorted(  # noqa: C414 (nested sort)
-        sorted(data, key=lambda data: data[1].lower()),
-        key=lambda data: data[1] in pinned_stream_names,
-        reverse=True,
-    )
+    def __init__(self) -> None:
+        self._items: Optional[List[SearchItemT]] = None
+        self._text = ""
+        self._results: List[SearchItemT] = []
 
-    delimiters = "-_/"
-    trans = str.maketrans(delimiters, len(delimiters) * " ")
-    stream_splits = [
-        ((datum, [stream_name] + stream_name.translate(trans).split()[1:]))
-        for datum, stream_name in data
-    ]
-
-    matches: Dict[str, DefaultDict[int, List[Tuple[DataT, str]]]] = {
-        "pinned": defaultdict(list),
-        "unpinned": defaultdict(list),
-    }
+    def candidates(self, items: List[SearchItemT], text: str) -> List[SearchItemT]:
+        if (
+            self._items is items
+            and self._text
+            and text.lower().startswith(self._text.lower())
+        ):
+            return self._results
+        return items
 
-    for datum, splits in stream_splits:
-        stream_name = splits[0]
-        kind = "pinned" if stream_name in pinned_stream_names else "unpinned"
-        for match_position, word in enumerate(splits):
-            if word.lower().startswith(search_text.lower()):
-                matches[kind][match_position].append((datum, stream_name))
+    def update(
+        self, items: List[SearchItemT], text: str, results: List[SearchItemT]
+    ) -> None:
+        self._items = items
+        self._text = text
+        self._results = results
 
-    ordered_matches = []
-    ordered_names = []
-    for matched_data in matches.values():
-        if not matched_data:
-            continue
-        for match_position in range(max(matched_data.keys()) + 1):
-            for datum, name in matched_data.get(match_position, []):
-                if datum not in ordered_matches:
-                    ordered_matches.append(datum)
-                    ordered_names.append(name)
-    return ordered_matches, ordered_names
+
+class _StreamWord(NamedTuple):
+    word: str  # Lowercase
+    rank: int  # Of the stream, pinned streams first, each sorted by name
+    position: int  # Of the word in the stream name
+
+
+class StreamSearchIndex:
+    """
+    Thread-safe index of the words in subscribed stream names, built when the
+    subscriptions change, to find the streams with a word starting with some
+    text by binary search, rather than by splitting every name on each search
+    """
+
+    DELIMITERS = str.maketrans("-_/", "   ")
+
+    def __init__(
+        self,
+        pinned_streams: Optional[List[StreamData]] = None,
+        unpinned_streams: Optional[List[StreamData]] = None,
+    ) -> None:
+        self._lock = Lock()
+        self.rebuild(pinned_streams or [], unpinned_streams or [])
+
+    @classmethod
+    def words(cls, stream_name: str) -> List[str]:
+        # The whole name matches as the first word, so text with spaces matches
+        return [stream_name] + stream_name.translate(cls.DELIMITERS).split()[1:]
+
+    def rebuild(
+        self, pinned_streams: List[StreamData], unpinned_streams: List[StreamData]
+    ) -> None:
+        names = [stream["name"] for stream in pinned_streams + unpinned_streams]
+        stream_words = sorted(
+            _StreamWord(word.lower(), rank, position)
+            for rank, name in enumerate(names)
+            for position, word in enumerate(self.words(name))
+        )
+        with self._lock:
+            self._names = names
+            self._pinned_count = len(pinned_streams)
+            self._stream_words = stream_words
+            self._words = [stream_word.word for stream_word in stream_words]
+
+    def match(self, search_text: str) -> List[str]:
+        """
+        Returns the names of the streams with a word starting with search_text
+        (case insensitive), in the order:
+        * 1st-word startswith match > 2nd-word startswith match > ... (pinned)
+        * 1st-word startswith match > 2nd-word startswith match > ... (unpinned)
+        with streams matching equally in the order of their names
+        """
+        prefix = search_text.lower()
+        with self._lock:
+            first_positions: Dict[int, int] = {}
+            for index in range(bisect_left(self._words, prefix), len(self._words)):
+                if not self._words[index].startswith(prefix):
+                    break
+                _, rank, position = self._stream_words[index]
+                if position < first_positions.get(rank, position + 1):
+                    first_positions[rank] = position
+            ranks = sorted(
+                first_positions,
+                key=lambda rank: (
+                    rank >= self._pinned_count,
+                    first_positions[rank],
+                    rank,
+                ),
+            )
+            return [self._names[rank] for rank in ranks]
 
 
 def match_group(group_name: str, text: str) -> bool:
@@ -4,11 +4,15 @@ Defines the `Model`, fetching and storing data retrieved from the Zulip server
 
 import itertools
 import json
+import sys
 import time
+from bisect import bisect_left
 from collections import defaultdict
 from concurrent.futures import Future, ThreadPoolExecutor, wait
 from copy import deepcopy
 from datetime import datetime
+from queue import Queue
+from threading import RLock, Thread
 from typing import (
     Any,
     Callable,
@@ -27,7 +31,7 @@ from urllib.parse import urlparse
 
 import zulip
 from bs4 import BeautifulSoup
-from typing_extensions import TypedDict
+from typing_extensions import Literal, TypedDict
 
 from zulipterminal import unicode_emojis
 from zulipterminal.api_types import (
@@ -39,6 +43,7 @@ from zulipterminal.api_types import (
     TYPING_STARTED_EXPIRY_PERIOD,
     TYPING_STARTED_WAIT_PERIOD,
     TYPING_STOPPED_WAIT_PERIOD,
+    USER_TOPIC_VISIBILITY_MUTED,
     Composition,
     CustomFieldValue,
     DirectTypingNotification,
@@ -56,6 +61,7 @@ from zulipterminal.api_types import (
     Subscription,
     SubscriptionSettingChange,
     TypingStatusChange,
+    UnreadMessageDetails,
     UpdateMessageContentEvent,
     UpdateMessagesLocationEvent,
 )
@@ -64,26 +70,61 @@ from zulipterminal.config.symbols import STREAM_TOPIC_SEPARATOR
 from zulipterminal.config.ui_mappings import EDIT_TOPIC_POLICY, ROLE_BY_ID, STATE_ICON
 from zulipterminal.helper import (
     CustomProfileData,
+    LRUCache,
+    MessageListCache,
     MinimalUserData,
     NamedEmojiData,
+    ReactionSummary,
     StreamAccessType,
     StreamData,
+    StreamSearchIndex,
     TidiedUserInfo,
+    UnreadKey,
+    UnreadState,
     UserStatus,
+    add_to_reaction_summary,
     asynch,
     canonicalize_color,
-    classify_unread_counts,
     display_error_if_present,
     index_messages,
     initial_index,
     notify_if_message_sent_outside_narrow,
-    set_count,
-    sort_unread_topics,
+    remove_from_reaction_summary,
+    summarize_reactions,
+    update_unread_counts_in_view,
 )
 from zulipterminal.platform_code import notify
+from zulipterminal.ui_tools.messages import MessageBox, MessageBoxSection
 from zulipterminal.ui_tools.utils import create_msg_box_list
 
 
+# Events received from the server are buffered for the event handler thread.
+# Beyond this many buffered events, the EVENT_QUEUE_POLICY is applied:
+# * "block": stop receiving events until the handler catches up (backpressure)
+# * "warn": keep receiving events, but warn the user that updates are delayed
+EVENT_QUEUE_HIGH_WATER_MARK = 500
+EventQueuePolicy = Literal["block", "warn"]
+EVENT_QUEUE_POLICY: EventQueuePolicy = "block"
+
+# Formatted times are cached, since the same few are requested repeatedly
+# while rendering messages; keys are (timestamp, or minute if seconds are not
+# shown, use 24h format, show seconds, show year)
+FORMATTED_TIME_CACHE_SIZE = 2000
+FormattedTimeKey = Tuple[int, bool, bool, bool]
+
+# The message widgets of recently viewed narrows are kept, so that switching
+# back to one is immediate, limited to this many narrows and messages in total
+NARROW_CACHE_SIZE = 10
+NARROW_CACHE_MAXIMUM_MESSAGES = 5000
+
+# Jumping to a time searches the loaded messages first; if the time lies beyond
+# them, pages of this many messages are requested from the server, at message
+# ids increasingly distant from those loaded, then bisecting between them
+JUMP_TO_TIME_PROBE_SIZE = 50
+JUMP_TO_TIME_INITIAL_ID_STEP = 1000
+JUMP_TO_TIME_MAXIMUM_PROBES = 12
+
+
 class ServerConnectionFailure(Exception):
     pass
 
@@ -114,7 +155,7 @@ class Model:
         self._have_last_message: Dict[str, bool] = {}
         self.stream_id: Optional[int] = None
         self.recipients: FrozenSet[Any] = frozenset()
-        self.index = initial_index
+        self.index = deepcopy(initial_index)
         self.last_unread_pm = None
 
         self.user_id = -1
@@ -153,8 +194,11 @@ class Model:
             "reaction": self._handle_reaction_event,
             "submessage": self._handle_submessage_event,
             "subscription": self._handle_subscription_event,
+            "muted_topics": self._handle_muted_topics_event,
+            "user_topic": self._handle_user_topic_event,
             "typing": self._handle_typing_event,
             "update_message_flags": self._handle_update_message_flags_event,
+            "delete_message": self._handle_delete_message_event,
             "user_settings": self._handle_user_settings_event,
             "realm_emoji": self._handle_update_emoji_event,
             "realm_user": self._handle_realm_user_event,
@@ -162,6 +206,15 @@ class Model:
 
         self.initial_data: Dict[str, Any] = {}
 
+        # Events are received by poll_for_events and applied in order by a single
+        # event handler thread; state_lock serializes that with other writers
+        self.state_lock = RLock()
+        self._event_queue: "Queue[Event]" = Queue(
+            maxsize=EVENT_QUEUE_HIGH_WATER_MARK if EVENT_QUEUE_POLICY == "block" else 0
+        )
+        self.event_queue_peak_depth = 0
+        self._event_queue_above_mark = False
+
         # Register to the queue before initializing further so that we don't
         # lose any updates while messages are being fetched.
         self._fetch_initial_data()
@@ -183,6 +236,7 @@ class Model:
         self.pinned_streams: List[StreamData] = []
         self.unpinned_streams: List[StreamData] = []
         self.visual_notified_streams: Set[int] = set()
+        self.stream_search_index = StreamSearchIndex()
 
         self._subscribe_to_streams(self.initial_data["subscriptions"])
 
@@ -195,23 +249,16 @@ class Model:
 
         self.normalize_and_cache_message_retention_text()
 
-        # NOTE: The expected response has been upgraded from
-        # [stream_name, topic] to [stream_name, topic, date_muted] in
-        # feature level 1, server version 3.0.
-        muted_topics = self.initial_data["muted_topics"]
-        assert set(map(len, muted_topics)) in (set(), {2}, {3})
-        self._muted_topics: Dict[Tuple[str, str], Optional[int]] = {
-            (stream_name, topic): (
-                None if self.server_feature_level == 0 else date_muted[0]
-            )
-            for stream_name, topic, *date_muted in muted_topics
-        }
+        self._muted_topics = self._muted_topics_from_list(
+            self.initial_data["muted_topics"]
+        )
 
         groups = self.initial_data["realm_user_groups"]
         self.user_group_by_id: Dict[int, Dict[str, Any]] = {}
         self.user_group_names = self._group_info_from_realm_user_groups(groups)
 
-        self.unread_counts = classify_unread_counts(self)
+        self.unread_state = UnreadState(self, self.initial_data["unread_msgs"])
+        self.unread_counts = self.unread_state.counts
 
         self._draft: Optional[Composition] = None
 
@@ -244,6 +291,13 @@ class Model:
             ),
         )
 
+        self._formatted_time_cache: LRUCache[FormattedTimeKey, str] = LRUCache(
+            FORMATTED_TIME_CACHE_SIZE
+        )
+        self.message_list_cache = MessageListCache(
+            NARROW_CACHE_SIZE, NARROW_CACHE_MAXIMUM_MESSAGES
+        )
+
         self.new_user_input = True
         self._start_presence_updates()
 
@@ -359,6 +413,10 @@ class Model:
             self.narrow = [item for item in self.narrow if item[0] != "search"]
 
     def get_message_ids_in_current_narrow(self) -> Set[int]:
+        return self._message_ids_in_current_narrow().copy()
+
+    def _message_ids_in_current_narrow(self) -> Set[int]:
+        # NOTE: This is the indexed set itself, rather than a copy
         narrow = self.narrow
         index = self.index
         if narrow == []:
@@ -382,7 +440,17 @@ class Model:
             ids = index["starred_msg_ids"]
         elif narrow[0][1] == "mentioned":
             ids = index["mentioned_msg_ids"]
-        return ids.copy()
+        return ids
+
+    def unload_messages_in_current_narrow(self) -> None:
+        """
+        Forgets which messages are loaded in the current narrow, though leaves
+        them indexed, so that those loaded next are listed alone, eg. since they
+        are not contiguous with those loaded before
+        """
+        with self.state_lock:
+            self._message_ids_in_current_narrow().clear()
+            self._have_last_message.pop(repr(self.narrow), None)
 
     def current_narrow_contains_message(self, message: Message) -> bool:
         """
@@ -480,13 +548,26 @@ class Model:
         display_error_if_present(response, self.controller)
 
     def has_user_reacted_to_message(self, message: Message, *, emoji_code: str) -> bool:
-        for reaction in message["reactions"]:
-            if reaction["emoji_code"] != emoji_code:
-                continue
-            user_id = self.get_user_id_from_reaction(reaction)
-            if user_id == self.user_id:
-                return True
-        return False
+        return any(
+            emoji_summary["mine"]
+            for emoji_summary in self.reaction_summary(message).values()
+            if emoji_summary["emoji_code"] == emoji_code
+        )
+
+    def reaction_summary(self, message: Message) -> Dict[str, ReactionSummary]:
+        """
+        Returns the reactions on a message grouped by emoji name, which is
+        built once per message and then kept up to date by reaction events
+        """
+        summaries = self.index["reaction_summaries"]
+        message_id = message["id"]
+        if message_id not in summaries:
+            summaries[message_id] = summarize_reactions(
+                message["reactions"],
+                my_user_id=self.user_id,
+                get_user_id=self.get_user_id_from_reaction,
+            )
+        return summaries[message_id]
 
     def get_user_id_from_reaction(
         self, reaction: Union[Dict[str, Any], ReactionEvent]
@@ -766,25 +847,114 @@ class Model:
                 self.modernize_message_response(msg) for msg in response["messages"]
             ]
 
-            self.index = index_messages(response["messages"], self, self.index)
-            narrow_str = repr(self.narrow)
-            if first_anchor and response["anchor"] != 10000000000000000:
-                self.index["pointer"][narrow_str] = response["anchor"]
-            if "found_newest" in response:
-                just_found_last_msg = response["found_newest"]
-            else:
-                # Older versions of the server does not contain the
-                # 'found_newest' flag. Instead, we use this logic:
-                query_range = num_after + num_before + 1
-                just_found_last_msg = len(response["messages"]) < query_range
-
-            had_last_msg = self._have_last_message.get(narrow_str, False)
-            self._have_last_message[narrow_str] = had_last_msg or just_found_last_msg
+            with self.state_lock:
+                self.index = index_messages(response["messages"], self, self.index)
+                narrow_str = repr(self.narrow)
+                if first_anchor and response["anchor"] != 10000000000000000:
+                    self.index["pointer"][narrow_str] = response["anchor"]
+                if "found_newest" in response:
+                    just_found_last_msg = response["found_newest"]
+                else:
+                    # Older versions of the server does not contain the
+                    # 'found_newest' flag. Instead, we use this logic:
+                    query_range = num_after + num_before + 1
+                    just_found_last_msg = len(response["messages"]) < query_range
+
+                had_last_msg = self._have_last_message.get(narrow_str, False)
+                self._have_last_message[narrow_str] = (
+                    had_last_msg or just_found_last_msg
+                )
 
+            MessageBox.pre_render(
+                (msg["content"] for msg in response["messages"]), self.server_url
+            )
             return ""
         display_error_if_present(response, self.controller)
         return response["msg"]
 
+    def _get_messages_from_anchor(self, anchor: int) -> Optional[List[Message]]:
+        """
+        Returns the first page of messages in the current narrow from anchor,
+        without indexing them, or None if the request fails
+        """
+        request = {
+            "anchor": anchor,
+            "num_before": 0,
+            "num_after": JUMP_TO_TIME_PROBE_SIZE,
+            "apply_markdown": False,
+            "client_gravatar": True,
+            "narrow": json.dumps(self.narrow),
+        }
+        response = self.client.get_messages(message_filters=request)
+        if response["result"] == "success":
+            return response["messages"]
+        display_error_if_present(response, self.controller)
+        return None
+
+    def find_message_id_at_time(self, timestamp: int) -> Optional[int]:
+        """
+        Returns the id of the first message in the current narrow sent at or
+        after timestamp (or of the latest message, if none were), or None if
+        there are no messages.
+
+        The loaded messages are binary-searched first; only if the time lies
+        beyond them is the server probed, with a bounded number of requests.
+        """
+        messages = self.index["messages"]
+        msg_ids = sorted(self.get_message_ids_in_current_narrow())
+        if not msg_ids:
+            return None
+        position = bisect_left(
+            [messages[msg_id]["timestamp"] for msg_id in msg_ids], timestamp
+        )
+        if 0 < position < len(msg_ids):
+            return msg_ids[position]
+
+        # Messages with ids up to lower were sent before timestamp; the first
+        # message from upper (candidate, if any) was sent at or after it
+        lower: Optional[int] = None
+        upper: Optional[int] = None
+        candidate: Optional[int] = None
+        latest: Optional[int] = None
+        if position == 0:
+            upper = candidate = msg_ids[0]
+        elif self._have_last_message.get(repr(self.narrow), False):
+            return msg_ids[-1]
+        else:
+            lower = latest = msg_ids[-1]
+
+        step = JUMP_TO_TIME_INITIAL_ID_STEP
+        for _ in range(JUMP_TO_TIME_MAXIMUM_PROBES):
+            if lower is None:
+                assert upper is not None
+                if upper == 0:
+                    break
+                anchor = max(upper - step, 0)
+                step *= 2
+            elif upper is None:
+                anchor = lower + step
+                step *= 2
+            elif upper - lower > 1:
+                anchor = (lower + upper) // 2
+            else:
+                break
+
+            page = self._get_messages_from_anchor(anchor)
+            if page is None:
+                break
+            position = bisect_left([msg["timestamp"] for msg in page], timestamp)
+            if position == 0:
+                upper = anchor
+                candidate = page[0]["id"] if page else None
+            elif position < len(page):
+                return page[position]["id"]
+            else:
+                lower = latest = page[-1]["id"]
+                if len(page) < JUMP_TO_TIME_PROBE_SIZE:  # No later messages
+                    return latest
+
+        return candidate if candidate is not None else latest
+
     def _store_content_length_restrictions(self) -> None:
         """
         Stores content length restriction fields for compose box in
@@ -945,6 +1115,20 @@ class Model:
     def is_muted_stream(self, stream_id: int) -> bool:
         return stream_id in self.muted_streams
 
+    def _muted_topics_from_list(
+        self, muted_topics: List[List[Any]]
+    ) -> Dict[Tuple[str, str], Optional[int]]:
+        # NOTE: The expected response has been upgraded from
+        # [stream_name, topic] to [stream_name, topic, date_muted] in
+        # feature level 1, server version 3.0.
+        assert set(map(len, muted_topics)) in (set(), {2}, {3})
+        return {
+            (stream_name, topic): (
+                None if self.server_feature_level == 0 else date_muted[0]
+            )
+            for stream_name, topic, *date_muted in muted_topics
+        }
+
     def is_muted_topic(self, stream_id: int, topic: str) -> bool:
         """
         Returns True if topic is muted via muted_topics.
@@ -978,53 +1162,7 @@ class Model:
                 self.stream_id_from_name(self.narrow[0][1]),
                 self.narrow[1][1],
             )
-        left_panel_stream_list = [
-            stream["id"] for stream in (self.pinned_streams + self.unpinned_streams)
-        ]
-        unread_topics = sort_unread_topics(
-            self.unread_counts["unread_topics"],
-            left_panel_stream_list,
-        )
-        next_topic = False
-        stream_start: Optional[Tuple[int, str]] = None
-        if current_topic is None:
-            next_topic = True
-        elif current_topic not in unread_topics:
-            # insert current_topic in list of unread_topics for the case where
-            # current_topic is not in unread_topics, and the next unmuted topic
-            # is to be returned. This does not modify the original unread topics
-            # data, and is just used to compute the next unmuted topic to be returned.
-            unread_topics = sort_unread_topics(
-                {**self.unread_counts["unread_topics"], current_topic: 0},
-                left_panel_stream_list,
-            )
-        # loop over unread_topics list twice for the case that last_unread_topic was
-        # the last valid unread_topic in unread_topics list.
-        for unread_topic in unread_topics * 2:
-            stream_id, topic_name = unread_topic
-            if not self.is_muted_topic(
-                stream_id, topic_name
-            ) and not self.is_muted_stream(stream_id):
-                if next_topic:
-                    if unread_topic == current_topic:
-                        return None
-                    if (
-                        current_topic is not None
-                        and unread_topic[0] != current_topic[0]
-                        and stream_start != current_topic
-                    ):
-                        return stream_start
-                    return unread_topic
-
-                if (
-                    stream_start is None
-                    and current_topic is not None
-                    and unread_topic[0] == current_topic[0]
-                ):
-                    stream_start = unread_topic
-            if unread_topic == current_topic:
-                next_topic = True
-        return None
+        return self.unread_state.topic_order.next_topic(current_topic)
 
     def get_next_unread_pm(self) -> Optional[int]:
         pms = list(self.unread_counts["unread_pms"].keys())
@@ -1378,6 +1516,7 @@ class Model:
         if new_unpinned_streams:
             self.unpinned_streams.extend(new_unpinned_streams)
             sort_streams(self.unpinned_streams)
+        self.stream_search_index.rebuild(self.pinned_streams, self.unpinned_streams)
 
         self.muted_streams = self.muted_streams.union(new_muted_streams)
         self.visual_notified_streams = self.visual_notified_streams.union(
@@ -1495,27 +1634,40 @@ class Model:
 
                     stream_id = event["stream_id"]
 
-                    # FIXME: Does this always contain the stream_id?
-                    stream_button = self.controller.view.stream_id_to_button[stream_id]
+                    # Buttons are only built once their streams are displayed, and
+                    # then reflect whether the stream is muted
+                    stream_button = self.controller.view.stream_id_to_button.get(
+                        stream_id
+                    )
+
+                    # Messages shown in narrows depend upon muted streams
+                    self.message_list_cache.clear()
 
-                    unread_count = self.unread_counts["streams"][stream_id]
+                    unread_count = self.unread_counts["streams"].get(stream_id, 0)
                     if not event_stream_muted_value:  # Unmuting streams
                         if stream_id in self.muted_streams:
                             self.muted_streams.remove(stream_id)
-                            self.unread_counts["all_msg"] += unread_count
-                            stream_button.mark_unmuted(unread_count)
+                            self.unread_state.update_stream_muting(stream_id)
+                            if stream_button is not None:
+                                stream_button.mark_unmuted(unread_count)
+                            else:
+                                self.controller.view.home_button.update_count(
+                                    self.unread_counts["all_msg"]
+                                )
                     else:  # Muting streams
                         if stream_id not in self.muted_streams:
                             self.muted_streams.add(stream_id)
-                            self.unread_counts["all_msg"] -= unread_count
-                            stream_button.mark_muted()
+                            self.unread_state.update_stream_muting(stream_id)
+                            if stream_button is not None:
+                                stream_button.mark_muted()
+                            else:
+                                self.controller.view.home_button.update_count(
+                                    self.unread_counts["all_msg"]
+                                )
                     self.controller.update_screen()
                 elif event.get("property", None) == "pin_to_top":
                     stream_id = event["stream_id"]
 
-                    # FIXME: Does this always contain the stream_id?
-                    stream_button = self.controller.view.stream_id_to_button[stream_id]
-
                     if event["value"]:
                         stream = get_stream_by_id(self.unpinned_streams, stream_id)
                         if stream:
@@ -1528,6 +1680,10 @@ class Model:
                             self.unpinned_streams.append(stream)
                     sort_streams(self.unpinned_streams)
                     sort_streams(self.pinned_streams)
+                    self.unread_state.update_stream_order()
+                    self.stream_search_index.rebuild(
+                        self.pinned_streams, self.unpinned_streams
+                    )
                     self.controller.view.left_panel.update_stream_view()
                     self.controller.update_screen()
                 elif event.get("property", None) == "desktop_notifications":
@@ -1556,6 +1712,79 @@ class Model:
                         for user_id in user_ids:
                             subscribers.remove(user_id)
 
+    def _handle_muted_topics_event(self, event: Event) -> None:
+        """
+        Handle changes in muted topics, sent as the full list of muted topics
+        """
+        assert event["type"] == "muted_topics"
+
+        muted_topics = self._muted_topics_from_list(event["muted_topics"])
+        toggled_topics = muted_topics.keys() ^ self._muted_topics.keys()
+        self._muted_topics = muted_topics
+        self._update_topics_muting(toggled_topics)
+
+    def _handle_user_topic_event(self, event: Event) -> None:
+        """
+        Handle changes in the visibility policy of a topic (from ZFL 134)
+        """
+        assert event["type"] == "user_topic"
+
+        stream = self.stream_dict.get(event["stream_id"])
+        if stream is None:
+            # Muted topics are tracked by stream name, known only if subscribed
+            return
+        stream_topic = (stream["name"], event["topic_name"])
+        was_muted = stream_topic in self._muted_topics
+        if event["visibility_policy"] == USER_TOPIC_VISIBILITY_MUTED:
+            self._muted_topics[stream_topic] = event["last_updated"]
+        else:
+            self._muted_topics.pop(stream_topic, None)
+
+        # NOTE: Servers may also send a muted_topics event for the same change,
+        # so only changes in whether the topic is muted are applied
+        if was_muted != (stream_topic in self._muted_topics):
+            self._update_topics_muting([stream_topic])
+
+    def _update_topics_muting(self, stream_topics: Iterable[Tuple[str, str]]) -> None:
+        """
+        Applies toggled topic muting to the unread counts and the view,
+        redrawing the screen once for all affected buttons
+        """
+        stream_ids_by_name = {
+            stream["name"]: stream_id for stream_id, stream in self.stream_dict.items()
+        }
+        topic_keys: Set[Tuple[int, str]] = set()
+        for stream_name, topic in stream_topics:
+            stream_id = stream_ids_by_name.get(stream_name)
+            if stream_id is None:  # Unsubscribed streams have no unread counts
+                continue
+            self.unread_state.update_topic_muting(stream_id, topic)
+            topic_keys.add((stream_id, topic))
+
+        if not topic_keys:
+            return
+
+        # Messages shown in narrows depend upon muted topics
+        self.message_list_cache.clear()
+
+        if not hasattr(self.controller, "view"):
+            return
+
+        view = self.controller.view
+        for stream_id, topic in topic_keys:
+            if not view.left_panel.is_in_topic_view_with_stream_id(stream_id):
+                continue
+            topic_button = view.topic_w.topic_name_to_button.get(topic)
+            if topic_button is None:
+                continue
+            if self.is_muted_topic(stream_id, topic):
+                topic_button.mark_muted()
+            else:
+                topic_button.mark_unmuted(
+                    self.unread_counts["unread_topics"].get((stream_id, topic), 0)
+                )
+        update_unread_counts_in_view(self.controller, topic_keys)
+
     def _handle_typing_event(self, event: Event) -> None:
         """
         Handle typing notifications (in private messages)
@@ -1723,10 +1952,11 @@ class Model:
             self.controller.update_screen()
             self._notified_user_of_notification_failure = True
 
-        # Index messages before calling set_count.
         self.index = index_messages([message], self, self.index)
         if "read" not in message["flags"]:
-            set_count([message["id"]], self.controller, 1)
+            unread_key = self.unread_state.add_message(message)
+            if unread_key is not None:
+                update_unread_counts_in_view(self.controller, [unread_key])
 
         if hasattr(self.controller, "view") and self._have_last_message.get(
             repr(self.narrow), False
@@ -1788,7 +2018,20 @@ class Model:
             indexed_message["content"] = content_event["rendered_content"]
             indexed_message["is_me_message"] = content_event["is_me_message"]
             self.index["messages"][message_id] = indexed_message
-            self._update_rendered_view(message_id)
+            self._update_rendered_view(message_id, ["content"])
+
+        # NOTE: This is independent of messages being indexed
+        if "subject" in event or "new_stream_id" in event:
+            location_event = cast(UpdateMessagesLocationEvent, event)
+            unread_keys = self.unread_state.move(
+                location_event["message_ids"],
+                stream_id=location_event.get(
+                    "new_stream_id", location_event["stream_id"]
+                ),
+                topic=location_event.get("subject"),
+            )
+            if unread_keys:
+                update_unread_counts_in_view(self.controller, unread_keys)
 
         # NOTE: This is independent of messages being indexed
         # Previous assertion:
@@ -1852,6 +2095,7 @@ class Model:
                         "emoji_name",
                         "user_id",
                     ]
+                    if key in event
                 }
 
                 # Convert from reaction event schema to message reactions schema
@@ -1865,19 +2109,33 @@ class Model:
                     reactions_entry["user"].pop("user_id", None)
 
                 message["reactions"].append(reactions_entry)
+                if message_id in self.index["reaction_summaries"]:
+                    add_to_reaction_summary(
+                        self.index["reaction_summaries"][message_id],
+                        emoji_name=event["emoji_name"],
+                        emoji_code=event["emoji_code"],
+                        user_id=self.get_user_id_from_reaction(event),
+                        my_user_id=self.user_id,
+                    )
             else:
+                event_user_id = self.get_user_id_from_reaction(event)
                 for reaction in message["reactions"]:
-                    reaction_user_id = self.get_user_id_from_reaction(reaction)
-                    event_user_id = self.get_user_id_from_reaction(event)
                     if (
                         reaction["emoji_code"] == event["emoji_code"]
-                        and reaction_user_id == event_user_id
+                        and self.get_user_id_from_reaction(reaction) == event_user_id
                     ):
                         message["reactions"].remove(reaction)
                         break
+                if message_id in self.index["reaction_summaries"]:
+                    remove_from_reaction_summary(
+                        self.index["reaction_summaries"][message_id],
+                        emoji_code=event["emoji_code"],
+                        user_id=event_user_id,
+                        my_user_id=self.user_id,
+                    )
 
             self.index["messages"][message_id] = message
-            self._update_rendered_view(message_id)
+            self._update_rendered_view(message_id, ["reactions"])
 
     def _handle_submessage_event(self, event: Event) -> None:
         """
@@ -1898,7 +2156,7 @@ class Model:
                 }
             )
             self.index["messages"][message_id] = message
-            self._update_rendered_view(message_id)
+            self._update_rendered_view(message_id, ["content"])
 
     def _handle_update_message_flags_event(self, event: Event) -> None:
         """
@@ -1917,9 +2175,6 @@ class Model:
         if flag_to_change not in {"starred", "read"}:
             return
 
-        if flag_to_change == "read" and operation == "remove":
-            return
-
         indexed_message_ids = set(self.index["messages"])
         message_ids_to_mark = set(event["messages"])
 
@@ -1942,13 +2197,21 @@ class Model:
                 raise RuntimeError(event, msg["flags"])
 
             self.index["messages"][message_id] = msg
-            self._update_rendered_view(message_id)
-
-        if operation == "add" and flag_to_change == "read":
-            set_count(
-                list(message_ids_to_mark & indexed_message_ids), self.controller, -1
+            # The star is in the content header; read status needs no sections
+            self._update_rendered_view(
+                message_id, ["content_header"] if flag_to_change == "starred" else []
             )
 
+        if flag_to_change == "read":
+            # NOTE: Unread state is independent of messages being indexed
+            if operation == "add":
+                unread_keys = self.unread_state.remove(message_ids_to_mark)
+            else:
+                unread_keys = self._mark_unread(
+                    message_ids_to_mark, event.get("message_details", {})
+                )
+            update_unread_counts_in_view(self.controller, unread_keys)
+
         if flag_to_change == "starred" and operation in ["add", "remove"]:
             # update starred count in view
             len_ids = len(message_ids_to_mark)
@@ -1958,11 +2221,61 @@ class Model:
             )
             self.controller.update_screen()
 
+    def _mark_unread(
+        self,
+        message_ids: Set[int],
+        message_details: Dict[str, UnreadMessageDetails],
+    ) -> Set[UnreadKey]:
+        """
+        Marks messages unread from their details in the event (ZFL 121), or if
+        not present, from the messages if indexed; returns the changed keys
+        """
+        unread_keys = set()
+        for message_id in message_ids:
+            if str(message_id) in message_details:
+                unread_key = self.unread_state.add_message_details(
+                    message_id, message_details[str(message_id)]
+                )
+            elif message_id in self.index["messages"]:
+                unread_key = self.unread_state.add_message(
+                    self.index["messages"][message_id]
+                )
+            else:
+                continue
+            if unread_key is not None:
+                unread_keys.add(unread_key)
+        return unread_keys
+
+    def _handle_delete_message_event(self, event: Event) -> None:
+        """
+        Handle deleted messages, which are no longer unread
+        """
+        assert event["type"] == "delete_message"
+        # FIXME: Deleted messages remain indexed and displayed
+        if "message_ids" in event:
+            message_ids = event["message_ids"]
+        else:
+            message_ids = [event["message_id"]]
+        unread_keys = self.unread_state.remove(message_ids)
+        if unread_keys:
+            update_unread_counts_in_view(self.controller, unread_keys)
+
     def formatted_local_time(
         self, timestamp: int, *, show_seconds: bool, show_year: bool = False
     ) -> str:
+        use_24h_format = self._user_settings["twenty_four_hour_time"]
+        # NOTE: This assumes local timezones are offset from UTC by whole minutes
+        key = (
+            timestamp if show_seconds else timestamp // 60,
+            use_24h_format,
+            show_seconds,
+            show_year,
+        )
+        formatted_time = self._formatted_time_cache.get(key)
+        if formatted_time is not None:
+            return formatted_time
+
         local_time = datetime.fromtimestamp(timestamp)
-        use_24h_format = self.user_settings()["twenty_four_hour_time"]
         format_codes = (
             "%a %b %d "
             f"{'%Y ' if show_year else ''}"
@@ -1971,7 +2284,9 @@ class Model:
             f"{':%S' if show_seconds else ''}"
             f"{'' if use_24h_format else ' %p'}"
         )
-        return local_time.strftime(format_codes)
+        formatted_time = local_time.strftime(format_codes)
+        self._formatted_time_cache.put(key, formatted_time)
+        return formatted_time
 
     def _handle_update_emoji_event(self, event: Event) -> None:
         """
@@ -1985,10 +2300,16 @@ class Model:
             event["realm_emoji"]
         )
 
-    def _update_rendered_view(self, msg_id: int) -> None:
+    def _update_rendered_view(
+        self, msg_id: int, sections: Optional[List[MessageBoxSection]] = None
+    ) -> None:
         """
         Helper method called by various _handle_* methods
+        Rebuilds the message, or only the specified sections if they are enough
         """
+        # Widgets of the message in other narrows are rebuilt if returned to
+        self.message_list_cache.discard_messages([msg_id])
+
         # Update new content in the rendered view
         view = self.controller.view
         for msg_w in view.message_view.log:
@@ -2018,6 +2339,11 @@ class Model:
                     self.controller.update_screen()
                     return
 
+                if sections is not None:
+                    self._update_rendered_sections(msg_w, sections)
+                    self.controller.update_screen()
+                    return
+
                 msg_w_list = create_msg_box_list(
                     self, [msg_id], last_message=msg_box.last_message
                 )
@@ -2041,6 +2367,25 @@ class Model:
                     self.controller.update_screen()
                     return
 
+    def _update_rendered_sections(
+        self, msg_w: Any, sections: List[MessageBoxSection]
+    ) -> None:
+        log = self.controller.view.message_view.log
+        msg_box = msg_w.original_widget
+        msg_box.message = self.index["messages"][msg_box.message["id"]]
+        msg_box.update_sections(sections)
+        # As in create_msg_box_list, for a change in read status
+        unread = "read" not in msg_box.message["flags"]
+        msg_w.set_attr_map({None: "unread" if unread else None})
+        msg_pos = log.index(msg_w)
+        self.controller.view.message_view.unread_frontier.set_unread(msg_pos, unread)
+
+        # The content header of the next message depends upon this message
+        if "content_header" in sections and len(log) != (msg_pos + 1):
+            next_msg_box = log[msg_pos + 1].original_widget
+            next_msg_box.last_message = msg_box.message
+            next_msg_box.update_sections(["content_header"])
+
     def _handle_user_settings_event(self, event: Event) -> None:
         """
         Event when user settings have changed - from ZFL 89, v5.0
@@ -2052,22 +2397,19 @@ class Model:
         # Update the setting (property) to the value, but only if already initialized
         if event["property"] in self._user_settings:
             setting = event["property"]
+            self._user_settings[setting] = event["value"]
             if setting == "twenty_four_hour_time":
+                self._formatted_time_cache.clear()
+                self.message_list_cache.clear()
                 self._update_display()
-            self._user_settings[setting] = event["value"]
 
     def _update_display(self) -> None:
         """
-        Handle change to user display setting (Eg: Time format)
+        Handle change to user display setting (Eg: Time format), updating only
+        the times in the headers of the displayed messages
         """
-        view = self.controller.view
-        for msg_w in view.message_view.log:
-            msg_box = msg_w.original_widget
-            msg_id = msg_box.message["id"]
-            last_msg = msg_box.last_message
-            msg_pos = view.message_view.log.index(msg_w)
-            msg_w_list = create_msg_box_list(self, [msg_id], last_message=last_msg)
-            view.message_view.log[msg_pos] = msg_w_list[0]
+        for msg_w in self.controller.view.message_view.log:
+            msg_w.original_widget.update_header_time()
         self.controller.update_screen()
 
     def _handle_realm_user_event(self, event: Event) -> None:
@@ -2126,8 +2468,59 @@ class Model:
             return ""
         return response["msg"]
 
+    def event_queue_depth(self) -> int:
+        """
+        Returns the number of received events not yet handled.
+        """
+        return self._event_queue.qsize()
+
+    def _enqueue_event(self, event: Event) -> None:
+        """
+        Passes a received event to the event handler thread, applying
+        EVENT_QUEUE_POLICY once the queue reaches EVENT_QUEUE_HIGH_WATER_MARK.
+        """
+        # With the "block" policy the queue is bounded, so this waits for space
+        self._event_queue.put(event)
+
+        depth = self.event_queue_depth()
+        self.event_queue_peak_depth = max(self.event_queue_peak_depth, depth)
+        if depth < EVENT_QUEUE_HIGH_WATER_MARK:
+            self._event_queue_above_mark = False
+        elif not self._event_queue_above_mark:
+            self._event_queue_above_mark = True
+            if EVENT_QUEUE_POLICY == "warn" and hasattr(self.controller, "view"):
+                self.controller.report_warning(
+                    ["Updates from the server are delayed; catching up..."]
+                )
+
+    def _handle_event(self, event: Event) -> None:
+        """
+        Applies a single event to the model, holding state_lock throughout.
+        """
+        with self.state_lock:
+            try:
+                self.event_actions[event["type"]](event)
+            except Exception:
+                self.controller.raise_exception_in_main_thread(
+                    sys.exc_info(), critical=False
+                )
+
+    def _handle_queued_events(self) -> None:
+        """
+        Event handler thread: applies events in the order they were received.
+        """
+        while True:
+            event = self._event_queue.get()
+            self._handle_event(event)
+            self._event_queue.task_done()
+
     @asynch
     def poll_for_events(self) -> None:
+        # A slow event handler would otherwise delay the next poll, at the risk
+        # of the server garbage-collecting our event queue
+        handler = Thread(target=self._handle_queued_events, daemon=True)
+        handler.start()
+
         reregister_timeout = 10
         queue_id = self.queue_id
         last_event_id = self.last_event_id
@@ -2162,11 +2555,4 @@ class Model:
             for event in response["events"]:
                 last_event_id = max(last_event_id, int(event["id"]))
                 if event["type"] in self.event_actions:
-                    try:
-                        self.event_actions[event["type"]](event)
-                    except Exception:
-                        import sys
-
-                        self.controller.raise_exception_in_main_thread(
-                            sys.exc_info(), critical=False
-                        )
+                    self._enqueue_event(event)
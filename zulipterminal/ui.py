@@ -318,6 +318,9 @@ class View(urwid.WidgetWrap):
                     ["No draft message was saved in this session."]
                 )
             return key
+        elif is_command_key("JUMP_TO_TIME", key):
+            self.controller.show_jump_to_time()
+            return key
         elif is_command_key("ABOUT", key):
             self.controller.show_about()
             return key
@@ -1,5 +1,5 @@
 """
-UI boxes for entering text: WriteBox, MessageSearchBox, PanelSearchBox
+UI boxes for entering text: WriteBox, MessageSearchBox, JumpToTimeBox, PanelSearchBox
 """
 
 import re
@@ -13,6 +13,7 @@ from tempfile import NamedTemporaryFile
 from time import sleep
 from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
+import dateutil.parser
 import urwid
 from typing_extensions import Final, Literal
 from urwid_readline import ReadlineEdit
@@ -44,7 +45,6 @@ from zulipterminal.helper import (
     format_string,
     match_emoji,
     match_group,
-    match_stream,
     match_topics,
     match_user,
     match_user_name_and_email,
@@ -57,6 +57,10 @@ from zulipterminal.urwid_types import urwid_Size
 # in the compose box that does not trigger a confirmation popup.
 MAX_MESSAGE_LENGTH_CONFIRMATION_POPUP: Final = 15
 
+# Panel searches run only once typing in their search box has paused for this
+# long, in seconds
+PANEL_SEARCH_DEBOUNCE_DELAY: Final = 0.1
+
 
 class _MessageEditState(NamedTuple):
     message_id: int
@@ -465,17 +469,10 @@ class WriteBox(urwid.Pile):
     def _stream_box_autocomplete(
         self, text: str, state: Optional[int]
     ) -> Optional[str]:
-        streams_list = self.view.pinned_streams + self.view.unpinned_streams
-        streams = [stream["name"] for stream in streams_list]
-
-        # match_streams takes stream names and typeaheads,
-        # but we don't have typeaheads here.
-        # FIXME: Refactor match_stream
-        stream_data = list(zip(streams, streams))
-        matched_streams = match_stream(stream_data, text, self.view.pinned_streams)
+        matched_streams = self.model.stream_search_index.match(text)
 
-        # matched_streams[0] and matched_streams[1] contains the same data.
-        return self._process_typeaheads(matched_streams[0], state, matched_streams[1])
+        # Typeaheads and suggestions are the same.
+        return self._process_typeaheads(matched_streams, state, matched_streams)
 
     def generic_autocomplete(self, text: str, state: Optional[int]) -> Optional[str]:
         autocomplete_map = {
@@ -619,16 +616,9 @@ class WriteBox(urwid.Pile):
     def autocomplete_streams(
         self, text: str, prefix_string: str
     ) -> Tuple[List[str], List[str]]:
-        streams_list = self.view.pinned_streams + self.view.unpinned_streams
-        streams = [stream["name"] for stream in streams_list]
-        stream_typeahead = format_string(streams, "#**{}**")
-        stream_data = list(zip(stream_typeahead, streams))
-
         prefix_length = len(prefix_string)
 
-        _, matched_streams = match_stream(
-            stream_data, text[prefix_length:], self.view.pinned_streams
-        )
+        matched_streams = self.model.stream_search_index.match(text[prefix_length:])
 
         muted_streams = [
             self.model.stream_dict[stream_id]["name"]
@@ -1046,6 +1036,38 @@ class MessageSearchBox(urwid.Pile):
         return key
 
 
+class JumpToTimeBox(ReadlineEdit):
+    """
+    Box to enter a date/time to jump to, in the current narrow
+    """
+
+    def __init__(self, controller: Any) -> None:
+        self.controller = controller
+        super().__init__(caption=" Date/time: ", edit_text="")
+
+    def keypress(self, size: urwid_Size, key: str) -> Optional[str]:
+        if is_command_key("CLEAR_SEARCH", key):
+            self.controller.exit_editor_mode()
+            self.controller.exit_popup()
+            return key
+
+        elif is_command_key("EXECUTE_SEARCH", key):
+            try:
+                jump_time = dateutil.parser.parse(self.edit_text)
+            except (ValueError, OverflowError):
+                self.controller.report_error(
+                    [f"Unable to understand date/time '{self.edit_text}'"]
+                )
+                return key
+            self.controller.exit_editor_mode()
+            self.controller.exit_popup()
+            # Times without a timezone are taken to be local
+            self.controller.jump_to_time(int(jump_time.timestamp()))
+            return key
+
+        return super().keypress(size, key)
+
+
 class PanelSearchBox(ReadlineEdit):
     """
     Search Box to search panel views in real-time.
@@ -1062,12 +1084,44 @@ class PanelSearchBox(ReadlineEdit):
         self.search_error = urwid.AttrMap(
             urwid.Text([" ", INVALID_MARKER, " No Results"]), "search_error"
         )
-        urwid.connect_signal(self, "change", update_function)
+        self.update_function = update_function
+        # Incremented on each change of the text, so that a search which has
+        # been superseded can stop early and drop its results
+        self.search_generation = 0
+        self._search_alarm: Optional[Any] = None
+        urwid.connect_signal(self, "change", self._schedule_search)
         super().__init__(caption=self.search_text, edit_text="")
 
+    def _schedule_search(self, search_box: Any, new_text: str) -> None:
+        """
+        Searches once typing has paused, so a burst of keypresses results in
+        one search of the panel, rather than one per keypress
+        """
+        if new_text == self.edit_text:
+            return
+        self.search_generation += 1
+        loop = self.panel_view.view.controller.loop
+        if self._search_alarm is not None:
+            loop.remove_alarm(self._search_alarm)
+        self._search_alarm = loop.set_alarm_in(
+            PANEL_SEARCH_DEBOUNCE_DELAY, self._run_search
+        )
+
+    def _run_search(self, *args: Any) -> None:
+        self._search_alarm = None
+        self.update_function(self, self.edit_text)
+
+    def _cancel_pending_search(self) -> None:
+        if self._search_alarm is not None:
+            self.panel_view.view.controller.loop.remove_alarm(self._search_alarm)
+            self._search_alarm = None
+
     def reset_search_text(self) -> None:
         self.set_caption(self.search_text)
         self.set_edit_text("")
+        # The panel is restored directly, so drop any pending or running search
+        self._cancel_pending_search()
+        self.search_generation += 1
 
     def valid_char(self, ch: str) -> bool:
         # This method 'strips' leading space *before* entering it in the box
@@ -1093,10 +1147,16 @@ class PanelSearchBox(ReadlineEdit):
             # Don't call 'Esc' when inside a popup search-box.
             if not self.panel_view.view.controller.is_any_popup_open():
                 self.panel_view.keypress(size, primary_key_for_command("CLEAR_SEARCH"))
-        elif is_command_key("EXECUTE_SEARCH", key) and not self.panel_view.empty_search:
-            self.panel_view.view.controller.exit_editor_mode()
-            self.set_caption([("filter_results", " Search Results "), " "])
-            self.panel_view.set_focus("body")
-            if hasattr(self.panel_view, "log"):
-                self.panel_view.body.set_focus(0)
+        elif is_command_key("EXECUTE_SEARCH", key):
+            if self._search_alarm is not None:
+                # Search for the text as entered, rather than waiting for typing
+                # to pause, before moving to the results
+                self._cancel_pending_search()
+                self._run_search()
+            if not self.panel_view.empty_search:
+                self.panel_view.view.controller.exit_editor_mode()
+                self.set_caption([("filter_results", " Search Results "), " "])
+                self.panel_view.set_focus("body")
+                if hasattr(self.panel_view, "log"):
+                    self.panel_view.body.set_focus(0)
         return super().keypress(size, key)
@@ -210,28 +210,7 @@ class StreamButton(TopButton):
         self.count = count
         self.view = view
 
-        # FIXME: This section should be moved to a general palette-extension method
-        # which is triggered when streams are initially loaded and when colors are
-        # adjusted, or new streams added
-        for entry in view.palette:
-            if entry[0] is None:
-                # NOTE: entry is generated at runtime, so length is dynamic
-                # entry[5] is 256-color background entry
-                # entry[2] is 16-color background entry
-                background = entry[5] if len(entry) > 4 else entry[2]
-                inverse_text = "black" if background in ["default", ""] else background
-                break
-        # These tuples represent (new) Urwid palette entries for the stream color:
-        #   (style_name, 16-color fg, 16-color bg, mono, 256+color fg, 256+color bg)
-        # The normalized color becomes a named style (eg. "#abc") for colored foreground
-        view.palette.append(
-            (f"{self.color}", "", "", "bold", f"{self.color}, bold", background)
-        )
-        # The s-prefixed style name (eg "s#abc") is used for inverted styling
-        view.palette.append(
-            (f"s{self.color}", "", "", "standout", inverse_text, self.color)
-        )
-
+        # The stream color is added to the palette by StreamsView, up front
         stream_marker = STREAM_ACCESS_TYPE[stream_access_type]["icon"]
 
         narrow_function = partial(
@@ -251,6 +230,25 @@ class StreamButton(TopButton):
         if self.model.is_muted_stream(self.stream_id):
             self.mark_muted()
 
+    @staticmethod
+    def add_color_to_palette(palette: List[Any], color: str) -> None:
+        # FIXME: This should be part of a general palette-extension method
+        # which is triggered when colors are adjusted, or new streams added
+        for entry in palette:
+            if entry[0] is None:
+                # NOTE: entry is generated at runtime, so length is dynamic
+                # entry[5] is 256-color background entry
+                # entry[2] is 16-color background entry
+                background = entry[5] if len(entry) > 4 else entry[2]
+                inverse_text = "black" if background in ["default", ""] else background
+                break
+        # These tuples represent (new) Urwid palette entries for the stream color:
+        #   (style_name, 16-color fg, 16-color bg, mono, 256+color fg, 256+color bg)
+        # The normalized color becomes a named style (eg. "#abc") for colored foreground
+        palette.append((f"{color}", "", "", "bold", f"{color}, bold", background))
+        # The s-prefixed style name (eg "s#abc") is used for inverted styling
+        palette.append((f"s{color}", "", "", "standout", inverse_text, color))
+
     def mark_muted(self) -> None:
         self.prefix_style = "muted"
         self.label_style = "muted"
@@ -312,6 +310,11 @@ class UserButton(TopButton):
             self.suffix_text = "(you)"
             self.update_widget()
 
+    def update_status(self, *, state_marker: str, color: Optional[str]) -> None:
+        self._prefix_markup = (color, state_marker)
+        self.label_style = color
+        self.update_widget()
+
     def _narrow_with_compose(self) -> None:
         # Switches directly to composing with user
         # FIXME should we just narrow?
@@ -374,7 +377,10 @@ class TopicButton(TopButton):
         self.suffix_text = MUTE_MARKER
         self.update_widget()
 
-    # TODO: Handle event-based approach for topic-muting.
+    def mark_unmuted(self, unread_count: int) -> None:
+        self.label_style = None
+        self.suffix_style = "unread_count"
+        self.update_count(unread_count)
 
     def keypress(self, size: urwid_Size, key: str) -> Optional[str]:
         if is_command_key("TOGGLE_TOPIC", key):
@@ -2,17 +2,42 @@
 UI to render a Zulip message for display, and respond contextually to actions
 """
 
+import hashlib
+import multiprocessing
+import os
 import typing
-from collections import defaultdict
-from datetime import date, datetime
-from time import time
-from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+from collections import OrderedDict, defaultdict
+from concurrent.futures import (
+    BrokenExecutor,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from contextlib import suppress
+from datetime import date
+from functools import partial
+from threading import Lock
+from time import localtime, time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 from urllib.parse import urljoin, urlparse
 
 import dateutil.parser
 import urwid
 from bs4 import BeautifulSoup
 from bs4.element import NavigableString, Tag
+from lxml import etree
+from typing_extensions import Literal
 from tzlocal import get_localzone
 
 from zulipterminal.api_types import Message
@@ -29,9 +54,9 @@ from zulipterminal.config.symbols import (
     TIME_MENTION_MARKER,
 )
 from zulipterminal.config.ui_mappings import STATE_ICON, STREAM_ACCESS_TYPE
-from zulipterminal.helper import get_unused_fence
+from zulipterminal.helper import LRUCache, ReactionSummary, get_unused_fence
 from zulipterminal.server_url import near_message_url
-from zulipterminal.ui_tools.tables import render_table
+from zulipterminal.ui_tools.tables import TableCells, render_table, render_table_cells
 from zulipterminal.urwid_types import urwid_MarkupTuple, urwid_Size
 from zulipterminal.widget import (
     find_widget_type,
@@ -46,17 +71,219 @@ if typing.TYPE_CHECKING:
 # Usernames to show before just showing reaction counts
 MAXIMUM_USERNAMES_VISIBLE = 3
 
+UNRENDERED_TAGS = {  # In pairs of 'tag_name': 'text'
+    # TODO: Some of these could be implemented
+    "br": "",  # No indicator of absence
+    "hr": "RULER",
+    "img": "IMAGE",
+}
+UNRENDERED_DIV_CLASSES = {  # In pairs of 'div_class': 'text'
+    # TODO: Support embedded content & twitter preview?
+    "message_embed": "EMBEDDED CONTENT",
+    "inline-preview-twitter": "TWITTER PREVIEW",
+    "message_inline_ref": "",  # Duplicate of other content
+    "message_inline_image": "",  # Duplicate of other content
+}
+UNRENDERED_TEMPLATE = "[{} NOT RENDERED]"
+
+# Converting message HTML dominates the cost of building a MessageBox, which is
+# rebuilt on every star, reaction or neighboring update, so results are cached.
+# The key is (content, server_url, fold_long_blocks), since these fully
+# determine the result.
+# NOTE: Cached results are shared, so must not be modified
+TRANSFORMED_CONTENT_CACHE_SIZE = 1000
+# Code blocks (eg. pasted logs) can be large and recur across messages, quotes
+# and edits, so tree2markup also caches their markup, keyed by a hash of their
+# HTML; as markup refers to styles by name, this is independent of the theme
+CODE_BLOCK_CACHE_SIZE = 500
+# Code blocks longer than this are folded to this many lines in the message
+# list, so huge pastes are quick to display; they are shown in full in the
+# full rendered message view (None disables folding)
+MAXIMUM_CODE_BLOCK_LINES: Optional[int] = 40
+FOLDED_CODE_BLOCK_TEMPLATE = "[{} MORE LINES NOT SHOWN]"
+# Similarly, tables are folded to this many body rows (None disables folding);
+# only the cells of the rows shown are extracted or measured
+MAXIMUM_TABLE_ROWS: Optional[int] = 100
+# Message HTML is converted by walking a BeautifulSoup tree (soup2markup), or
+# an equivalent but faster walk of an lxml tree (tree2markup)
+HTML_CONVERTER: Literal["soup", "lxml"] = "soup"
+# Used by tree2markup to match how BeautifulSoup stores whitespace
+ASCII_WHITESPACE = " \n\t\f\r"
+WHITESPACE_PRESERVING_TAGS = ("pre", "textarea")
+TransformedContent = Tuple[
+    Tuple[None, Any],
+    Dict[str, Tuple[str, int, bool]],
+    List[Tuple[str, str]],
+]
+CodeBlockMarkup = List[Tuple[str, str]]
+transformed_content_cache: LRUCache[
+    Tuple[str, str, bool], TransformedContent
+] = LRUCache(TRANSFORMED_CONTENT_CACHE_SIZE)
+code_block_cache: LRUCache[str, CodeBlockMarkup] = LRUCache(CODE_BLOCK_CACHE_SIZE)
+
+# Fetched batches of messages are converted in the background by pre_render,
+# using a pool of worker processes to sidestep the GIL, or of threads if
+# processes are unavailable; smaller batches are left until displayed, as are
+# all batches if there is only one CPU, since a pool would then only add work
+PRE_RENDER_POOL: Literal["process", "thread"] = "process"
+PRE_RENDER_WORKERS = min(4, os.cpu_count() or 1)
+PRE_RENDER_MINIMUM_BATCH = 4
+_pre_render_executors: Dict[str, Executor] = {}  # Keyed by PRE_RENDER_POOL value
+_pre_render_executors_lock = Lock()
+
+
+def _convert_content(
+    content: str, server_url: str, converter: str, fold_long_blocks: bool
+) -> TransformedContent:
+    # NOTE: This runs in pre-render worker processes, so must remain picklable
+    if converter == "lxml":
+        return MessageBox._transform_content_with_lxml(
+            content, server_url, fold_long_blocks
+        )
+    return MessageBox._transform_content(content, server_url, fold_long_blocks)
+
+
+def _get_pre_render_executor(pool: str) -> Executor:
+    with _pre_render_executors_lock:
+        executor = _pre_render_executors.get(pool)
+        if executor is None and pool == "process":
+            # eg. ImportError if this platform has no working semaphores
+            with suppress(ImportError, NotImplementedError, OSError):
+                # Workers are spawned rather than forked, since forking a
+                # process which is running other threads is unsafe
+                executor = ProcessPoolExecutor(
+                    PRE_RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+        if executor is None:
+            executor = _pre_render_executors.get("thread") or ThreadPoolExecutor(
+                PRE_RENDER_WORKERS, thread_name_prefix="pre-render"
+            )
+            _pre_render_executors["thread"] = executor
+        _pre_render_executors[pool] = executor
+        return executor
+
+
+def _replace_broken_pre_render_executor(broken: Executor) -> Executor:
+    broken.shutdown(wait=False)
+    executor = _get_pre_render_executor("thread")
+    with _pre_render_executors_lock:
+        for pool, pool_executor in _pre_render_executors.items():
+            if pool_executor is broken:
+                _pre_render_executors[pool] = executor
+    return executor
+
+
+def _convert_contents(
+    contents: List[str], server_url: str, converter: str
+) -> List[TransformedContent]:
+    # NOTE: This runs in pre-render worker processes, so must remain picklable
+    return [
+        # Folded, as for MessageBoxes in the message list
+        _convert_content(content, server_url, converter, True)
+        for content in contents
+    ]
+
+
+def _submit_pre_render(
+    contents: List[str], server_url: str
+) -> "Future[List[TransformedContent]]":
+    executor = _get_pre_render_executor(PRE_RENDER_POOL)
+    try:
+        future = executor.submit(
+            _convert_contents, contents, server_url, HTML_CONVERTER
+        )
+    except BrokenExecutor:
+        # Worker processes could not be started or died; use threads instead
+        executor = _replace_broken_pre_render_executor(executor)
+        future = executor.submit(
+            _convert_contents, contents, server_url, HTML_CONVERTER
+        )
+    future.add_done_callback(
+        partial(_store_pre_rendered, executor, contents, server_url)
+    )
+    return future
+
+
+def _store_pre_rendered(
+    executor: Executor,
+    contents: List[str],
+    server_url: str,
+    future: "Future[List[TransformedContent]]",
+) -> None:
+    error = future.exception()
+    if isinstance(error, BrokenExecutor):
+        _replace_broken_pre_render_executor(executor)
+        _submit_pre_render(contents, server_url)
+        return
+    if error is not None:
+        # Left to be converted (and the error raised) when displayed
+        return
+    for content, transformed in zip(contents, future.result()):
+        transformed_content_cache.put((content, server_url, True), transformed)
+
+
+# A MessageBox is built from these sections (in this order), which can each be
+# rebuilt independently when the message changes, eg. upon a new reaction
+MessageBoxSection = Literal[
+    "recipient_header", "content_header", "content", "footlinks", "reactions"
+]
+MESSAGE_BOX_SECTIONS: Tuple[MessageBoxSection, ...] = (
+    "recipient_header",
+    "content_header",
+    "content",
+    "footlinks",
+    "reactions",
+)
+
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class LocalTime(NamedTuple):
+    seconds: int  # Since the epoch, but shifted into the local timezone
+    year: int
+
+
+def local_time(timestamp: int) -> LocalTime:
+    """
+    Integers for comparing message times in the local timezone, eg. whether
+    messages are at least a day apart, without building datetime objects
+    """
+    local = localtime(timestamp)
+    return LocalTime(seconds=timestamp + local.tm_gmtoff, year=local.tm_year)
+
 
 class _MessageEditState(NamedTuple):
     message_id: int
     old_topic: str
 
 
+# MessageBoxes created with lazy=True are only built when first used (eg. when
+# rendered on screen), and are released again once this many others have been
+# used more recently, so the cost of a narrow depends upon what is displayed
+MAXIMUM_BUILT_LAZY_MESSAGE_BOXES = 200
+_built_lazy_message_boxes: "OrderedDict[MessageBox, None]" = OrderedDict()
+_built_lazy_message_boxes_lock = Lock()
+
+
 class MessageBox(urwid.Pile):
+    # Rendering is cached by urwid in the underlying Pile instead
+    no_cache = ["render", "rows"]
+
     # type of last_message is Optional[Message], but needs refactoring
-    def __init__(self, message: Message, model: "Model", last_message: Any) -> None:
+    def __init__(
+        self,
+        message: Message,
+        model: "Model",
+        last_message: Any,
+        *,
+        lazy: bool = False,
+        fold_long_blocks: bool = True,
+    ) -> None:
         self.model = model
         self.message = message
+        self.fold_long_blocks = fold_long_blocks
+        self.sections: Dict[MessageBoxSection, Optional[Any]] = {}
         self.header: List[Any] = []
         self.content: urwid.Text = urwid.Text("")
         self.footer: List[Any] = []
@@ -68,6 +295,9 @@ class MessageBox(urwid.Pile):
         self.message_links: Dict[str, Tuple[str, int, bool]] = dict()
         self.topic_links: Dict[str, Tuple[str, int, bool]] = dict()
         self.time_mentions: List[Tuple[str, str]] = list()
+        # Time shown in the content header (if any), to update it in place
+        self.header_time: Optional[urwid.Text] = None
+        self.header_time_prefix = ""
         self.last_message = last_message
         # if this is the first message
         if self.last_message is None:
@@ -117,7 +347,54 @@ class MessageBox(urwid.Pile):
                     if recipient["id"] != self.model.user_id
                 ]
 
-        super().__init__(self.main_view())
+        self.is_lazy = lazy
+        self.is_built = not lazy
+        super().__init__(self.main_view() if self.is_built else [])
+
+    def _build(self) -> None:
+        """
+        Builds a lazy MessageBox if necessary, marking it as recently used
+        """
+        if not self.is_lazy:
+            return
+        if not self.is_built:
+            super().__init__(self.main_view())
+            self.is_built = True
+
+        with _built_lazy_message_boxes_lock:
+            _built_lazy_message_boxes[self] = None
+            _built_lazy_message_boxes.move_to_end(self)
+            while len(_built_lazy_message_boxes) > MAXIMUM_BUILT_LAZY_MESSAGE_BOXES:
+                least_recent, _ = _built_lazy_message_boxes.popitem(last=False)
+                least_recent.release()
+
+    def release(self) -> None:
+        """
+        Discards the widgets of a built MessageBox, until it is next used
+        """
+        self.is_built = False
+        super().__init__([])
+        self._invalidate()
+
+    def render(self, size: urwid_Size, focus: bool = False) -> Any:
+        self._build()
+        return super().render(size, focus)
+
+    def rows(self, size: urwid_Size, focus: bool = False) -> int:
+        self._build()
+        return super().rows(size, focus)
+
+    def get_cursor_coords(self, size: urwid_Size) -> Optional[Tuple[int, int]]:
+        self._build()
+        return super().get_cursor_coords(size)
+
+    def get_pref_col(self, size: urwid_Size) -> Optional[int]:
+        self._build()
+        return super().get_pref_col(size)
+
+    def move_cursor_to_coords(self, size: urwid_Size, col: int, row: int) -> bool:
+        self._build()
+        return super().move_cursor_to_coords(size, col, row)
 
     def need_recipient_header(self) -> bool:
         # Prevent redundant information in recipient bar
@@ -268,36 +545,35 @@ class MessageBox(urwid.Pile):
         return header
 
     def reactions_view(
-        self, reactions: List[Dict[str, Any]]
+        self, reaction_summary: Dict[str, ReactionSummary]
     ) -> Optional[urwid.Padding]:
-        if not reactions:
+        if not reaction_summary:
             return None
         try:
             my_user_id = self.model.user_id
-            reaction_stats = defaultdict(list)
-            for reaction in reactions:
-                user_id = self.model.get_user_id_from_reaction(reaction)
-                user_name = self.model._all_users_by_id[user_id]["full_name"]
-                if user_id == my_user_id:
-                    user_name = "You"
-                reaction_stats[reaction["emoji_name"]].append((user_id, user_name))
-
-            for reaction, ids in reaction_stats.items():
-                if (my_user_id, "You") in ids:
-                    ids.remove((my_user_id, "You"))
-                    ids.append((my_user_id, "You"))
-
-            reaction_texts = [
-                (
-                    "reaction_mine"
-                    if my_user_id in [id[0] for id in ids]
-                    else "reaction",
-                    f" :{reaction}: {len(ids)} "
-                    if len(reactions) > MAXIMUM_USERNAMES_VISIBLE
-                    else f" :{reaction}: {', '.join([id[1] for id in ids])} ",
+            total_reactions = sum(
+                len(emoji_summary["user_ids"])
+                for emoji_summary in reaction_summary.values()
+            )
+            show_names = total_reactions <= MAXIMUM_USERNAMES_VISIBLE
+
+            reaction_texts = []
+            for reaction, emoji_summary in reaction_summary.items():
+                user_ids = emoji_summary["user_ids"]
+                if show_names:
+                    user_names = [
+                        self.model._all_users_by_id[user_id]["full_name"]
+                        for user_id in user_ids
+                        if user_id != my_user_id
+                    ]
+                    if emoji_summary["mine"]:
+                        user_names.append("You")
+                    text = f" :{reaction}: {', '.join(user_names)} "
+                else:
+                    text = f" :{reaction}: {len(user_ids)} "
+                reaction_texts.append(
+                    ("reaction_mine" if emoji_summary["mine"] else "reaction", text)
                 )
-                for reaction, ids in reaction_stats.items()
-            ]
 
             spaced_reaction_texts = [
                 entry
@@ -380,20 +656,6 @@ class MessageBox(urwid.Pile):
         markup: List[Union[str, Tuple[Optional[str], Any]]] = [""]
         if soup is None:  # This is not iterable, so return promptly
             return markup, metadata["message_links"], metadata["time_mentions"]
-        unrendered_tags = {  # In pairs of 'tag_name': 'text'
-            # TODO: Some of these could be implemented
-            "br": "",  # No indicator of absence
-            "hr": "RULER",
-            "img": "IMAGE",
-        }
-        unrendered_div_classes = {  # In pairs of 'div_class': 'text'
-            # TODO: Support embedded content & twitter preview?
-            "message_embed": "EMBEDDED CONTENT",
-            "inline-preview-twitter": "TWITTER PREVIEW",
-            "message_inline_ref": "",  # Duplicate of other content
-            "message_inline_image": "",  # Duplicate of other content
-        }
-        unrendered_template = "[{} NOT RENDERED]"
         for element in soup:
             if isinstance(element, Tag):
                 # Caching element variables for use in the
@@ -409,23 +671,23 @@ class MessageBox(urwid.Pile):
                     metadata["bq_len"] -= 1
                     continue
                 markup.append(element)
-            elif tag == "div" and (set(tag_classes) & set(unrendered_div_classes)):
+            elif tag == "div" and (set(tag_classes) & set(UNRENDERED_DIV_CLASSES)):
                 # UNRENDERED DIV CLASSES
                 # NOTE: Though `matches` is generalized for multiple
                 # matches it is very unlikely that there would be any.
-                matches = set(unrendered_div_classes) & set(tag_classes)
-                text = unrendered_div_classes[matches.pop()]
+                matches = set(UNRENDERED_DIV_CLASSES) & set(tag_classes)
+                text = UNRENDERED_DIV_CLASSES[matches.pop()]
                 if text:
-                    markup.append(unrendered_template.format(text))
+                    markup.append(UNRENDERED_TEMPLATE.format(text))
             elif tag == "img" and tag_classes == ["emoji"]:
                 # CUSTOM EMOJIS AND ZULIP_EXTRA_EMOJI
                 emoji_name: str = tag_attrs.get("title", "")
                 markup.append(("msg_emoji", f":{emoji_name}:"))
-            elif tag in unrendered_tags:
+            elif tag in UNRENDERED_TAGS:
                 # UNRENDERED SIMPLE TAGS
-                text = unrendered_tags[tag]
+                text = UNRENDERED_TAGS[tag]
                 if text:
-                    markup.append(unrendered_template.format(text))
+                    markup.append(UNRENDERED_TEMPLATE.format(text))
             elif tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
                 # HEADING STYLE (h1 to h6)
                 markup.append(("msg_heading", tag_text))
@@ -452,77 +714,8 @@ class MessageBox(urwid.Pile):
                 markup.append(("msg_mention", tag_text))
             elif tag == "a":
                 # LINKS
-                # Use rstrip to avoid anomalies and edge cases like
-                # https://google.com vs https://google.com/.
-                link = tag_attrs["href"].rstrip("/")
                 text = element.img["src"] if element.img else tag_text
-                text = text.rstrip("/")
-
-                parsed_link = urlparse(link)
-                if not parsed_link.scheme:  # => relative link
-                    # Prepend org url to convert it to an absolute link
-                    link = urljoin(metadata["server_url"], link)
-
-                text = text if text else link
-
-                show_footlink = True
-                # Only use the last segment if the text is redundant.
-                # NOTE: The 'without scheme' excerpt is to deal with the case
-                # where a user puts a link without any scheme and the server
-                # uses http as the default scheme but keeps the text as-is.
-                # For instance, see how example.com/some/path becomes
-                # <a href="http://example.com">example.com/some/path</a>.
-                link_without_scheme, text_without_scheme = (
-                    data.split("://")[1] if "://" in data else data
-                    for data in [link, text]
-                )  # Split on '://' is for cases where text == link.
-                if link_without_scheme == text_without_scheme:
-                    last_segment = text.split("/")[-1]
-                    if "." in last_segment:
-                        new_text = last_segment  # Filename.
-                    elif text.startswith(metadata["server_url"]):
-                        # Relative URL.
-                        new_text = text.split(metadata["server_url"])[-1]
-                    else:
-                        new_text = (
-                            parsed_link.netloc
-                            if parsed_link.netloc
-                            else text.split("/")[0]
-                        )  # Domain name.
-                    if new_text != text_without_scheme:
-                        text = new_text
-                    else:
-                        # Do not show as a footlink as the text is sufficient
-                        # to represent the link.
-                        show_footlink = False
-
-                # Detect duplicate links to save screen real estate.
-                if link not in metadata["message_links"]:
-                    metadata["message_links"][link] = (
-                        text,
-                        len(metadata["message_links"]) + 1,
-                        show_footlink,
-                    )
-                else:
-                    # Append the text if its link already exist with a
-                    # different text.
-                    saved_text, saved_link_index, saved_footlink_status = metadata[
-                        "message_links"
-                    ][link]
-                    if saved_text != text:
-                        metadata["message_links"][link] = (
-                            f"{saved_text}, {text}",
-                            saved_link_index,
-                            show_footlink or saved_footlink_status,
-                        )
-
-                markup.extend(
-                    [
-                        ("msg_link", text),
-                        " ",
-                        ("msg_link_index", f"[{metadata['message_links'][link][1]}]"),
-                    ]
-                )
+                markup.extend(cls._link_markup(tag_attrs["href"], text, metadata))
             elif tag == "blockquote":
                 # BLOCKQUOTE TEXT
                 markup.append(("msg_quote", cls.soup2markup(element, metadata)[0]))
@@ -555,20 +748,14 @@ class MessageBox(urwid.Pile):
                 if code_soup is None:
                     code_soup = element.pre
 
-                for code_element in code_soup.contents:
-                    code_text = (
-                        code_element.text
-                        if isinstance(code_element, Tag)
-                        else code_element.string
+                markup.extend(
+                    cls._code_block_markup(
+                        element.get("data-code-language", ""),
+                        code_soup.get_text(),
+                        partial(cls._soup_code_block_markup, code_soup),
+                        metadata,
                     )
-
-                    if code_element.name == "span":
-                        if len(code_text) == 0:
-                            continue
-                        css_style = code_element.attrs.get("class", ["w"])
-                        markup.append((f"pygments:{css_style[0]}", code_text))
-                    else:
-                        markup.append(("pygments:w", code_text))
+                )
             elif tag in ("strong", "em"):
                 # BOLD & ITALIC
                 markup.append(("msg_bold", tag_text))
@@ -616,37 +803,506 @@ class MessageBox(urwid.Pile):
                 state["list_start"] = False
                 markup.extend(cls.soup2markup(element, metadata, **state)[0])
             elif tag == "table":
-                markup.extend(render_table(element))
+                markup.extend(render_table(element, cls._maximum_table_rows(metadata)))
             elif tag == "time":
                 # New in feature level 16, server version 3.0.
-                # Render time in current user's local time zone.
-                timestamp = element.get("datetime")
-
-                # This should not happen. Regardless, we are interested in
-                # debugging and reporting it to zulip/zulip if it does.
-                assert timestamp is not None, "Could not find datetime attr"
-
-                utc_time = dateutil.parser.parse(timestamp)
-                local_time = utc_time.astimezone(get_localzone())
-                # TODO: Address 12-hour format support with application-wide
-                # support for different formats.
-                time_string = local_time.strftime("%a, %b %-d %Y, %-H:%M (%Z)")
-                markup.append(("msg_time", f" {TIME_MENTION_MARKER} {time_string} "))
-
-                source_text = f"Original text was {tag_text.strip()}"
-                metadata["time_mentions"].append((time_string, source_text))
+                markup.append(
+                    cls._time_markup(element.get("datetime"), tag_text, metadata)
+                )
             else:
                 markup.extend(cls.soup2markup(element, metadata)[0])
         return markup, metadata["message_links"], metadata["time_mentions"]
 
+    @classmethod
+    def _code_block_markup(
+        cls,
+        language: str,
+        code_text: str,
+        build_markup: Callable[[], CodeBlockMarkup],
+        metadata: Dict[str, Any],
+    ) -> CodeBlockMarkup:
+        """
+        Returns the markup of a code block, reusing that of a cached block with
+        the same text and language, and folding it if requested in metadata
+        """
+        # NOTE: The server highlights the same code in the same language alike,
+        # so this keys the cache without serializing the highlighted HTML
+        key = hashlib.sha256(
+            "\0".join((metadata["server_url"], language, code_text)).encode()
+        ).hexdigest()
+        code_markup = code_block_cache.get(key)
+        if code_markup is None:
+            code_markup = build_markup()
+            code_block_cache.put(key, code_markup)
+        if metadata.get("fold_long_blocks") and MAXIMUM_CODE_BLOCK_LINES is not None:
+            return cls.fold_code_block(code_markup, MAXIMUM_CODE_BLOCK_LINES)
+        return code_markup
+
+    @staticmethod
+    def _maximum_table_rows(metadata: Dict[str, Any]) -> Optional[int]:
+        return MAXIMUM_TABLE_ROWS if metadata.get("fold_long_blocks") else None
+
+    @staticmethod
+    def _soup_code_block_markup(code_soup: Any) -> CodeBlockMarkup:
+        code_markup = []
+        for code_element in code_soup.contents:
+            code_text = (
+                code_element.text
+                if isinstance(code_element, Tag)
+                else code_element.string
+            )
+
+            if code_element.name == "span":
+                if len(code_text) == 0:
+                    continue
+                css_style = code_element.attrs.get("class", ["w"])
+                code_markup.append((f"pygments:{css_style[0]}", code_text))
+            else:
+                code_markup.append(("pygments:w", code_text))
+        return code_markup
+
+    @classmethod
+    def _tree_code_block_markup(cls, code_tree: Any) -> CodeBlockMarkup:
+        code_markup = []
+        for code_element in cls._tree_contents(code_tree, True):
+            if isinstance(code_element, str):
+                code_markup.append(("pygments:w", code_element))
+                continue
+            code_text = cls._tree_text(code_element, True)
+            if code_element.tag == "span":
+                if len(code_text) == 0:
+                    continue
+                css_class = code_element.get("class")
+                css_style = css_class.split() if css_class is not None else ["w"]
+                code_markup.append((f"pygments:{css_style[0]}", code_text))
+            else:
+                code_markup.append(("pygments:w", code_text))
+        return code_markup
+
+    @staticmethod
+    def fold_code_block(
+        code_markup: CodeBlockMarkup, maximum_lines: int
+    ) -> CodeBlockMarkup:
+        """
+        Returns code block markup truncated to maximum_lines, followed by a
+        line indicating how many lines are not shown, if it is any longer
+        """
+        total_lines = sum(text.count("\n") for _, text in code_markup)
+        if total_lines <= maximum_lines:
+            return code_markup
+
+        folded_markup: CodeBlockMarkup = []
+        lines = 0
+        for style, text in code_markup:
+            text_lines = text.count("\n")
+            if lines + text_lines >= maximum_lines:
+                # Keep this text up to the end of the last line to be shown
+                end = -1
+                for _ in range(maximum_lines - lines):
+                    end = text.index("\n", end + 1)
+                folded_markup.append((style, text[: end + 1]))
+                break
+            folded_markup.append((style, text))
+            lines += text_lines
+
+        hidden_lines = total_lines - maximum_lines
+        folded_markup.append(
+            ("pygments:w", FOLDED_CODE_BLOCK_TEMPLATE.format(hidden_lines) + "\n")
+        )
+        return folded_markup
+
+    @staticmethod
+    def _link_markup(
+        link: str, text: str, metadata: Dict[str, Any]
+    ) -> List[Union[str, Tuple[Optional[str], Any]]]:
+        # Use rstrip to avoid anomalies and edge cases like
+        # https://google.com vs https://google.com/.
+        link = link.rstrip("/")
+        text = text.rstrip("/")
+
+        parsed_link = urlparse(link)
+        if not parsed_link.scheme:  # => relative link
+            # Prepend org url to convert it to an absolute link
+            link = urljoin(metadata["server_url"], link)
+
+        text = text if text else link
+
+        show_footlink = True
+        # Only use the last segment if the text is redundant.
+        # NOTE: The 'without scheme' excerpt is to deal with the case
+        # where a user puts a link without any scheme and the server
+        # uses http as the default scheme but keeps the text as-is.
+        # For instance, see how example.com/some/path becomes
+        # <a href="http://example.com">example.com/some/path</a>.
+        link_without_scheme, text_without_scheme = (
+            data.split("://")[1] if "://" in data else data for data in [link, text]
+        )  # Split on '://' is for cases where text == link.
+        if link_without_scheme == text_without_scheme:
+            last_segment = text.split("/")[-1]
+            if "." in last_segment:
+                new_text = last_segment  # Filename.
+            elif text.startswith(metadata["server_url"]):
+                # Relative URL.
+                new_text = text.split(metadata["server_url"])[-1]
+            else:
+                new_text = (
+                    parsed_link.netloc if parsed_link.netloc else text.split("/")[0]
+                )  # Domain name.
+            if new_text != text_without_scheme:
+                text = new_text
+            else:
+                # Do not show as a footlink as the text is sufficient
+                # to represent the link.
+                show_footlink = False
+
+        # Detect duplicate links to save screen real estate.
+        if link not in metadata["message_links"]:
+            metadata["message_links"][link] = (
+                text,
+                len(metadata["message_links"]) + 1,
+                show_footlink,
+            )
+        else:
+            # Append the text if its link already exist with a
+            # different text.
+            saved_text, saved_link_index, saved_footlink_status = metadata[
+                "message_links"
+            ][link]
+            if saved_text != text:
+                metadata["message_links"][link] = (
+                    f"{saved_text}, {text}",
+                    saved_link_index,
+                    show_footlink or saved_footlink_status,
+                )
+
+        return [
+            ("msg_link", text),
+            " ",
+            ("msg_link_index", f"[{metadata['message_links'][link][1]}]"),
+        ]
+
+    @staticmethod
+    def _time_markup(
+        timestamp: Optional[str], tag_text: str, metadata: Dict[str, Any]
+    ) -> Tuple[str, str]:
+        # Render time in current user's local time zone.
+
+        # This should not happen. Regardless, we are interested in
+        # debugging and reporting it to zulip/zulip if it does.
+        assert timestamp is not None, "Could not find datetime attr"
+
+        utc_time = dateutil.parser.parse(timestamp)
+        local_time = utc_time.astimezone(get_localzone())
+        # TODO: Address 12-hour format support with application-wide
+        # support for different formats.
+        time_string = local_time.strftime("%a, %b %-d %Y, %-H:%M (%Z)")
+        source_text = f"Original text was {tag_text.strip()}"
+        metadata["time_mentions"].append((time_string, source_text))
+
+        return ("msg_time", f" {TIME_MENTION_MARKER} {time_string} ")
+
+    @staticmethod
+    def _soup_string(text: str, preserve_whitespace: bool) -> str:
+        """
+        Returns text as stored by BeautifulSoup, which replaces whitespace-only
+        strings by a newline or space, except within <pre> (or <textarea>)
+        """
+        if preserve_whitespace or text.strip(ASCII_WHITESPACE):
+            return text
+        return "\n" if "\n" in text else " "
+
+    @classmethod
+    def _tree_contents(
+        cls, element: Any, preserve_whitespace: bool = False
+    ) -> List[Any]:
+        """
+        Returns the children of an lxml element, with text (and comments) as
+        strings, in the same form as BeautifulSoup's Tag.contents
+        """
+        contents: List[Any] = []
+        if element.text:
+            contents.append(cls._soup_string(element.text, preserve_whitespace))
+        for child in element:
+            if isinstance(child.tag, str):
+                contents.append(child)
+            else:  # Comments are strings in BeautifulSoup
+                contents.append(cls._soup_string(child.text or "", preserve_whitespace))
+            if child.tail:
+                contents.append(cls._soup_string(child.tail, preserve_whitespace))
+        return contents
+
+    @classmethod
+    def _tree_string(cls, element: Any) -> Optional[str]:
+        """
+        Returns the single string within an lxml element, as BeautifulSoup's
+        Tag.string
+        """
+        contents = cls._tree_contents(element)
+        if len(contents) != 1:
+            return None
+        if isinstance(contents[0], str):
+            return contents[0]
+        return cls._tree_string(contents[0])
+
+    @classmethod
+    def _tree_text(cls, element: Any, preserve_whitespace: bool = False) -> str:
+        """
+        Returns the text within an lxml element, as BeautifulSoup's Tag.text
+        """
+        if preserve_whitespace or element.tag in WHITESPACE_PRESERVING_TAGS:
+            return "".join(element.itertext())
+        if not any(
+            element.find(f".//{tag}") is not None for tag in WHITESPACE_PRESERVING_TAGS
+        ):
+            return "".join(cls._soup_string(text, False) for text in element.itertext())
+        # Rare case of preserving whitespace only within some descendants
+        text = [cls._soup_string(element.text, False)] if element.text else []
+        for child in element:
+            if isinstance(child.tag, str):
+                text.append(cls._tree_text(child))
+            if child.tail:
+                text.append(cls._soup_string(child.tail, False))
+        return "".join(text)
+
+    @classmethod
+    def tree2markup(
+        cls, tree: Any, metadata: Dict[str, Any], **state: Any
+    ) -> Tuple[List[Any], Dict[str, Tuple[str, int, bool]], List[Tuple[str, str]]]:
+        """
+        Converts an lxml element into markup, identically to soup2markup, but
+        without building a BeautifulSoup tree or repeating work per element
+        """
+        markup: List[Union[str, Tuple[Optional[str], Any]]] = [""]
+        if tree is None:
+            return markup, metadata["message_links"], metadata["time_mentions"]
+        # soup2markup blanks newlines between list items before converting them
+        blank_newlines = tree.tag in ("ul", "ol", "li")
+        preserve_whitespace = (
+            tree.tag in WHITESPACE_PRESERVING_TAGS
+            or next(tree.iterancestors(*WHITESPACE_PRESERVING_TAGS), None) is not None
+        )
+        for element in cls._tree_contents(tree, preserve_whitespace):
+            if isinstance(element, str):
+                # NORMAL STRINGS
+                if element == "\n":
+                    if blank_newlines:
+                        markup.append("")
+                        continue
+                    elif metadata.get("bq_len", 0) > 0:
+                        metadata["bq_len"] -= 1
+                        continue
+                markup.append(element)
+                continue
+
+            tag = element.tag
+            tag_classes = element.get("class", "").split()
+
+            if tag == "div" and not UNRENDERED_DIV_CLASSES.keys().isdisjoint(
+                tag_classes
+            ):
+                # UNRENDERED DIV CLASSES
+                matches = set(UNRENDERED_DIV_CLASSES) & set(tag_classes)
+                text = UNRENDERED_DIV_CLASSES[matches.pop()]
+                if text:
+                    markup.append(UNRENDERED_TEMPLATE.format(text))
+            elif tag == "img" and tag_classes == ["emoji"]:
+                # CUSTOM EMOJIS AND ZULIP_EXTRA_EMOJI
+                markup.append(("msg_emoji", f":{element.get('title', '')}:"))
+            elif tag in UNRENDERED_TAGS:
+                # UNRENDERED SIMPLE TAGS
+                text = UNRENDERED_TAGS[tag]
+                if text:
+                    markup.append(UNRENDERED_TEMPLATE.format(text))
+            elif tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+                # HEADING STYLE (h1 to h6)
+                markup.append(
+                    ("msg_heading", cls._tree_text(element, preserve_whitespace))
+                )
+            elif tag in ("p", "del"):
+                # PARAGRAPH, STRIKE-THROUGH
+                markup.extend(cls.tree2markup(element, metadata)[0])
+            elif tag == "span" and "emoji" in tag_classes:
+                # EMOJI
+                markup.append(
+                    ("msg_emoji", cls._tree_text(element, preserve_whitespace))
+                )
+            elif tag == "span" and (
+                "katex-display" in tag_classes or "katex" in tag_classes
+            ):
+                # MATH TEXT (only showing the source, as in soup2markup)
+                annotation = element.find(".//annotation")
+                if annotation is not None:
+                    markup.append(
+                        ("msg_math", cls._tree_text(annotation, preserve_whitespace))
+                    )
+                else:
+                    markup.append(
+                        ("msg_math", cls._tree_text(element, preserve_whitespace))
+                    )
+            elif tag == "span" and (
+                "user-group-mention" in tag_classes
+                or "user-mention" in tag_classes
+                or "topic-mention" in tag_classes
+            ):
+                # USER, USER-GROUP & TOPIC MENTIONS
+                markup.append(
+                    ("msg_mention", cls._tree_text(element, preserve_whitespace))
+                )
+            elif tag == "a":
+                # LINKS
+                image = element.find(".//img")
+                text = (
+                    image.attrib["src"]
+                    if image is not None
+                    else cls._tree_text(element, preserve_whitespace)
+                )
+                markup.extend(cls._link_markup(element.attrib["href"], text, metadata))
+            elif tag == "blockquote":
+                # BLOCKQUOTE TEXT
+                markup.append(("msg_quote", cls.tree2markup(element, metadata)[0]))
+            elif tag == "code":
+                # CODE INLINE
+                markup.append(
+                    ("pygments:w", cls._tree_text(element, preserve_whitespace))
+                )
+            elif tag == "div" and "codehilite" in tag_classes:
+                # CODE BLOCK
+                code_tree = element.find(".//pre")
+                # NOTE: Old messages don't have the additional `code` tag.
+                if code_tree.find(".//code") is not None:
+                    code_tree = code_tree.find(".//code")
+
+                markup.extend(
+                    cls._code_block_markup(
+                        element.get("data-code-language", ""),
+                        "".join(code_tree.itertext()),
+                        partial(cls._tree_code_block_markup, code_tree),
+                        metadata,
+                    )
+                )
+            elif tag in ("strong", "em"):
+                # BOLD & ITALIC
+                markup.append(
+                    ("msg_bold", cls._tree_text(element, preserve_whitespace))
+                )
+            elif tag in ("ul", "ol"):
+                # LISTS (UL & OL)
+                if "indent_level" not in state:
+                    state["indent_level"] = 1
+                    state["list_start"] = True
+                else:
+                    state["indent_level"] += 1
+                    state["list_start"] = False
+                if tag == "ol":
+                    state["list_index"] = int(element.get("start", 1))
+                    markup.extend(cls.tree2markup(element, metadata, **state)[0])
+                    del state["list_index"]  # reset at end of this list
+                else:
+                    if "list_index" in state:
+                        del state["list_index"]  # this is unordered
+                    markup.extend(cls.tree2markup(element, metadata, **state)[0])
+                del state["indent_level"]  # reset indents after any list
+            elif tag == "li":
+                # LIST ITEMS (LI)
+                if not state.get("list_start", False):
+                    markup.append("\n")
+
+                indent = state.get("indent_level", 1)
+                if "list_index" in state:
+                    markup.append(f"{'  ' * indent}{state['list_index']}. ")
+                    state["list_index"] += 1
+                else:
+                    chars = [
+                        "\N{BULLET}",
+                        "\N{RING OPERATOR}",  # small hollow
+                        "\N{HYPHEN}",
+                    ]
+                    markup.append(f"{'  ' * indent}{chars[(indent - 1) % 3]} ")
+                state["list_start"] = False
+                markup.extend(cls.tree2markup(element, metadata, **state)[0])
+            elif tag == "table":
+                headers = list(element.find("thead").find("tr").iter("th"))
+                rows = list(element.find("tbody").iter("tr"))
+                table_cells = TableCells(
+                    column_alignments=[
+                        header.get("align", "left") for header in headers
+                    ],
+                    header=[cls._tree_text(header) for header in headers],
+                    rows=(
+                        [cls._tree_text(tdata) for tdata in row.iter("td")]
+                        for row in rows
+                    ),
+                    row_count=len(rows),
+                )
+                markup.extend(
+                    render_table_cells(table_cells, cls._maximum_table_rows(metadata))
+                )
+            elif tag == "time":
+                # New in feature level 16, server version 3.0.
+                markup.append(
+                    cls._time_markup(
+                        element.get("datetime"),
+                        cls._tree_text(element, preserve_whitespace),
+                        metadata,
+                    )
+                )
+            else:
+                markup.extend(cls.tree2markup(element, metadata)[0])
+        return markup, metadata["message_links"], metadata["time_mentions"]
+
     def main_view(self) -> List[Any]:
-        # Recipient Header
-        if self.need_recipient_header():
-            recipient_header = self.recipient_header()
+        self.sections = {}
+        for section in MESSAGE_BOX_SECTIONS:
+            self.sections[section] = self._build_section(section)
+        return self._section_widgets()
+
+    def _section_widgets(self) -> List[Any]:
+        header = [self.sections["recipient_header"], self.sections["content_header"]]
+        footer = [self.sections["footlinks"], self.sections["reactions"]]
+        self.header = [widget for widget in header if widget is not None]
+        self.footer = [widget for widget in footer if widget is not None]
+        return [*self.header, self.sections["content"], *self.footer]
+
+    def _build_section(self, section: MessageBoxSection) -> Optional[Any]:
+        if section == "recipient_header":
+            if self.need_recipient_header():
+                return self.recipient_header()
+            return None
+        elif section == "content_header":
+            return self.content_header()
+        elif section == "content":
+            return self.content_view()
+        elif section == "footlinks":
+            footlinks, _ = self.footlinks_view(
+                self.message_links,
+                maximum_footlinks=self.model.controller.maximum_footlinks,
+                padded=True,
+                wrap="ellipsis",
+            )
+            return footlinks
+        elif section == "reactions":
+            return self.reactions_view(self.model.reaction_summary(self.message))
         else:
-            recipient_header = None
+            raise RuntimeError("Invalid message box section")
 
-        # Content Header
+    def update_sections(self, sections: Iterable[MessageBoxSection]) -> None:
+        """
+        Rebuilds only the specified sections of a built MessageBox, keeping the
+        widgets of the others, eg. updating only reactions upon a new reaction
+        """
+        if not self.is_built:
+            return  # Sections are all built from the current message when used
+        to_update = set(sections)
+        if "content" in to_update:
+            to_update.add("footlinks")  # Footlinks are extracted from the content
+        for section in MESSAGE_BOX_SECTIONS:
+            if section in to_update:
+                self.sections[section] = self._build_section(section)
+        self.contents[:] = [
+            (widget, self.options()) for widget in self._section_widgets()
+        ]
+
+    def content_header(self) -> Optional[Any]:
         message = {
             key: {
                 "is_starred": "starred" in msg["flags"],
@@ -660,20 +1316,23 @@ class MessageBox(urwid.Pile):
                     if "timestamp" in msg
                     else None
                 ),
-                "datetime": (
-                    datetime.fromtimestamp(msg["timestamp"])
-                    if "timestamp" in msg
-                    else None
+                "local_time": (
+                    local_time(msg["timestamp"]) if "timestamp" in msg else None
                 ),
             }
             for key, msg in dict(this=self.message, last=self.last_message).items()
         }
         different = {  # How this message differs from the previous one
-            "recipients": recipient_header is not None,
+            "recipients": self.sections.get("recipient_header") is not None,
             "author": message["this"]["author"] != message["last"]["author"],
             "24h": (
-                message["last"]["datetime"] is not None
-                and ((message["this"]["datetime"] - message["last"]["datetime"]).days)
+                message["last"]["local_time"] is not None
+                and (
+                    message["this"]["local_time"].seconds
+                    - message["last"]["local_time"].seconds
+                )
+                // SECONDS_PER_DAY
+                != 0
             ),
             "timestamp": (
                 message["last"]["time"] is not None
@@ -683,9 +1342,8 @@ class MessageBox(urwid.Pile):
                 message["this"]["is_starred"] != message["last"]["is_starred"]
             ),
         }
-        any_differences = any(different.values())
-
-        if any_differences:  # Construct content_header, if needed
+        self.header_time = None
+        if any(different.values()):  # Construct content_header, if needed
             text_keys = ("author", "star", "time", "status")
             text: Dict[str, urwid_MarkupTuple] = {key: (None, " ") for key in text_keys}
 
@@ -705,26 +1363,49 @@ class MessageBox(urwid.Pile):
 
             if message["this"]["is_starred"]:
                 text["star"] = ("starred", "*")
-            if any(different[key] for key in ("recipients", "author", "timestamp")):
+            show_time = any(
+                different[key] for key in ("recipients", "author", "timestamp")
+            )
+            if show_time:
                 this_year = date.today().year
-                msg_year = message["this"]["datetime"].year
-                if this_year != msg_year:
-                    text["time"] = ("time", f"{msg_year} - {message['this']['time']}")
-                else:
-                    text["time"] = ("time", message["this"]["time"])
+                msg_year = message["this"]["local_time"].year
+                self.header_time_prefix = (
+                    f"{msg_year} - " if this_year != msg_year else ""
+                )
+                text["time"] = (
+                    "time",
+                    f"{self.header_time_prefix}{message['this']['time']}",
+                )
 
-            content_header = urwid.Columns(
+            time_text = urwid.Text(text["time"], align="right")
+            if show_time:
+                self.header_time = time_text
+            return urwid.Columns(
                 [
                     ("pack", urwid.Text(text["status"])),
                     ("weight", 10, urwid.Text(text["author"])),
-                    (26, urwid.Text(text["time"], align="right")),
+                    (26, time_text),
                     (1, urwid.Text(text["star"], align="right")),
                 ],
                 dividechars=1,
             )
-        else:
-            content_header = None
+        return None
+
+    def update_header_time(self) -> None:
+        """
+        Reformats only the time in the content header of a built MessageBox,
+        eg. upon a change of time format, rather than rebuilding the message
+        """
+        if not self.is_built or self.header_time is None:
+            return  # The current format is used when next built
+        formatted_time = self.model.formatted_local_time(
+            self.message["timestamp"], show_seconds=False
+        )
+        self.header_time.set_text(
+            ("time", f"{self.header_time_prefix}{formatted_time}")
+        )
 
+    def content_view(self) -> Any:
         # If the message contains '/me' emote then replace it with
         # sender's full name and show it in bold.
         if self.message["is_me_message"]:
@@ -792,7 +1473,9 @@ class MessageBox(urwid.Pile):
 
         # Transform raw message content into markup (As needed by urwid.Text)
         content, self.message_links, self.time_mentions = self.transform_content(
-            self.message["content"], self.model.server_url
+            self.message["content"],
+            self.model.server_url,
+            fold_long_blocks=self.fold_long_blocks,
         )
         self.content.set_text(content)
 
@@ -827,36 +1510,12 @@ class MessageBox(urwid.Pile):
             min_width=10,
             right=5,
         )
-
-        # Reactions
-        reactions = self.reactions_view(self.message["reactions"])
-
-        # Footlinks.
-        footlinks, _ = self.footlinks_view(
-            self.message_links,
-            maximum_footlinks=self.model.controller.maximum_footlinks,
-            padded=True,
-            wrap="ellipsis",
-        )
-
-        # Build parts together and return
-        parts = [
-            (recipient_header, recipient_header is not None),
-            (content_header, any_differences),
-            (wrapped_content, True),
-            (footlinks, footlinks is not None),
-            (reactions, reactions is not None),
-        ]
-
-        self.header = [part for part, condition in parts[:2] if condition]
-        self.footer = [part for part, condition in parts[3:] if condition]
-
-        return [part for part, condition in parts if condition]
+        return wrapped_content
 
     def update_message_author_status(self) -> bool:
         """
-        Update the author status by resetting the entire message box
-        if author field is present.
+        Update the author status by rebuilding the content header of the
+        message box, if the author field is present.
         """
         author_is_present = False
         author_column = 1  # Index of author field in content header
@@ -867,20 +1526,74 @@ class MessageBox(urwid.Pile):
             author_is_present = author_field.text != " "
 
         if author_is_present:
-            # Re initialize the message if update is required.
-            # FIXME: Render specific element (here author field) instead?
-            super().__init__(self.main_view())
+            self.update_sections(["content_header"])
 
         return author_is_present
 
     @classmethod
     def transform_content(
-        cls, content: Any, server_url: str
-    ) -> Tuple[
-        Tuple[None, Any],
-        Dict[str, Tuple[str, int, bool]],
-        List[Tuple[str, str]],
-    ]:
+        cls, content: Any, server_url: str, *, fold_long_blocks: bool = False
+    ) -> TransformedContent:
+        cache_key = (content, server_url, fold_long_blocks)
+        transformed = transformed_content_cache.get(cache_key)
+        if transformed is None:
+            transformed = _convert_content(
+                content, server_url, HTML_CONVERTER, fold_long_blocks
+            )
+            transformed_content_cache.put(cache_key, transformed)
+        return transformed
+
+    @classmethod
+    def pre_render(
+        cls, contents: Iterable[str], server_url: str
+    ) -> "List[Future[List[TransformedContent]]]":
+        """
+        Submits a batch of message contents to be converted in parallel into the
+        cache used by transform_content, without waiting for the results, so
+        building their MessageBoxes later is cheap
+        """
+        pending = list(
+            OrderedDict.fromkeys(
+                content
+                for content in contents
+                if (content, server_url, True) not in transformed_content_cache
+            )
+        )
+        if PRE_RENDER_WORKERS < 2 or len(pending) < PRE_RENDER_MINIMUM_BATCH:
+            return []
+
+        chunk_size = max(1, len(pending) // PRE_RENDER_WORKERS)
+        return [
+            _submit_pre_render(pending[start : start + chunk_size], server_url)
+            for start in range(0, len(pending), chunk_size)
+        ]
+
+    @classmethod
+    def _transform_content_with_lxml(
+        cls, content: Any, server_url: str, fold_long_blocks: bool = False
+    ) -> TransformedContent:
+        root = etree.HTML(content) if content else None
+        body = root.find("body") if root is not None else None
+
+        metadata = dict(
+            server_url=server_url,
+            message_links=dict(),
+            time_mentions=list(),
+            fold_long_blocks=fold_long_blocks,
+        )  # type: Dict[str, Any]
+
+        if body is not None and body.find(".//blockquote") is not None:
+            metadata["bq_len"] = cls.indent_quoted_content_in_tree(
+                root, QUOTED_TEXT_MARKER
+            )
+
+        markup, message_links, time_mentions = cls.tree2markup(body, metadata)
+        return (None, markup), message_links, time_mentions
+
+    @classmethod
+    def _transform_content(
+        cls, content: Any, server_url: str, fold_long_blocks: bool = False
+    ) -> TransformedContent:
         soup = BeautifulSoup(content, "lxml")
         body = soup.find(name="body")
 
@@ -888,6 +1601,7 @@ class MessageBox(urwid.Pile):
             server_url=server_url,
             message_links=dict(),
             time_mentions=list(),
+            fold_long_blocks=fold_long_blocks,
         )  # type: Dict[str, Any]
 
         if isinstance(body, Tag) and body.find(name="blockquote"):
@@ -948,6 +1662,62 @@ class MessageBox(urwid.Pile):
             pad_count += 1
         return bq_len
 
+    @classmethod
+    def indent_quoted_content_in_tree(cls, root: Any, padding_char: str) -> int:
+        """
+        Indents quoted text in an lxml tree, as indent_quoted_content does for
+        a BeautifulSoup tree
+        """
+
+        def new_paragraph(text: str) -> Any:
+            paragraph = etree.Element("p")
+            paragraph.text = text
+            return paragraph
+
+        pad_count = 1
+        blockquote_list = list(root.iter("blockquote"))
+        bq_len = len(blockquote_list)
+        for tag in blockquote_list:
+            child_list = [child for child in tag if isinstance(child.tag, str)]
+            has_child_block = next(tag.iterdescendants("blockquote"), None) is not None
+            actual_padding = f"{padding_char} " * pad_count
+            if len(child_list) == 1:
+                pad_count -= 1
+                child_iterator = child_list
+            elif not has_child_block:
+                child_iterator = child_list
+            else:
+                # If there is some text at the beginning of a
+                # quote, we pad it separately.
+                if child_list[0].tag == "p":
+                    child_list[0].addprevious(new_paragraph(f"\n{actual_padding}"))
+                child_iterator = child_list[1:]
+            for child in child_iterator:
+                # If the quoted message is multi-line message
+                # we deconstruct it and pad it at break-points (<br/>)
+                for br in list(child.iterdescendants("br")):
+                    if br.tail:  # Next sibling is text
+                        text = br.tail.strip()
+                        if text:
+                            br.tail = None
+                            br.addnext(new_paragraph(f"\n{padding_char} {text}"))
+                        continue
+                    next_s = br.getnext()
+                    if next_s is None:
+                        continue
+                    if isinstance(next_s.tag, str):
+                        # NOTE: Matches str(Tag.string), including "None"
+                        text = str(cls._tree_string(next_s)).strip()
+                    else:  # Comments are strings in BeautifulSoup
+                        text = (next_s.text or "").strip()
+                    if text:
+                        insert_tag = new_paragraph(f"\n{padding_char} {text}")
+                        insert_tag.tail = next_s.tail
+                        next_s.getparent().replace(next_s, insert_tag)
+                child.addprevious(new_paragraph(actual_padding))
+            pad_count += 1
+        return bq_len
+
     def selectable(self) -> bool:
         # Returning True, indicates that this widget
         # is designed to take focus.
@@ -956,6 +1726,7 @@ class MessageBox(urwid.Pile):
     def mouse_event(
         self, size: urwid_Size, event: str, button: int, col: int, row: int, focus: bool
     ) -> bool:
+        self._build()
         if event == "mouse press" and button == 1:
             if self.model.controller.is_in_editor_mode():
                 return True
@@ -965,6 +1736,7 @@ class MessageBox(urwid.Pile):
         return super().mouse_event(size, event, button, col, row, focus)
 
     def keypress(self, size: urwid_Size, key: str) -> Optional[str]:
+        self._build()
         if is_command_key("REPLY_MESSAGE", key):
             if self.message["type"] == "private":
                 self.model.controller.view.write_box.private_box_view(
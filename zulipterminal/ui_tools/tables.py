@@ -2,37 +2,40 @@
 Helper functions which render tables in the UI
 """
 
-from typing import Any, List, Optional, Tuple, Union, cast
+from itertools import islice
+from typing import Any, Iterator, List, NamedTuple, Optional, Union, cast
 
 from zulipterminal.urwid_types import urwid_MarkupTuple
 
 
-def parse_html_table(table_element: Any) -> Tuple[List[str], List[List[str]]]:
-    """
-    Parses an HTML table to extract cell items and column alignments.
+HIDDEN_ROWS_TEMPLATE = "[{} MORE ROWS NOT SHOWN]"
+
 
-    The table cells are stored in `cells` in a row-wise manner.
-    cells = [[row0, row0, row0],
-             [row1, row1, row1],
-             [row2, row2, row2]]
+class TableCells(NamedTuple):
+    """
+    The cells of a table, with body rows extracted only as they are iterated,
+    so that the cells of rows which are not rendered are never extracted.
     """
-    headers = table_element.thead.tr.find_all("th")
-    rows = table_element.tbody.find_all("tr")
-    column_alignments = []
 
-    # Add +1 to count the header row as well.
-    cells: List[List[str]] = [[] for _ in range(len(rows) + 1)]
+    column_alignments: List[str]
+    header: List[str]
+    rows: Iterator[List[str]]
+    row_count: int
 
-    # Fill up `cells` with the header/0th row and extract alignments.
-    for header in headers:
-        cells[0].append(header.text)
-        column_alignments.append(header.get(("align"), "left"))
 
-    # Fill up `cells` with body rows.
-    for index, row in enumerate(rows, start=1):
-        for tdata in row.find_all("td"):
-            cells[index].append(tdata.text)
-    return (column_alignments, cells)
+def iter_html_table(table_element: Any) -> TableCells:
+    """
+    Parses an HTML table to extract column alignments and header cells, and
+    the cells of each body row lazily.
+    """
+    headers = table_element.thead.tr.find_all("th")
+    rows = table_element.tbody.find_all("tr")
+    return TableCells(
+        column_alignments=[header.get(("align"), "left") for header in headers],
+        header=[header.text for header in headers],
+        rows=([tdata.text for tdata in row.find_all("td")] for row in rows),
+        row_count=len(rows),
+    )
 
 
 StyledTableData = List[Union[str, urwid_MarkupTuple]]
@@ -120,16 +123,29 @@ def row_with_only_border(
     return pad_row_strip(border, fill_char=line)
 
 
-def render_table(table_element: Any) -> StyledTableData:
+def render_table(
+    table_element: Any, maximum_rows: Optional[int] = None
+) -> StyledTableData:
     """
     A helper function for rendering a markup table in the MessageBox.
     """
-    column_alignments, cells = parse_html_table(table_element)
+    return render_table_cells(iter_html_table(table_element), maximum_rows)
 
-    # Calculate the width required for each column.
-    column_widths = [
-        len(max(column, key=lambda string: len(string))) for column in zip(*cells)
-    ]
+
+def render_table_cells(
+    table_cells: TableCells, maximum_rows: Optional[int] = None
+) -> StyledTableData:
+    """
+    Renders table cells as markup, limited to the first maximum_rows body rows
+    (if specified) followed by a line indicating how many rows are not shown.
+    Only the cells of rendered rows are extracted and measured.
+    """
+    column_alignments = table_cells.column_alignments
+    cells = [table_cells.header, *islice(table_cells.rows, maximum_rows)]
+    hidden_rows = table_cells.row_count - (len(cells) - 1)
+
+    # Calculate the width required for each column, in one pass over the cells.
+    column_widths = [max(map(len, column)) for column in zip(*cells)]
 
     top_border = row_with_only_border("┌", "─", "┬", "┐", column_widths)
     middle_border = row_with_only_border("├", "─", "┼", "┤", column_widths)
@@ -157,4 +173,7 @@ def render_table(table_element: Any) -> StyledTableData:
         )
     table.extend(bottom_border)
 
+    if hidden_rows > 0:
+        table.append("\n" + HIDDEN_ROWS_TEMPLATE.format(hidden_rows))
+
     return table
@@ -3,8 +3,21 @@ UI views for larger elements such as Streams, Messages, Topics, Help, etc
 """
 
 import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
 from datetime import datetime
-from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
 import pytz
 import urwid
@@ -36,15 +49,16 @@ from zulipterminal.config.ui_mappings import (
 )
 from zulipterminal.config.ui_sizes import LEFT_WIDTH
 from zulipterminal.helper import (
+    IncrementalSearch,
+    StreamData,
     TidiedUserInfo,
     asynch,
     match_emoji,
-    match_stream,
     match_user,
 )
 from zulipterminal.platform_code import detected_platform, detected_python_in_full
 from zulipterminal.server_url import near_message_url
-from zulipterminal.ui_tools.boxes import PanelSearchBox
+from zulipterminal.ui_tools.boxes import JumpToTimeBox, PanelSearchBox
 from zulipterminal.ui_tools.buttons import (
     EmojiButton,
     HomeButton,
@@ -64,6 +78,14 @@ from zulipterminal.urwid_types import urwid_Size
 MIDDLE_COLUMN_MOUSE_SCROLL_LINES = 1
 SIDE_PANELS_MOUSE_SCROLL_LINES = 5
 
+# Topic buttons are built as their topics are displayed, keeping only those of
+# the most recently displayed topics, so including all of those on screen
+TOPIC_BUTTONS_KEPT = 200
+
+# Messages are read (marked as read, and shown in the search bar) only once
+# scrolling through them has paused for this long, in seconds
+READ_MESSAGE_SCROLL_SETTLE_DELAY = 0.15
+
 
 class ModListWalker(urwid.SimpleFocusListWalker):
     def __init__(self, *, contents: List[Any], action: Callable[[], None]) -> None:
@@ -94,16 +116,126 @@ class ModListWalker(urwid.SimpleFocusListWalker):
 
         self._action()
 
-    def extend(self, items: List[Any], focus_position: Optional[int] = None) -> int:
-        if focus_position is None:
-            focus = self._adjust_focus_on_contents_modified(
-                slice(len(self), len(self)), items
-            )
-        else:
+    def extend(self, items: List[Any], focus_position: Optional[int] = None) -> None:
+        self.splice(len(self), len(self), items, focus_position)
+
+    def clear(self) -> None:
+        # The base class does not pass the removed items to the contents
+        # modified callback, so remove them as a slice instead
+        del self[:]
+
+    def splice(
+        self,
+        start: int,
+        stop: int,
+        items: List[Any],
+        focus_position: Optional[int] = None,
+    ) -> None:
+        """
+        Replaces the items from start to stop with items (eg. inserting a page
+        of messages when both are 0), in one operation rather than per item,
+        so modification and focus callbacks are only called once.
+        By default focus is adjusted to remain on the same item, if not replaced.
+        """
+        focus = self._adjust_focus_on_contents_modified(slice(start, stop), items)
+        if focus_position is not None:
             focus = focus_position
-        rval = super(urwid.MonitoredFocusList, self).extend(items)
+        super(urwid.MonitoredFocusList, self).__setitem__(slice(start, stop), items)
         self._set_focus(focus)
-        return rval
+
+
+class UnreadFrontier:
+    """
+    The sorted positions of unread messages in a message list, updated as the
+    list is modified, so that the messages read when focusing upon a message
+    (the unread ones immediately above, and including, it) are found in O(k)
+    for k messages, rather than by walking back through the message widgets
+    """
+
+    def __init__(self, msg_w_list: List[Any]) -> None:
+        self.positions = [
+            position
+            for position, msg_w in enumerate(msg_w_list)
+            if self.is_unread(msg_w)
+        ]
+        # Lowest and highest positions focused upon while scrolling, not yet read
+        self.scrolled_past: Optional[Tuple[int, int]] = None
+
+    @staticmethod
+    def is_unread(msg_w: Any) -> bool:
+        return getattr(msg_w, "attr_map", None) == {None: "unread"}
+
+    def contents_modified(
+        self, indices: Tuple[int, int, int], new_items: List[Any]
+    ) -> None:
+        # Used as the contents modified callback of a message list (ModListWalker)
+        # NOTE: Message lists are not modified using extended slices
+        start, stop, _ = indices
+        stop = max(start, stop)
+        first_removed = bisect_left(self.positions, start)
+        first_after = bisect_left(self.positions, stop)
+        shift = len(new_items) - (stop - start)
+        self.positions[first_removed:] = [
+            start + offset
+            for offset, msg_w in enumerate(new_items)
+            if self.is_unread(msg_w)
+        ] + [position + shift for position in self.positions[first_after:]]
+        if self.scrolled_past is not None:
+            low, high = self.scrolled_past
+            if start <= low and high < stop:
+                # All the messages scrolled past were replaced, eg. upon narrowing
+                self.scrolled_past = None
+            else:
+                # Positions of replaced messages move to the end of those replacing
+                # them, eg. remaining upon the same message as older ones are loaded
+                low, high = (
+                    position if position < start else max(start, position + shift)
+                    for position in (low, high)
+                )
+                self.scrolled_past = (low, high)
+        # Leave focus to be adjusted as usual
+
+    def set_unread(self, position: int, unread: bool) -> None:
+        index = bisect_left(self.positions, position)
+        is_present = index < len(self.positions) and self.positions[index] == position
+        if unread and not is_present:
+            self.positions.insert(index, position)
+        elif not unread and is_present:
+            del self.positions[index]
+
+    def scroll_past(self, start: int, stop: int) -> None:
+        """
+        Records that the positions from start to stop (in either order) were
+        focused upon while scrolling, so are read with the next focused message
+        """
+        low, high = sorted((start, stop))
+        if self.scrolled_past is not None:
+            low = min(low, self.scrolled_past[0])
+            high = max(high, self.scrolled_past[1])
+        self.scrolled_past = (low, high)
+
+    def pop_read(self, position: int) -> List[int]:
+        """
+        Removes and returns the (ascending) positions of unread messages read
+        when position is focused, along with any scrolled past: those from the
+        lowest to highest of these positions, and consecutive unread messages
+        ending at the lowest
+        """
+        low = high = position
+        if self.scrolled_past is not None:
+            low = min(low, self.scrolled_past[0])
+            high = max(high, self.scrolled_past[1])
+            self.scrolled_past = None
+        start = bisect_left(self.positions, low)
+        end = bisect_right(self.positions, high)
+        if start == end:
+            return []
+        if self.positions[start] == low:
+            while start > 0 and self.positions[start - 1] == self.positions[start] - 1:
+                start -= 1
+        read_positions = self.positions[start:end]
+        del self.positions[start:end]
+        return read_positions
 
 
 class MessageView(urwid.ListBox):
@@ -112,7 +244,14 @@ class MessageView(urwid.ListBox):
         self.view = view
         # Initialize for reference
         self.focus_msg = 0
+        # Scrolling not yet applied, and alarms for applying it or reading once
+        # it has settled, if pending
+        self._pending_scroll = 0
+        self._scroll_alarm: Optional[Any] = None
+        self._read_alarm: Optional[Any] = None
         self.log = ModListWalker(contents=self.main_view(), action=self.read_message)
+        self.unread_frontier = UnreadFrontier(self.log)
+        self.log.set_validate_contents_modified(self.unread_frontier.contents_modified)
 
         super().__init__(self.log)
         self.set_focus(self.focus_msg)
@@ -145,15 +284,14 @@ class MessageView(urwid.ListBox):
 
         # Only update if more messages are provided
         if ids_to_process != no_update_baseline:
-            if self.log:  # type: ignore[truthy-bool]  # Implemented in base class
-                self.log.remove(self.log[0])  # avoid duplication when updating
-
             message_list = create_msg_box_list(self.model, ids_to_process)
-            message_list.reverse()
-            for msg_w in message_list:
-                self.log.insert(0, msg_w)
-
-            self.set_focus(self.focus_msg)  # Return focus to original message
+            if self.log:  # type: ignore[truthy-bool]  # Implemented in base class
+                # Replace the top message (to update it), keeping focus upon the
+                # same message, which is last in the new page if it was the top
+                focus_position = self.log.focus + len(message_list) - 1
+                self.log.splice(0, 1, message_list, focus_position)
+            else:
+                self.log.splice(0, 0, message_list, len(message_list) - 1)
 
             self.model.controller.update_screen()
 
@@ -183,51 +321,91 @@ class MessageView(urwid.ListBox):
     ) -> bool:
         if event == "mouse press":
             if button == 4:
-                for _ in range(MIDDLE_COLUMN_MOUSE_SCROLL_LINES):
-                    self.keypress(size, primary_key_for_command("GO_UP"))
+                self._queue_scroll(-MIDDLE_COLUMN_MOUSE_SCROLL_LINES)
                 return True
             if button == 5:
-                for _ in range(MIDDLE_COLUMN_MOUSE_SCROLL_LINES):
-                    self.keypress(size, primary_key_for_command("GO_DOWN"))
+                self._queue_scroll(MIDDLE_COLUMN_MOUSE_SCROLL_LINES)
                 return True
         return super().mouse_event(size, event, button, col, row, focus)
 
+    def _queue_scroll(self, steps: int) -> None:
+        """
+        Scrolls by steps messages (upwards if negative) once pending input is
+        processed, so a burst of scrolling (eg. fast mouse wheel movement, or
+        repeated keys) results in one move before the screen is next drawn
+        """
+        self._pending_scroll += steps
+        if self._scroll_alarm is None:
+            self._scroll_alarm = self.model.controller.loop.set_alarm_in(
+                0, self._apply_scroll
+            )
+
+    def _apply_scroll(self, *args: Any) -> None:
+        steps = self._pending_scroll
+        self._pending_scroll = 0
+        self._scroll_alarm = None
+        if steps == 0:
+            return
+        if not self.log:  # type: ignore[truthy-bool]  # Implemented in base class
+            # No messages, eg. from a search without results
+            return
+        self._defer_read_message()
+
+        next_position = self.log.next_position if steps > 0 else self.log.prev_position
+        position = self.focus_position
+        try:
+            for _ in range(abs(steps)):
+                position = next_position(position)
+            reached_end = False
+        except Exception:
+            reached_end = True
+        # Messages passed are read with the message focused once scrolling settles
+        self.unread_frontier.scroll_past(self.focus_position, position)
+        if position != self.focus_position:
+            self.set_focus(position, "above" if steps > 0 else "below")
+            self.set_focus_valign("middle")
+
+        if reached_end and self.focus:
+            id = self.focus.original_widget.message["id"]
+            if steps > 0 and not self.new_loading:
+                self.load_new_messages(id)
+            elif steps < 0 and not self.old_loading:
+                self.load_old_messages(id)
+
+    def _defer_read_message(self) -> None:
+        # Avoid reading (and updating the server for) each message scrolled past
+        loop = self.model.controller.loop
+        if self._read_alarm is not None:
+            loop.remove_alarm(self._read_alarm)
+        self._read_alarm = loop.set_alarm_in(
+            READ_MESSAGE_SCROLL_SETTLE_DELAY, self._read_settled_message
+        )
+
+    def _read_settled_message(self, *args: Any) -> None:
+        self._read_alarm = None
+        self.read_message()
+
     def keypress(self, size: urwid_Size, key: str) -> Optional[str]:
         if is_command_key("GO_DOWN", key) and not self.new_loading:
-            try:
-                position = self.log.next_position(self.focus_position)
-                self.set_focus(position, "above")
-                self.set_focus_valign("middle")
-
-                return key
-            except Exception:
-                if self.focus:
-                    id = self.focus.original_widget.message["id"]
-                    self.load_new_messages(id)
-                return key
+            self._queue_scroll(1)
+            return key
 
         elif is_command_key("GO_UP", key) and not self.old_loading:
-            try:
-                position = self.log.prev_position(self.focus_position)
-                self.set_focus(position, "below")
-                self.set_focus_valign("middle")
-                return key
-            except Exception:
-                if self.focus:
-                    id = self.focus.original_widget.message["id"]
-                    self.load_old_messages(id)
-                return key
+            self._queue_scroll(-1)
+            return key
 
         elif is_command_key("SCROLL_UP", key) and not self.old_loading:
             if self.focus is not None and self.focus_position == 0:
                 return self.keypress(size, primary_key_for_command("GO_UP"))
             else:
+                self._defer_read_message()
                 return super().keypress(size, primary_key_for_command("SCROLL_UP"))
 
         elif is_command_key("SCROLL_DOWN", key) and not self.old_loading:
             if self.focus is not None and self.focus_position == len(self.log) - 1:
                 return self.keypress(size, primary_key_for_command("GO_DOWN"))
             else:
+                self._defer_read_message()
                 return super().keypress(size, primary_key_for_command("SCROLL_DOWN"))
 
         elif is_command_key("THUMBS_UP", key) and self.focus is not None:
@@ -263,6 +441,9 @@ class MessageView(urwid.ListBox):
         self.model.controller.update_screen()
 
     def read_message(self, index: int = -1) -> None:
+        # Read once scrolling has settled, if scrolling
+        if self._read_alarm is not None:
+            return
         # Message currently in focus
         if hasattr(self.model.controller, "view"):
             view = self.model.controller.view
@@ -290,17 +471,22 @@ class MessageView(urwid.ListBox):
             return
         # save the current focus
         self.model.set_focus_in_current_narrow(self.focus_position)
-        # msg ids that have been read
-        read_msg_ids = list()
+        # msg ids that have been read, from the current message upwards
         # until we find a read message above the current message
-        while msg_w.attr_map == {None: "unread"}:
-            msg_id = msg_w.original_widget.message["id"]
-            read_msg_ids.append(msg_id)
-            self.model.index["messages"][msg_id]["flags"].append("read")
-            msg_w.set_attr_map({None: None})
-            msg_w, curr_pos = self.body.get_prev(curr_pos)
-            if msg_w is None:
-                break
+        with self.model.state_lock:
+            read_msg_ws = [
+                self.log[position]
+                for position in reversed(self.unread_frontier.pop_read(curr_pos))
+            ]
+            read_msg_ids = [
+                msg_w.original_widget.message["id"] for msg_w in read_msg_ws
+            ]
+            for msg_id in read_msg_ids:
+                flags = self.model.index["messages"][msg_id]["flags"]
+                if "read" not in flags:
+                    flags.append("read")
+            for msg_w in read_msg_ws:
+                msg_w.set_attr_map({None: None})
         self.model.mark_message_ids_as_read(read_msg_ids)
 
 
@@ -317,12 +503,68 @@ class StreamsViewDivider(urwid.Divider):
         super().__init__(div_char=PINNED_STREAMS_DIVIDER)
 
 
+class LazyListWalker(urwid.ListWalker):
+    """
+    A list walker over rows of keys of type row_type (or of other widgets, eg.
+    dividers), which only builds the widget for a key using build_row when its
+    row is requested, ie. when it is displayed or focused
+    """
+
+    def __init__(self, build_row: Callable[[Any], Any], row_type: type) -> None:
+        self.build_row = build_row
+        self.row_type = row_type
+        self.rows: List[Any] = []
+        self.focus = 0
+
+    def set_rows(self, rows: List[Any], focus: int = 0) -> None:
+        self.rows = rows
+        self.focus = max(0, min(focus, len(rows) - 1))
+        self._modified()
+
+    def set_focus(self, position: int) -> None:
+        self.focus = position
+        self._modified()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, position: int) -> Any:
+        if not 0 <= position < len(self.rows):
+            raise IndexError(position)
+        row = self.rows[position]
+        return self.build_row(row) if isinstance(row, self.row_type) else row
+
+    def next_position(self, position: int) -> int:
+        return position + 1
+
+    def prev_position(self, position: int) -> int:
+        return position - 1
+
+    def positions(self, reverse: bool = False) -> Iterable[int]:
+        if reverse:
+            return range(len(self.rows) - 1, -1, -1)
+        return range(len(self.rows))
+
+
 class StreamsView(urwid.Frame):
-    def __init__(self, streams_btn_list: List[Any], view: Any) -> None:
+    """
+    Displays the subscribed streams, pinned streams first, from an ordered list
+    of stream ids, building buttons only for those streams which are displayed,
+    since some users are subscribed to very many streams
+    """
+
+    def __init__(self, view: Any) -> None:
         self.view = view
-        self.log = urwid.SimpleFocusListWalker(streams_btn_list)
-        self.streams_btn_list = streams_btn_list
+        # Buttons of the streams which have been displayed
+        self.stream_id_to_button: Dict[int, Any] = {}
+        self.streams_by_id: Dict[int, StreamData] = {}
+        self.stream_ids_by_name: Dict[str, int] = {}
+        self.colors_in_palette: Set[str] = set()
+        # Stream ids in display order, with a divider after any pinned streams
+        self.stream_rows: List[Any] = []
+        self.is_showing_search_results = False
         self.focus_index_before_search = 0
+        self.log = LazyListWalker(self._stream_button, int)
         list_box = urwid.ListBox(self.log)
         self.stream_search_box = PanelSearchBox(
             self, "SEARCH_STREAMS", self.update_streams
@@ -335,45 +577,89 @@ class StreamsView(urwid.Frame):
         )
         self.search_lock = threading.Lock()
         self.empty_search = False
+        self.update_stream_order()
+
+    def _stream_button(self, stream_id: int) -> Any:
+        stream_button = self.stream_id_to_button.get(stream_id)
+        if stream_button is None:
+            stream_button = StreamButton(
+                properties=self.streams_by_id[stream_id],
+                controller=self.view.controller,
+                view=self.view,
+                count=self.view.model.unread_counts["streams"].get(stream_id, 0),
+            )
+            self.stream_id_to_button[stream_id] = stream_button
+        return stream_button
+
+    def update_stream_order(self) -> None:
+        """
+        Lists the streams in the order of the pinned and unpinned streams, eg.
+        after a stream is (un)pinned, keeping the buttons which were built
+        """
+        pinned_stream_ids = [stream["id"] for stream in self.view.pinned_streams]
+        unpinned_stream_ids = [stream["id"] for stream in self.view.unpinned_streams]
+        streams = self.view.pinned_streams + self.view.unpinned_streams
+        self.streams_by_id = {stream["id"]: stream for stream in streams}
+        self.stream_ids_by_name = {stream["name"]: stream["id"] for stream in streams}
+        for stream_id in set(self.stream_id_to_button) - set(self.streams_by_id):
+            del self.stream_id_to_button[stream_id]
+
+        # Stream colors must be in the palette before the MainLoop starts, and
+        # so before their buttons are built
+        for color in {stream["color"] for stream in streams} - self.colors_in_palette:
+            StreamButton.add_color_to_palette(self.view.palette, color)
+            self.colors_in_palette.add(color)
+
+        stream_rows: List[Any] = pinned_stream_ids
+        if pinned_stream_ids:
+            stream_rows.append(StreamsViewDivider())
+        stream_rows.extend(unpinned_stream_ids)
+
+        self.stream_rows = stream_rows
+        if not self.is_showing_search_results:
+            # Keep the focus on the same stream, if it is still listed
+            focused_row = self.log.rows[self.log.focus] if len(self.log) else None
+            focus = (
+                stream_rows.index(focused_row)
+                if isinstance(focused_row, int) and focused_row in stream_rows
+                else 0
+            )
+            self.log.set_rows(stream_rows, focus)
 
     @asynch
     def update_streams(self, search_box: Any, new_text: str) -> None:
         if not self.view.controller.is_in_editor_mode():
             return
+        generation = self.stream_search_box.search_generation
         # wait for any previously started search to finish to avoid
         # displaying wrong stream list.
         with self.search_lock:
-            stream_buttons = [
-                (stream, stream.stream_name) for stream in self.streams_btn_list.copy()
+            if generation != self.stream_search_box.search_generation:
+                return
+            streams_display: List[Any] = [
+                self.stream_ids_by_name[stream_name]
+                for stream_name in self.view.model.stream_search_index.match(new_text)
+                if stream_name in self.stream_ids_by_name
             ]
-            streams_display = match_stream(
-                stream_buttons, new_text, self.view.pinned_streams
-            )[0]
 
             streams_display_num = len(streams_display)
             self.empty_search = streams_display_num == 0
 
             # Add a divider to separate pinned streams from the rest.
-            pinned_stream_names = [
-                stream["name"] for stream in self.view.pinned_streams
-            ]
+            pinned_stream_ids = {stream["id"] for stream in self.view.pinned_streams}
             first_unpinned_index = streams_display_num
-            for index, stream in enumerate(streams_display):
-                if stream.stream_name not in pinned_stream_names:
+            for index, stream_id in enumerate(streams_display):
+                if stream_id not in pinned_stream_ids:
                     first_unpinned_index = index
                     break
-            # Do not add a divider when it is already present. This can
-            # happen when new_text=''.
-            if first_unpinned_index not in [0, streams_display_num] and not isinstance(
-                streams_display[first_unpinned_index], StreamsViewDivider
-            ):
+            if first_unpinned_index not in [0, streams_display_num]:
                 streams_display.insert(first_unpinned_index, StreamsViewDivider())
 
-            self.log.clear()
+            self.is_showing_search_results = True
             if not self.empty_search:
-                self.log.extend(streams_display)
+                self.log.set_rows(streams_display)
             else:
-                self.log.extend([self.stream_search_box.search_error])
+                self.log.set_rows([self.stream_search_box.search_error])
             self.view.controller.update_screen()
 
     def mouse_event(
@@ -392,31 +678,39 @@ class StreamsView(urwid.Frame):
 
     def keypress(self, size: urwid_Size, key: str) -> Optional[str]:
         if is_command_key("SEARCH_STREAMS", key):
-            _, self.focus_index_before_search = self.log.get_focus()
+            # Not from get_focus, which gives no position if there are no streams
+            self.focus_index_before_search = self.log.focus
             self.set_focus("header")
             self.stream_search_box.set_caption(" ")
             self.view.controller.enter_editor_mode_with(self.stream_search_box)
             return key
         elif is_command_key("CLEAR_SEARCH", key):
             self.stream_search_box.reset_search_text()
-            self.log.clear()
-            self.log.extend(self.streams_btn_list)
+            self.is_showing_search_results = False
+            self.log.set_rows(self.stream_rows, self.focus_index_before_search)
             self.set_focus("body")
-            self.log.set_focus(self.focus_index_before_search)
             self.view.controller.update_screen()
             return key
         return super().keypress(size, key)
 
 
 class TopicsView(urwid.Frame):
-    def __init__(
-        self, topics_btn_list: List[Any], view: Any, stream_button: Any
-    ) -> None:
+    """
+    Displays the topics in a stream, most recent first, building buttons only
+    for those topics which are displayed, since some streams have very many
+    topics
+    """
+
+    def __init__(self, topic_names: List[str], view: Any, stream_button: Any) -> None:
         self.view = view
-        self.log = urwid.SimpleFocusListWalker(topics_btn_list)
-        self.topics_btn_list = topics_btn_list
         self.stream_button = stream_button
+        # All topics in the stream, and those listed (all, or search results)
+        self.topic_names = topic_names
+        self.listed_topic_names = topic_names
+        # Buttons of the most recently displayed topics, least recent first
+        self.topic_name_to_button: "OrderedDict[str, Any]" = OrderedDict()
         self.focus_index_before_search = 0
+        self.log = LazyListWalker(self._topic_button, str)
         self.list_box = urwid.ListBox(self.log)
         self.topic_search_box = PanelSearchBox(
             self, "SEARCH_TOPICS", self.update_topics
@@ -429,44 +723,74 @@ class TopicsView(urwid.Frame):
                 urwid.Divider(SECTION_DIVIDER_LINE),
             ]
         )
-        self.list_box.focus_position = self._focus_position_for_topic_name()
+        self._list_topics(topic_names, self._focus_position_for_topic_name())
         super().__init__(
             self.list_box,
             header=self.header_list,
         )
         self.search_lock = threading.Lock()
+        self.search_results: IncrementalSearch[str] = IncrementalSearch()
         self.empty_search = False
 
     def _focus_position_for_topic_name(self) -> int:
         saved_topic_state = self.view.saved_topic_in_stream_id(
             self.stream_button.stream_id
         )
-        if saved_topic_state is not None:
-            for index, topic in enumerate(self.log):
-                if topic.topic_name == saved_topic_state:
-                    return index
+        if saved_topic_state in self.topic_names:
+            return self.topic_names.index(saved_topic_state)
         return 0
 
+    def _topic_button(self, topic_name: str) -> Any:
+        topic_button = self.topic_name_to_button.get(topic_name)
+        if topic_button is not None:
+            self.topic_name_to_button.move_to_end(topic_name)
+            return topic_button
+
+        stream_id = self.stream_button.stream_id
+        topic_button = TopicButton(
+            stream_id=stream_id,
+            topic=topic_name,
+            controller=self.view.controller,
+            view=self.view,
+            count=self.view.model.unread_counts["unread_topics"].get(
+                (stream_id, topic_name), 0
+            ),
+        )
+        self.topic_name_to_button[topic_name] = topic_button
+        if len(self.topic_name_to_button) > TOPIC_BUTTONS_KEPT:
+            # Rebuilt (with the current unread count) if displayed again
+            self.topic_name_to_button.popitem(last=False)
+        return topic_button
+
+    def _list_topics(self, topic_names: List[str], focus: int = 0) -> None:
+        self.listed_topic_names = topic_names
+        self.log.set_rows(topic_names, focus)
+
     @asynch
     def update_topics(self, search_box: Any, new_text: str) -> None:
         if not self.view.controller.is_in_editor_mode():
             return
         # wait for any previously started search to finish to avoid
         # displaying wrong topics list.
+        generation = self.topic_search_box.search_generation
         with self.search_lock:
-            new_text = new_text.lower()
-            topics_to_display = [
-                topic
-                for topic in self.topics_btn_list.copy()
-                if new_text in topic.topic_name.lower()
-            ]
+            lower_text = new_text.lower()
+            topics_to_display = []
+            # Topic names are searched, so buttons are only built for results
+            for topic_name in self.search_results.candidates(
+                self.topic_names, new_text
+            ):
+                if generation != self.topic_search_box.search_generation:
+                    # Superseded by a search for newer text
+                    return
+                if lower_text in topic_name.lower():
+                    topics_to_display.append(topic_name)
+            self.search_results.update(self.topic_names, new_text, topics_to_display)
             self.empty_search = len(topics_to_display) == 0
 
-            self.log.clear()
-            if not self.empty_search:
-                self.log.extend(topics_to_display)
-            else:
-                self.log.extend([self.topic_search_box.search_error])
+            self._list_topics(topics_to_display)
+            if self.empty_search:
+                self.log.set_rows([self.topic_search_box.search_error])
             self.view.controller.update_screen()
 
     def update_topics_list(
@@ -474,23 +798,22 @@ class TopicsView(urwid.Frame):
     ) -> None:
         # More recent topics are found towards the beginning
         # of the list.
-        for topic_iterator, topic_button in enumerate(self.log):
-            if topic_button.topic_name == topic_name:
-                self.log.insert(0, self.log.pop(topic_iterator))
-                self.list_box.set_focus_valign("bottom")
-                if sender_id == self.view.model.user_id:
-                    self.list_box.set_focus(0)
-                return
-        # No previous topics with same topic names are found
-        # hence we create a new topic button for it.
-        new_topic_button = TopicButton(
-            stream_id=stream_id,
-            topic=topic_name,
-            controller=self.view.controller,
-            view=self.view,
-            count=0,
+        is_listing_all_topics = self.listed_topic_names is self.topic_names
+        self.topic_names = [topic_name] + [
+            name for name in self.topic_names if name != topic_name
+        ]
+        if not is_listing_all_topics:
+            # Searching, so the topic is listed if it matches the next search
+            return
+
+        # Keep the focus on the same topic, as it may have moved down
+        focused_topic_name = self.log.rows[self.log.focus] if len(self.log) else None
+        self._list_topics(
+            self.topic_names,
+            self.topic_names.index(focused_topic_name)
+            if focused_topic_name is not None
+            else 0,
         )
-        self.log.insert(0, new_topic_button)
         self.list_box.set_focus_valign("bottom")
         if sender_id == self.view.model.user_id:
             self.list_box.set_focus(0)
@@ -511,7 +834,8 @@ class TopicsView(urwid.Frame):
 
     def keypress(self, size: urwid_Size, key: str) -> Optional[str]:
         if is_command_key("SEARCH_TOPICS", key):
-            _, self.focus_index_before_search = self.log.get_focus()
+            # Not from get_focus, which gives no position if there are no topics
+            self.focus_index_before_search = self.log.focus
             self.set_focus("header")
             self.header_list.set_focus(2)
             self.topic_search_box.set_caption(" ")
@@ -519,10 +843,8 @@ class TopicsView(urwid.Frame):
             return key
         elif is_command_key("CLEAR_SEARCH", key):
             self.topic_search_box.reset_search_text()
-            self.log.clear()
-            self.log.extend(self.topics_btn_list)
+            self._list_topics(self.topic_names, self.focus_index_before_search)
             self.set_focus("body")
-            self.log.set_focus(self.focus_index_before_search)
             self.view.controller.update_screen()
             return key
         return super().keypress(size, key)
@@ -664,7 +986,11 @@ class RightColumnView(urwid.Frame):
 
         self.allow_update_user_list = True
         self.search_lock = threading.Lock()
+        self.search_results: IncrementalSearch[Any] = IncrementalSearch()
         self.empty_search = False
+        # Buttons of users shown so far, reused as their presence is updated
+        self.user_id_to_button: Dict[int, UserButton] = {}
+        self.view.user_id_to_button = self.user_id_to_button
         super().__init__(self.users_view(), header=search_box)
 
     @asynch
@@ -695,15 +1021,26 @@ class RightColumnView(urwid.Frame):
 
         # wait for any previously started search to finish to avoid
         # displaying wrong user list.
+        generation = self.user_search.search_generation
         with self.search_lock:
             if user_list:
                 self.view.users = user_list
+                self._update_default_users_view()
+                self.view.controller.update_screen()
+                return
 
-            users = self.view.users.copy()
+            users = self.view.users
             if new_text:
-                users_display = [user for user in users if match_user(user, new_text)]
+                users_display = []
+                for user in self.search_results.candidates(users, new_text):
+                    if generation != self.user_search.search_generation:
+                        # Superseded by a search for newer text
+                        return
+                    if match_user(user, new_text):
+                        users_display.append(user)
+                self.search_results.update(users, new_text, users_display)
             else:
-                users_display = users
+                users_display = users.copy()
 
             self.empty_search = len(users_display) == 0
 
@@ -717,33 +1054,66 @@ class RightColumnView(urwid.Frame):
             self.set_body(self.body)
             self.view.controller.update_screen()
 
+    def _user_button(self, user: Dict[str, Any]) -> UserButton:
+        status = user["status"]
+        state_marker = STATE_ICON[status]
+        color = f"user_{status}"
+        user_button = self.user_id_to_button.get(user["user_id"])
+        if user_button is None or user_button.label_text != user["full_name"]:
+            unread_count = self.view.model.unread_counts["unread_pms"].get(
+                user["user_id"], 0
+            )
+            user_button = UserButton(
+                user=user,
+                controller=self.view.controller,
+                view=self.view,
+                state_marker=state_marker,
+                color=color,
+                count=unread_count,
+                is_current_user=user["user_id"] == self.view.model.user_id,
+            )
+            self.user_id_to_button[user["user_id"]] = user_button
+        elif (user_button.prefix_style, user_button.prefix_text) != (
+            color,
+            state_marker,
+        ):
+            user_button.update_status(state_marker=state_marker, color=color)
+        return user_button
+
+    def _users_btn_list(self, users: List[Dict[str, Any]]) -> List[UserButton]:
+        return [
+            self._user_button(user)
+            for user in users
+            # Only include `inactive` users in search result.
+            if user["status"] != "inactive" or self.view.controller.is_in_editor_mode()
+        ]
+
+    def _update_default_users_view(self) -> None:
+        """
+        Updates the unsearched user list in place, reusing the buttons of users
+        already shown and restyling those whose presence changed, so that only
+        new users need buttons, and the focused user and scrolling are kept
+        """
+        user_w = self.view.user_w
+        users_btn_list = self._users_btn_list(self.view.users)
+        if users_btn_list != user_w.log:
+            focus_button, _ = user_w.log.get_focus()
+            user_w.log[:] = users_btn_list
+            if focus_button in users_btn_list:
+                user_w.log.set_focus(users_btn_list.index(focus_button))
+        user_w.users_btn_list = users_btn_list
+        self.users_btn_list = users_btn_list
+        if self.body is not user_w:
+            self.body = user_w
+            self.set_body(self.body)
+
     def users_view(self, users: Any = None) -> Any:
         reset_default_view_users = False
         if users is None:
             users = self.view.users.copy()
             reset_default_view_users = True
 
-        users_btn_list = list()
-        for user in users:
-            status = user["status"]
-            # Only include `inactive` users in search result.
-            if status == "inactive" and not self.view.controller.is_in_editor_mode():
-                continue
-            unread_count = self.view.model.unread_counts["unread_pms"].get(
-                user["user_id"], 0
-            )
-            is_current_user = user["user_id"] == self.view.model.user_id
-            users_btn_list.append(
-                UserButton(
-                    user=user,
-                    controller=self.view.controller,
-                    view=self.view,
-                    state_marker=STATE_ICON[status],
-                    color=f"user_{status}",
-                    count=unread_count,
-                    is_current_user=is_current_user,
-                )
-            )
+        users_btn_list = self._users_btn_list(users)
         user_w = UsersView(self.view.controller, users_btn_list)
         # Do not reset them while searching.
         if reset_default_view_users:
@@ -761,7 +1131,7 @@ class RightColumnView(urwid.Frame):
         elif is_command_key("CLEAR_SEARCH", key):
             self.user_search.reset_search_text()
             self.allow_update_user_list = True
-            self.body = UsersView(self.view.controller, self.users_btn_list)
+            self.body = self.view.user_w
             self.set_body(self.body)
             self.set_focus("body")
             self.view.controller.update_screen()
@@ -814,36 +1184,9 @@ class LeftColumnView(urwid.Pile):
         return w
 
     def streams_view(self) -> Any:
-        streams_btn_list = [
-            StreamButton(
-                properties=stream,
-                controller=self.controller,
-                view=self.view,
-                count=self.model.unread_counts["streams"].get(stream["id"], 0),
-            )
-            for stream in self.view.pinned_streams
-        ]
-
-        if len(streams_btn_list):
-            streams_btn_list += [StreamsViewDivider()]
-
-        streams_btn_list += [
-            StreamButton(
-                properties=stream,
-                controller=self.controller,
-                view=self.view,
-                count=self.model.unread_counts["streams"].get(stream["id"], 0),
-            )
-            for stream in self.view.unpinned_streams
-        ]
-
-        self.view.stream_id_to_button = {
-            stream.stream_id: stream
-            for stream in streams_btn_list
-            if hasattr(stream, "stream_id")
-        }
-
-        self.view.stream_w = StreamsView(streams_btn_list, self.view)
+        # Stream buttons are built by the StreamsView, as they are displayed
+        self.view.stream_w = StreamsView(self.view)
+        self.view.stream_id_to_button = self.view.stream_w.stream_id_to_button
         w = urwid.LineBox(
             self.view.stream_w,
             title="Streams",
@@ -860,22 +1203,8 @@ class LeftColumnView(urwid.Pile):
         return w
 
     def topics_view(self, stream_button: Any) -> Any:
-        stream_id = stream_button.stream_id
-        topics = self.model.topics_in_stream(stream_id)
-        topics_btn_list = [
-            TopicButton(
-                stream_id=stream_id,
-                topic=topic,
-                controller=self.controller,
-                view=self.view,
-                count=self.model.unread_counts["unread_topics"].get(
-                    (stream_id, topic), 0
-                ),
-            )
-            for topic in topics
-        ]
-
-        self.view.topic_w = TopicsView(topics_btn_list, self.view, stream_button)
+        topics = self.model.topics_in_stream(stream_button.stream_id)
+        self.view.topic_w = TopicsView(topics, self.view, stream_button)
         w = urwid.LineBox(
             self.view.topic_w,
             title="Topics",
@@ -898,9 +1227,7 @@ class LeftColumnView(urwid.Pile):
         )
 
     def update_stream_view(self) -> None:
-        self.stream_v = self.streams_view()
-        if not self.is_in_topic_view:
-            self.show_stream_view()
+        self.view.stream_w.update_stream_order()
 
     def show_stream_view(self) -> None:
         self.is_in_topic_view = False
@@ -1658,23 +1985,21 @@ class MsgInfoView(PopUpView):
             msg_info.append(("Topic Links", []))
         if time_mentions:
             msg_info.append(("Time mentions", time_mentions))
-        if msg["reactions"]:
-            reactions = sorted(
+        reaction_summary = controller.model.reaction_summary(msg)
+        if reaction_summary:
+            grouped_reactions = [
                 (
-                    reaction["emoji_name"],
-                    controller.model._all_users_by_id[
-                        controller.model.get_user_id_from_reaction(reaction)
-                    ]["full_name"],
+                    reaction,
+                    "\n".join(
+                        sorted(
+                            controller.model._all_users_by_id[user_id]["full_name"]
+                            for user_id in reaction_summary[reaction]["user_ids"]
+                        )
+                    ),
                 )
-                for reaction in msg["reactions"]
-            )
-            grouped_reactions: Dict[str, str] = dict()
-            for reaction, user in reactions:
-                if reaction in grouped_reactions:
-                    grouped_reactions[reaction] += f"\n{user}"
-                else:
-                    grouped_reactions[reaction] = user
-            msg_info.append(("Reactions", list(grouped_reactions.items())))
+                for reaction in sorted(reaction_summary)
+            ]
+            msg_info.append(("Reactions", grouped_reactions))
 
         popup_width, column_widths = self.calculate_table_widths(msg_info, len(title))
         widgets = self.make_table_with_categories(msg_info, column_widths)
@@ -1775,6 +2100,18 @@ class MsgInfoView(PopUpView):
         return super().keypress(size, key)
 
 
+class JumpToTimeView(PopUpView):
+    def __init__(self, controller: Any, title: str) -> None:
+        self.time_box = JumpToTimeBox(controller)
+        widgets = [
+            self.time_box,
+            urwid.Divider(),
+            urwid.Text(" eg. 2023-05-01, 2023-05-01 14:30, or May 1 2pm"),
+        ]
+        super().__init__(controller, widgets, "JUMP_TO_TIME", 52, title)
+        self.controller.enter_editor_mode_with(self.time_box)
+
+
 class EditModeView(PopUpView):
     def __init__(self, controller: Any, button: Any) -> None:
         self.edit_mode_button = button
@@ -1950,8 +2287,8 @@ class FullRenderedMsgView(PopUpView):
         self.time_mentions = time_mentions
         max_cols, max_rows = controller.maximum_popup_dimensions()
 
-        # Get rendered message
-        msg_box = MessageBox(message, controller.model, None)
+        # Get rendered message, including any long code blocks in full
+        msg_box = MessageBox(message, controller.model, None, fold_long_blocks=False)
 
         super().__init__(
             controller,
@@ -2044,6 +2381,13 @@ class EmojiPickerView(PopUpView):
         self.message = message
         self.controller = controller
         self.selected_emojis: Dict[str, str] = {}
+        # Count once here, rather than for each of the (many) emoji buttons
+        self.reaction_counts: Dict[str, int] = {}
+        for emoji_summary in controller.model.reaction_summary(message).values():
+            emoji_code = emoji_summary["emoji_code"]
+            self.reaction_counts[emoji_code] = self.reaction_counts.get(
+                emoji_code, 0
+            ) + len(emoji_summary["user_ids"])
         self.emoji_buttons = self.generate_emoji_buttons(emoji_units)
         width = max(len(button.label) for button in self.emoji_buttons)
         max_cols, max_rows = controller.maximum_popup_dimensions()
@@ -2056,6 +2400,7 @@ class EmojiPickerView(PopUpView):
         )
         self.empty_search = False
         self.search_lock = threading.Lock()
+        self.search_results: IncrementalSearch[Any] = IncrementalSearch()
         super().__init__(
             controller,
             self.emoji_buttons,
@@ -2086,17 +2431,24 @@ class EmojiPickerView(PopUpView):
         if not hasattr(self, "emoji_search"):
             return
 
+        generation = self.emoji_search.search_generation
         with self.search_lock:
-            self.emojis_display = list()
             if new_text and new_text != self.emoji_search.search_text:
-                for button in self.emoji_buttons:
+                emojis_display = list()
+                buttons = self.search_results.candidates(self.emoji_buttons, new_text)
+                for button in buttons:
+                    if generation != self.emoji_search.search_generation:
+                        # Superseded by a search for newer text
+                        return
                     if match_emoji(button.emoji_name, new_text):
-                        self.emojis_display.append(button)
+                        emojis_display.append(button)
                     else:
                         for alias in button.aliases:
                             if match_emoji(alias, new_text):
-                                self.emojis_display.append(button)
+                                emojis_display.append(button)
                                 break
+                self.search_results.update(self.emoji_buttons, new_text, emojis_display)
+                self.emojis_display = emojis_display
             else:
                 self.emojis_display = self.emoji_buttons
 
@@ -2122,11 +2474,7 @@ class EmojiPickerView(PopUpView):
             self.selected_emojis.update({emoji_code: emoji_name})
 
     def count_reactions(self, emoji_code: str) -> int:
-        num_reacts = 0
-        for reaction in self.message["reactions"]:
-            if reaction["emoji_code"] == emoji_code:
-                num_reacts += 1
-        return num_reacts
+        return self.reaction_counts.get(emoji_code, 0)
 
     def generate_emoji_buttons(
         self, emoji_units: List[Tuple[str, str, List[str]]]